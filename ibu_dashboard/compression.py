@@ -0,0 +1,159 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from flask import request
+
+# Content-Encoding negotiation for app responses. Compressed bodies are kept in
+# a byte-bounded LRU keyed by (body digest, encoding), so repeated payloads
+# (cached trends/probation JSON, static CSS) are only compressed once per
+# process. Brotli is used when the optional `brotli` package is installed.
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_CACHE_MAX_BYTES = int(
+    os.getenv("COMPRESSION_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+    "text/css",
+    "text/html",
+    "text/javascript",
+    "text/plain",
+}
+
+
+def supported_encodings() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header value."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output deterministic for identical bodies
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressedBodyCache:
+    """Thread-safe LRU of compressed bodies bounded by total compressed size."""
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._size = 0
+
+    def get(self, data: bytes, encoding: str) -> bytes:
+        key = (hashlib.sha1(data).hexdigest(), encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        compressed = compress(data, encoding)
+        if len(compressed) <= self.max_bytes:
+            with self._lock:
+                if key not in self._entries:
+                    self._entries[key] = compressed
+                    self._size += len(compressed)
+                while self._size > self.max_bytes and self._entries:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= len(evicted)
+        return compressed
+
+
+def _static_body(app) -> Optional[bytes]:
+    """Body of a static file response (sent with direct_passthrough by Flask)."""
+    filename = (request.view_args or {}).get("filename")
+    if not filename or not app.static_folder:
+        return None
+    path = os.path.realpath(os.path.join(app.static_folder, filename))
+    if not path.startswith(os.path.realpath(app.static_folder) + os.sep):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def init_compression(app, cache: Optional[CompressedBodyCache] = None):
+    """Register the after_request hook that compresses eligible responses."""
+    if not COMPRESSION_ENABLED:
+        return None
+    cache = cache or CompressedBodyCache()
+
+    @app.after_request
+    def _compress_response(response):
+        response.vary.add("Accept-Encoding")
+        if (
+            response.status_code != 200
+            or (response.is_streamed and not response.direct_passthrough)
+            or "Content-Encoding" in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        ):
+            return response
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+        if encoding is None:
+            return response
+        if response.direct_passthrough:
+            # Static files: only whole-file responses from the static endpoint
+            if request.endpoint != "static":
+                return response
+            data = _static_body(app)
+            if data is None or len(data) < COMPRESSION_MIN_SIZE:
+                return response
+            close = getattr(response.response, "close", None)
+            if close is not None:
+                close()
+            response.direct_passthrough = False
+        else:
+            data = response.get_data()
+        if len(data) < COMPRESSION_MIN_SIZE:
+            return response
+        response.set_data(cache.get(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, _ = response.get_etag()
+        if etag:
+            # The encoded body differs from the identity one: weak validator only
+            response.set_etag(etag, weak=True)
+        return response
+
+    return cache
@@ -0,0 +1,126 @@
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Shape-preserving downsampling for long line series (Largest-Triangle-
+# Three-Buckets, Steinarsson 2013). A multi-year daily series is reduced to
+# at most `max_points` points that keep its visible peaks and dips; points
+# inside an optional focus window (the range the user zoomed into) are kept
+# exactly, plus one neighbour on each side so the line enters it unchanged.
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the `threshold` points LTTB keeps (always first and last)."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.nan_to_num(y)
+    every = (n - 2) / (threshold - 2)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        keep[i + 1] = a
+    keep[-1] = n - 1
+    return keep
+
+
+def downsample_indices(
+    x: np.ndarray,
+    y: np.ndarray,
+    max_points: int,
+    focus: Optional[Tuple[float, float]] = None,
+) -> np.ndarray:
+    """Indices to keep: everything inside `focus`, LTTB elsewhere so the
+    total stays near `max_points` (each side of the focus keeps its ends)."""
+    n = len(x)
+    if n <= max_points:
+        return np.arange(n)
+    if focus is None:
+        return lttb_indices(x, y, max_points)
+    inside = np.flatnonzero((x >= focus[0]) & (x <= focus[1]))
+    if not len(inside):
+        return lttb_indices(x, y, max_points)
+    lo = max(int(inside[0]) - 1, 0)
+    hi = min(int(inside[-1]) + 1, n - 1)
+    parts = [np.arange(lo, hi + 1)]
+    budget = max_points - len(parts[0])
+    outside = lo + (n - 1 - hi)
+    for start, end in ((0, lo), (hi + 1, n)):
+        length = end - start
+        if length <= 0:
+            continue
+        share = max(2, round(budget * length / outside)) if budget > 0 else 2
+        parts.append(start + lttb_indices(x[start:end], y[start:end], share))
+    return np.unique(np.concatenate(parts))
+
+
+def _day_numbers(values) -> Optional[np.ndarray]:
+    try:
+        return np.array(
+            [date.fromisoformat(v).toordinal() for v in values], dtype=np.float64
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def downsample_trace(
+    trace: dict, max_points: int, focus: Optional[Tuple[date, date]] = None
+) -> dict:
+    """Line (scatter) trace reduced to about `max_points` points; every
+    per-point list of the trace is sliced alike. Other traces are returned
+    unchanged: dropping bars or candles would misrepresent the periods."""
+    xs = trace.get("x")
+    ys = trace.get("y")
+    if (
+        trace.get("type") != "scatter"
+        or not isinstance(xs, list)
+        or not isinstance(ys, list)
+        or len(xs) != len(ys)
+        or len(xs) <= max_points
+    ):
+        return trace
+    x = _day_numbers(xs)
+    focus_days = None
+    if x is None:
+        x = np.arange(len(xs), dtype=np.float64)
+    elif focus is not None:
+        focus_days = (focus[0].toordinal(), focus[1].toordinal())
+    y = np.array([np.nan if v is None else v for v in ys], dtype=np.float64)
+    keep = downsample_indices(x, y, max_points, focus_days).tolist()
+    if len(keep) == len(xs):
+        return trace
+    reduced = dict(trace)
+    for key, values in trace.items():
+        if isinstance(values, list) and len(values) == len(xs):
+            reduced[key] = [values[i] for i in keep]
+    return reduced
+
+
+class TraceDownsampler:
+    """Callable applying downsample_trace to each trace it is given;
+    `reduced` records whether any of them actually lost points."""
+
+    def __init__(self, max_points: int, focus: Optional[Tuple[date, date]] = None):
+        self.max_points = max_points
+        self.focus = focus
+        self.reduced = False
+
+    def __call__(self, trace: dict) -> dict:
+        result = downsample_trace(trace, self.max_points, self.focus)
+        if result is not trace:
+            self.reduced = True
+        return result
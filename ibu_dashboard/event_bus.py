@@ -0,0 +1,198 @@
+import json
+import os
+import socket
+import threading
+from collections import deque
+from typing import Callable, Iterator, Optional, Set, Tuple
+
+# In-process broadcast pub/sub for Server-Sent Events. Every subscriber gets
+# its own bounded buffer: a slow or stalled browser tab only drops its own
+# oldest events instead of blocking the publisher or starving other clients.
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "64"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+SNAPSHOT_WATCH_INTERVAL = float(os.getenv("SNAPSHOT_WATCH_INTERVAL", "5"))
+
+
+def format_sse(data: str, event: Optional[str] = None, event_id=None) -> str:
+    """Encode one SSE message (multi-line data is split into data: lines)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscription:
+    """One subscriber's bounded event buffer (oldest events dropped when full)."""
+
+    def __init__(self, bus: "EventBus", events: Optional[Set[str]], maxlen: int):
+        self.bus = bus
+        self.events = events
+        self.dropped = 0
+        self._buffer: deque = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def wants(self, event: str) -> bool:
+        return self.events is None or event in self.events
+
+    def push(self, item: Tuple[int, str, str]) -> None:
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(item)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Tuple[int, str, str]]:
+        """Next (id, event, data) or None on timeout/close."""
+        with self._cond:
+            if not self._buffer and not self.closed:
+                self._cond.wait(timeout)
+            if self._buffer:
+                return self._buffer.popleft()
+            return None
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """Broadcast every published event to all matching subscribers."""
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        self.buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscribers: Set[Subscription] = set()
+        self._next_id = 1
+        self._listeners = []
+
+    def subscribe(self, events=None) -> Subscription:
+        sub = Subscription(self, set(events) if events else None, self.buffer_size)
+        with self._lock:
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def add_listener(self, callback: Callable[[str, str], None]) -> None:
+        """Call `callback(event, data)` for every published event (e.g. forwarders)."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def publish(self, event: str, payload=None, forward: bool = True) -> int:
+        """Send `payload` (JSON-encoded unless already a string) to all subscribers."""
+        data = payload if isinstance(payload, str) else json.dumps(payload or {})
+        with self._lock:
+            item = (self._next_id, event, data)
+            self._next_id += 1
+            subscribers = [s for s in self._subscribers if s.wants(event)]
+            listeners = list(self._listeners) if forward else []
+        for sub in subscribers:
+            sub.push(item)
+        for callback in listeners:
+            try:
+                callback(event, data)
+            except Exception as e:
+                print(f"Error forwarding event {event}: {e}")
+        return item[0]
+
+    def stream(
+        self,
+        events=None,
+        heartbeat: float = EVENT_HEARTBEAT_SECONDS,
+        initial: Optional[Callable[[], Iterator[Tuple[str, object]]]] = None,
+        named: bool = True,
+    ) -> Iterator[str]:
+        """SSE generator for one client: sends the (event, payload) pairs from
+        `initial()` first, then new events, with a comment heartbeat every
+        `heartbeat` seconds while idle."""
+        sub = self.subscribe(events)
+        try:
+            yield f"retry: {int(heartbeat * 1000)}\n\n"
+            for event, payload in initial() if initial else ():
+                data = payload if isinstance(payload, str) else json.dumps(payload)
+                yield format_sse(data, event if named else None)
+            while True:
+                item = sub.get(timeout=heartbeat)
+                if item is None:
+                    if sub.closed:
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                event_id, event, data = item
+                yield format_sse(data, event if named else None, event_id)
+        finally:
+            sub.close()
+
+
+class UdpEventForwarder:
+    """Bus listener sending each event as a JSON datagram to the SSE sidecar
+    (see sse_server.py). Fire-and-forget: a missing sidecar never blocks."""
+
+    def __init__(self, addr: str):
+        host, _, port = addr.rpartition(":")
+        self.addr = (host or "127.0.0.1", int(port))
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+
+    def __call__(self, event: str, data: str) -> None:
+        try:
+            message = json.dumps({"event": event, "data": data}).encode("utf-8")
+            self._sock.sendto(message, self.addr)
+        except OSError as e:
+            print(f"Error forwarding event {event} to {self.addr}: {e}")
+
+
+class FolderWatcher(threading.Thread):
+    """Daemon thread calling `on_change()` when a folder's mtime changes.
+
+    Adding or replacing a file updates the directory mtime, so one stat() per
+    interval replaces re-globbing the folder on every client poll.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        on_change: Callable[[], None],
+        interval: float = SNAPSHOT_WATCH_INTERVAL,
+    ):
+        super().__init__(name=f"watch:{folder}", daemon=True)
+        self.folder = folder
+        self.on_change = on_change
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def run(self) -> None:
+        last = self._mtime()
+        while not self._stop_event.wait(self.interval):
+            current = self._mtime()
+            if current == last:
+                continue
+            last = current
+            try:
+                self.on_change()
+            except Exception as e:
+                print(f"Error handling change in {self.folder}: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+
+event_bus = EventBus()
@@ -0,0 +1,323 @@
+import hashlib
+import operator
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Forecasts for the trends predictions. All series of a request are fitted
+# together on NaN-padded (series x observations) matrices; only the final
+# per-series scalars are finished in Python so the long-standing "linear" and
+# "moving_average" methods give exactly the values they always did.
+#
+# Methods:
+#   linear          least squares line over day offsets
+#   moving_average  last value + average change of the last 5 observations
+#   exponential     simple exponential smoothing (flat forecast)
+#   holt            Holt's linear trend (level + trend smoothing)
+#   robust          Huber-weighted line (IRLS), resistant to outlier days
+#
+# Fitted models are cached by a digest of the series' dates and values
+# (which changes with every new snapshot), so re-requesting with another
+# horizon or toggling bands reuses the fit.
+FORECAST_METHODS = ("linear", "moving_average", "exponential", "holt", "robust")
+# Two-sided 95% normal quantile for the confidence bands
+BAND_Z = 1.96
+FORECAST_CACHE_SIZE = 1024
+
+_SMOOTHING_GRID = np.round(np.arange(0.1, 1.0, 0.1), 1)
+_HUBER_K = 1.345
+_IRLS_ITERATIONS = 10
+
+
+class Forecast:
+    """A fitted model for one series: mean and standard error by future day."""
+
+    __slots__ = ("method", "last_date", "last_x", "params")
+
+    def __init__(self, method: str, last_date: np.datetime64, last_x: int, params):
+        self.method = method
+        self.last_date = last_date
+        self.last_x = last_x
+        self.params = params
+
+    def dates(self, days: int) -> List[str]:
+        future = self.last_date + np.arange(1, days + 1)
+        return np.datetime_as_string(future, unit="D").tolist()
+
+    def predict(self, days: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(mean, standard error) for the next `days` calendar days."""
+        h = np.arange(1, days + 1)
+        x = self.last_x + h
+        p = self.params
+        if self.method in ("linear", "robust"):
+            mean = p["intercept"] + p["slope"] * x
+            se = p["sigma"] * np.sqrt(
+                1 + 1 / p["n"] + (x - p["x_mean"]) ** 2 / p["sxx"]
+            )
+        elif self.method == "moving_average":
+            mean = p["last_y"] + p["change"] * (x - self.last_x)
+            se = p["sigma"] * np.sqrt(h)
+        else:
+            # Smoothing methods step per observation; spacing converts days
+            steps = h / p["spacing"]
+            alpha = p["alpha"]
+            # The closed form uses the error-correction trend gain alpha*beta*;
+            # _fit_smoothing stores the component-form beta*
+            beta = alpha * p.get("beta", 0.0)
+            mean = p["level"] + p.get("trend", 0.0) * steps
+            var_factor = 1 + (steps - 1).clip(0) * (
+                alpha**2
+                + alpha * beta * steps
+                + beta**2 * steps * (2 * steps - 1) / 6
+            )
+            se = p["sigma"] * np.sqrt(var_factor)
+        return mean, se
+
+
+def _padded(series: Sequence[Tuple[Sequence[str], Sequence[float]]]):
+    """Day offsets X, values Y (NaN padded), mask M, first dates, lengths and
+    whether each series is integer-valued."""
+    lengths = np.array([len(y) for _, y in series])
+    width = int(lengths.max())
+    X = np.full((len(series), width), np.nan)
+    Y = np.full((len(series), width), np.nan)
+    firsts = []
+    is_int = []
+    for i, (xs, ys) in enumerate(series):
+        days = np.array(xs, dtype="datetime64[D]")
+        firsts.append(days[0])
+        X[i, : len(days)] = (days - days[0]).astype(np.int64)
+        arr = np.asarray(ys)
+        is_int.append(arr.dtype.kind in "iu")
+        Y[i, : len(arr)] = arr
+    M = ~np.isnan(Y)
+    return X, Y, M, firsts, lengths, is_int
+
+
+def _last(A: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    return A[np.arange(len(lengths)), lengths - 1]
+
+
+def _int_sum(values) -> int:
+    return int(np.sum(np.asarray(values, dtype=np.int64)))
+
+
+def _fit_linear(X, Y, M, lengths, is_int, series) -> List[Optional[dict]]:
+    # Integer series: exact int64 sums for all rows at once. Float series are
+    # summed like the original Python loop (sequentially) so results match
+    # it bit for bit.
+    Xi = np.where(M, X, 0).astype(np.int64)
+    Yi = np.where(M, Y, 0).astype(np.int64)
+    int_sums = np.stack(
+        [Xi.sum(1), Yi.sum(1), (Xi * Xi).sum(1), (Xi * Yi).sum(1)], axis=1
+    ).tolist()
+    out = []
+    for i, n in enumerate(lengths.tolist()):
+        if is_int[i]:
+            sum_x, sum_y, sum_xx, sum_xy = int_sums[i]
+        else:
+            x = Xi[i, :n].tolist()
+            y = series[i][1]
+            sum_x, sum_xx = int_sums[i][0], int_sums[i][2]
+            sum_y = sum(y)
+            sum_xy = sum(map(operator.mul, x, y))
+        denom = n * sum_xx - sum_x * sum_x
+        if denom == 0:
+            out.append(None)
+            continue
+        slope = (n * sum_xy - sum_x * sum_y) / denom
+        intercept = (sum_y - slope * sum_x) / n
+        out.append({"slope": slope, "intercept": intercept})
+    _add_line_spread(out, X, Y, M, lengths)
+    return out
+
+
+def _add_line_spread(fits, X, Y, M, lengths) -> None:
+    """Residual sigma and x statistics for the line prediction interval."""
+    for i, fit in enumerate(fits):
+        if fit is None:
+            continue
+        n = int(lengths[i])
+        x, y = X[i, :n], Y[i, :n]
+        resid = y - (fit["intercept"] + fit["slope"] * x)
+        fit["n"] = n
+        fit["x_mean"] = float(x.mean())
+        fit["sxx"] = float(((x - x.mean()) ** 2).sum()) or 1.0
+        fit["sigma"] = float(np.sqrt((resid**2).sum() / max(n - 2, 1)))
+
+
+def _fit_robust(X, Y, M, lengths) -> List[Optional[dict]]:
+    W = M.astype(np.float64)
+    Xz, Yz = np.where(M, X, 0), np.where(M, Y, 0)
+    slope = intercept = None
+    for _ in range(_IRLS_ITERATIONS):
+        sw = W.sum(1)
+        mx = (W * Xz).sum(1) / sw
+        my = (W * Yz).sum(1) / sw
+        sxx = (W * (Xz - mx[:, None]) ** 2).sum(1)
+        sxy = (W * (Xz - mx[:, None]) * (Yz - my[:, None])).sum(1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            slope = np.where(sxx > 0, sxy / sxx, np.nan)
+        intercept = my - slope * mx
+        resid = np.where(M, Yz - (intercept[:, None] + slope[:, None] * Xz), np.nan)
+        scale = 1.4826 * np.nanmedian(np.abs(resid), axis=1)
+        scale = np.where(scale > 0, scale, 1.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            W = np.where(
+                M, np.minimum(1.0, _HUBER_K * scale[:, None] / np.abs(resid)), 0.0
+            )
+        W = np.nan_to_num(W, nan=1.0)
+    fits = [
+        None
+        if np.isnan(s)
+        else {"slope": float(s), "intercept": float(b)}
+        for s, b in zip(slope, intercept)
+    ]
+    _add_line_spread(fits, X, Y, M, lengths)
+    return fits
+
+
+def _fit_moving_average(Y, lengths, is_int, series) -> List[dict]:
+    out = []
+    for i, n in enumerate(lengths.tolist()):
+        window = 5 if n >= 5 else max(2, n // 2)
+        y = series[i][1]
+        changes = np.diff(Y[i, :n])
+        recent = changes[-window:]
+        if is_int[i]:
+            last = np.asarray(y[-window - 1 :], dtype=np.int64)
+            change = _int_sum(np.diff(last)) / len(recent)
+        else:
+            change = sum(y[j] - y[j - 1] for j in range(n - len(recent), n)) / len(
+                recent
+            )
+        spread = float(changes.std(ddof=1)) if len(changes) > 1 else 0.0
+        out.append({"last_y": y[-1], "change": change, "sigma": spread})
+    return out
+
+
+def _smoothing_grid(with_trend: bool) -> Tuple[np.ndarray, np.ndarray]:
+    if with_trend:
+        alpha, beta = np.meshgrid(_SMOOTHING_GRID, _SMOOTHING_GRID, indexing="ij")
+        return alpha.ravel(), beta.ravel()
+    return _SMOOTHING_GRID, np.zeros_like(_SMOOTHING_GRID)
+
+
+def _fit_smoothing(X, Y, M, lengths, with_trend: bool) -> List[dict]:
+    """Exponential smoothing (optionally Holt's trend) for every series and
+    every (alpha, beta) grid pair at once; each series keeps the pair with
+    the smallest one-step-ahead squared error."""
+    alpha, beta = _smoothing_grid(with_trend)
+    S, G = Y.shape[0], len(alpha)
+    level = np.repeat(Y[:, :1], G, axis=1)
+    trend = np.zeros((S, G))
+    if with_trend:
+        trend += np.where(M[:, 1], Y[:, 1] - Y[:, 0], 0.0)[:, None]
+    sse = np.zeros((S, G))
+    count = np.zeros(S)
+    start = 2 if with_trend else 1
+    for t in range(start, Y.shape[1]):
+        active = M[:, t]
+        if not active.any():
+            break
+        y = Y[:, t : t + 1]
+        forecast = level + trend
+        err = np.where(active[:, None], y - forecast, 0.0)
+        sse += err**2
+        count += active
+        new_level = forecast + alpha * np.where(active[:, None], y - forecast, 0.0)
+        if with_trend:
+            trend = np.where(
+                active[:, None],
+                beta * (new_level - level) + (1 - beta) * trend,
+                trend,
+            )
+        level = np.where(active[:, None], new_level, level)
+    best = sse.argmin(1)
+    spacing = np.maximum((_last(X, lengths) / np.maximum(lengths - 1, 1)), 1.0)
+    out = []
+    for i in range(S):
+        g = best[i]
+        fit = {
+            "alpha": float(alpha[g]),
+            "level": float(level[i, g]),
+            "spacing": float(spacing[i]),
+            "sigma": float(np.sqrt(sse[i, g] / max(count[i] - 1, 1))),
+        }
+        if with_trend:
+            fit["beta"] = float(beta[g])
+            fit["trend"] = float(trend[i, g])
+        out.append(fit)
+    return out
+
+
+def fit_forecasts(
+    series: Sequence[Tuple[Sequence[str], Sequence[float]]], method: str
+) -> List[Optional[Forecast]]:
+    """Fit `method` to every (dates, values) series; None where no model fits
+    (e.g. a linear fit over a single distinct day)."""
+    if not series:
+        return []
+    if method not in FORECAST_METHODS:
+        method = "moving_average"
+    X, Y, M, firsts, lengths, is_int = _padded(series)
+    if method == "linear":
+        params = _fit_linear(X, Y, M, lengths, is_int, series)
+    elif method == "robust":
+        params = _fit_robust(X, Y, M, lengths)
+    elif method == "moving_average":
+        params = _fit_moving_average(Y, lengths, is_int, series)
+    else:
+        params = _fit_smoothing(X, Y, M, lengths, with_trend=method == "holt")
+    last_x = _last(X, lengths).astype(np.int64)
+    return [
+        None
+        if p is None
+        else Forecast(method, firsts[i] + int(last_x[i]), int(last_x[i]), p)
+        for i, p in enumerate(params)
+    ]
+
+
+class ForecastCache:
+    """LRU of fitted models keyed by method and series content."""
+
+    def __init__(self, max_entries: int = FORECAST_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[Tuple[str, str], Optional[Forecast]]" = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _digest(xs, ys) -> str:
+        h = hashlib.sha1()
+        h.update("\x1f".join(xs).encode("utf-8"))
+        h.update(np.asarray(ys).tobytes())
+        h.update(str(np.asarray(ys).dtype).encode("ascii"))
+        return h.hexdigest()
+
+    def fit(
+        self, series: Sequence[Tuple[Sequence[str], Sequence[float]]], method: str
+    ) -> List[Optional[Forecast]]:
+        keys = [(method, self._digest(xs, ys)) for xs, ys in series]
+        results: Dict[int, Optional[Forecast]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    results[i] = self._models[key]
+        missing = [i for i in range(len(series)) if i not in results]
+        if missing:
+            fitted = fit_forecasts([series[i] for i in missing], method)
+            with self._lock:
+                for i, model in zip(missing, fitted):
+                    results[i] = model
+                    self._models[keys[i]] = model
+                while len(self._models) > self.max_entries:
+                    self._models.popitem(last=False)
+        return [results[i] for i in range(len(series))]
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,457 @@
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Compact on-disk history of the daily member snapshots (Scraped_Team_Info).
+# Static member fields (name, joined date) are stored once, points are stored
+# as per-member deltas against the previous snapshot and ranks as offsets from
+# the row position, so consecutive (mostly identical) days compress to almost
+# nothing. Every day keeps the sha256 of its source CSV so exports can be
+# verified byte-for-byte.
+HISTORY_STORE_FILE = os.getenv(
+    "HISTORY_STORE_FILE", os.path.join("cache", "member_history.npz")
+)
+HISTORY_STORE_VERSION = 1
+
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_MEMBER_COLUMNS = ("Member", "name")
+_POINTS_COLUMNS = ("Points", "points")
+_KNOWN_COLUMNS = {"Date", "Rank", "Joined Date"} | set(_MEMBER_COLUMNS) | set(
+    _POINTS_COLUMNS
+)
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _render_csv(header: List[str], rows: List[List[str]], lineterminator: str) -> bytes:
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator=lineterminator)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buf.getvalue().encode("utf-8")
+
+
+def _parse_lenient(data: bytes) -> Dict[str, object]:
+    """Best-effort parse of a CSV that could not be stored structurally."""
+    members, points, ranks, joined = [], [], [], []
+    try:
+        rows = list(csv.reader(io.StringIO(data.decode("utf-8", "replace"))))
+        header = [c.strip().lower() for c in rows[0]] if rows else []
+        pos = {c: i for i, c in enumerate(header)}
+        member_pos = pos.get("member", pos.get("name"))
+        points_pos = pos.get("points")
+        for row_index, row in enumerate(rows[1:]):
+            if member_pos is None or member_pos >= len(row):
+                continue
+            try:
+                value = int(float(row[points_pos].strip())) if points_pos is not None else 0
+            except (ValueError, IndexError):
+                value = 0
+            try:
+                rank = int(row[pos["rank"]].strip()) if "rank" in pos else row_index + 1
+            except (ValueError, IndexError):
+                rank = row_index + 1
+            members.append(row[member_pos].strip())
+            points.append(value)
+            ranks.append(rank)
+            joined.append(row[pos["joined date"]] if "joined date" in pos else "")
+    except Exception as e:
+        print(f"History store could not parse raw snapshot: {e}")
+    return {
+        "members": members,
+        "points": np.asarray(points, dtype=np.int64),
+        "ranks": np.asarray(ranks, dtype=np.int32),
+        "joined": joined,
+    }
+
+
+class _Day:
+    """Decoded snapshot for one date (absolute points, member indices)."""
+
+    __slots__ = (
+        "date",
+        "filename",
+        "sha256",
+        "size",
+        "mtime",
+        "header",
+        "lineterminator",
+        "members",
+        "ranks",
+        "points",
+        "joined_overrides",
+        "raw",
+    )
+
+    def __init__(self, date: str, filename: str, sha256: str, size: int):
+        self.date = date
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.mtime = 0.0
+        self.header: List[str] = []
+        self.lineterminator = "\r\n"
+        self.members = np.zeros(0, dtype=np.int32)
+        self.ranks = np.zeros(0, dtype=np.int32)
+        self.points = np.zeros(0, dtype=np.int64)
+        # {row_index: joined_date} where the row disagrees with the member table
+        self.joined_overrides: Dict[int, str] = {}
+        # Original bytes, only kept when the file cannot be rebuilt exactly
+        self.raw: Optional[bytes] = None
+
+
+class HistoryStore:
+    """Delta-encoded, checksummed store of every member snapshot CSV.
+
+    The CSV files stay the source of truth; `sync()` ingests new or changed
+    files and `export_csv()` rebuilds the original bytes for any stored date.
+    """
+
+    def __init__(self, path: str = HISTORY_STORE_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._member_names: List[str] = []
+        self._member_joined: List[str] = []
+        self._member_index: Dict[str, int] = {}
+        self._days: Dict[str, _Day] = {}
+        self._loaded = False
+
+    # --- Public API --------------------------------------------------------
+    @property
+    def generation(self) -> str:
+        """Stable identifier of the stored content (changes whenever a day does)."""
+        with self._lock:
+            self._ensure_loaded()
+            digest = hashlib.sha256()
+            for date in sorted(self._days):
+                digest.update(f"{date}:{self._days[date].sha256};".encode())
+            return digest.hexdigest()[:16]
+
+    def dates(self) -> List[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._days)
+
+    def filename_for(self, date: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            day = self._days.get(date)
+            return day.filename if day else None
+
+    def checksum(self, date: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            day = self._days.get(date)
+            return day.sha256 if day else None
+
+    def snapshot(self, date: str) -> Optional[Dict[str, object]]:
+        """Return {"members", "points", "ranks", "joined"} for a stored date."""
+        with self._lock:
+            self._ensure_loaded()
+            day = self._days.get(date)
+            if day is None:
+                return None
+            if day.raw is not None:
+                return _parse_lenient(day.raw)
+            joined = [self._member_joined[m] for m in day.members]
+            for row, value in day.joined_overrides.items():
+                joined[row] = value
+            return {
+                "members": [self._member_names[m] for m in day.members],
+                "points": day.points.copy(),
+                "ranks": day.ranks.copy(),
+                "joined": joined,
+            }
+
+    def export_csv(self, date: str) -> Optional[bytes]:
+        """Rebuild the original CSV bytes for `date` (verified against its checksum)."""
+        with self._lock:
+            self._ensure_loaded()
+            day = self._days.get(date)
+            if day is None:
+                return None
+            data = day.raw if day.raw is not None else self._rebuild(day)
+            if _sha256(data) != day.sha256:
+                print(f"History store checksum mismatch for {date}")
+                return None
+            return data
+
+    def sync(self, csv_paths: List[str]) -> List[str]:
+        """Ingest new/changed CSV files. Returns the dates that were (re)stored."""
+        with self._lock:
+            self._ensure_loaded()
+            changed = []
+            touched = False
+            for path in csv_paths:
+                match = _DATE_RE.search(os.path.basename(path))
+                if not match:
+                    continue
+                date = match.group(1)
+                try:
+                    known = self._days.get(date)
+                    stat = os.stat(path)
+                    if (
+                        known is not None
+                        and known.size == stat.st_size
+                        and known.mtime == stat.st_mtime
+                        and known.filename == os.path.basename(path)
+                    ):
+                        continue
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    sha = _sha256(data)
+                    if known is not None and known.sha256 == sha:
+                        known.mtime = stat.st_mtime
+                        touched = True
+                        continue
+                    self._days[date] = self._ingest(date, path, data, sha)
+                    self._days[date].mtime = stat.st_mtime
+                    changed.append(date)
+                except Exception as e:
+                    print(f"History store failed to ingest {path}: {e}")
+            if changed or touched:
+                self.save()
+            return changed
+
+    def save(self) -> bool:
+        """Persist the store atomically. Returns True on success."""
+        with self._lock:
+            # Per-process temp file: workers may save concurrently after a sync
+            # (savez_compressed needs the .npz suffix)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp.npz"
+            try:
+                store_dir = os.path.dirname(self.path)
+                if store_dir:
+                    os.makedirs(store_dir, exist_ok=True)
+                arrays = self._encode()
+                np.savez_compressed(tmp_path, **arrays)
+                os.replace(tmp_path, self.path)
+                return True
+            except Exception as e:
+                print(f"Error saving history store to {self.path}: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+                return False
+
+    # --- Ingest ------------------------------------------------------------
+    def _member_id(self, name: str, joined: str) -> int:
+        idx = self._member_index.get(name)
+        if idx is None:
+            idx = len(self._member_names)
+            self._member_names.append(name)
+            self._member_joined.append(joined)
+            self._member_index[name] = idx
+        return idx
+
+    def _ingest(self, date: str, path: str, data: bytes, sha: str) -> _Day:
+        day = _Day(date, os.path.basename(path), sha, len(data))
+        try:
+            self._parse_into(day, data)
+        except Exception as e:
+            print(f"History store keeping raw copy of {path}: {e}")
+            day.raw = data
+            return day
+        # Only trust the structured encoding if it round-trips exactly
+        if self._rebuild(day) != data:
+            day.raw = data
+        return day
+
+    def _parse_into(self, day: _Day, data: bytes) -> None:
+        text = data.decode("utf-8")
+        day.lineterminator = "\n" if "\r\n" not in text else "\r\n"
+        rows = list(csv.reader(io.StringIO(text, newline="")))
+        if not rows:
+            raise ValueError("empty file")
+        header = rows[0]
+        if any(col not in _KNOWN_COLUMNS for col in header):
+            raise ValueError(f"unsupported columns {header}")
+        member_col = next((c for c in _MEMBER_COLUMNS if c in header), None)
+        points_col = next((c for c in _POINTS_COLUMNS if c in header), None)
+        if member_col is None or points_col is None:
+            raise ValueError("missing member/points columns")
+        pos = {c: i for i, c in enumerate(header)}
+        members, ranks, points = [], [], []
+        for row_index, row in enumerate(rows[1:]):
+            if len(row) != len(header):
+                raise ValueError("ragged row")
+            if "Date" in pos and row[pos["Date"]] != day.date:
+                raise ValueError("date column differs from filename")
+            name = row[pos[member_col]]
+            joined = row[pos["Joined Date"]] if "Joined Date" in pos else ""
+            points_text = row[pos[points_col]]
+            if str(int(points_text)) != points_text:
+                raise ValueError("non-canonical points value")
+            member = self._member_id(name, joined)
+            if self._member_joined[member] != joined:
+                day.joined_overrides[row_index] = joined
+            if "Rank" in pos:
+                rank_text = row[pos["Rank"]]
+                if str(int(rank_text)) != rank_text:
+                    raise ValueError("non-canonical rank value")
+                ranks.append(int(rank_text))
+            else:
+                ranks.append(row_index + 1)
+            members.append(member)
+            points.append(int(points_text))
+        day.header = header
+        day.members = np.asarray(members, dtype=np.int32)
+        day.ranks = np.asarray(ranks, dtype=np.int32)
+        day.points = np.asarray(points, dtype=np.int64)
+
+    def _rebuild(self, day: _Day) -> bytes:
+        rows = []
+        for i, member in enumerate(day.members):
+            values = {
+                "Date": day.date,
+                "Rank": str(int(day.ranks[i])),
+                "Joined Date": day.joined_overrides.get(
+                    i, self._member_joined[member]
+                ),
+            }
+            for col in _MEMBER_COLUMNS:
+                values[col] = self._member_names[member]
+            for col in _POINTS_COLUMNS:
+                values[col] = str(int(day.points[i]))
+            rows.append([values[c] for c in day.header])
+        return _render_csv(day.header, rows, day.lineterminator)
+
+    # --- Encoding ----------------------------------------------------------
+    def _encode(self) -> Dict[str, np.ndarray]:
+        """Delta-encode all days (oldest first) into flat arrays + JSON meta."""
+        dates = sorted(self._days)
+        last_points = np.zeros(len(self._member_names), dtype=np.int64)
+        offsets = [0]
+        row_members, row_ranks, row_deltas = [], [], []
+        day_meta = []
+        raw_blobs = []
+        for date in dates:
+            day = self._days[date]
+            meta = {
+                "date": date,
+                "file": day.filename,
+                "sha256": day.sha256,
+                "size": day.size,
+                "mtime": day.mtime,
+            }
+            if day.raw is not None:
+                meta["raw"] = len(raw_blobs)
+                raw_blobs.append(day.raw)
+                offsets.append(offsets[-1])
+                day_meta.append(meta)
+                continue
+            meta["header"] = day.header
+            meta["lineterminator"] = day.lineterminator
+            if day.joined_overrides:
+                meta["joined"] = {str(k): v for k, v in day.joined_overrides.items()}
+            row_members.append(day.members)
+            # Rank is almost always the row position; store the offset from it
+            row_ranks.append(day.ranks - np.arange(1, len(day.ranks) + 1, dtype=np.int32))
+            row_deltas.append(day.points - last_points[day.members])
+            last_points[day.members] = day.points
+            offsets.append(offsets[-1] + len(day.members))
+            day_meta.append(meta)
+        header = {
+            "version": HISTORY_STORE_VERSION,
+            "members": self._member_names,
+            "joined": self._member_joined,
+            "days": day_meta,
+        }
+        raw_offsets = np.cumsum([0] + [len(b) for b in raw_blobs]).astype(np.int64)
+
+        def _concat(parts, dtype):
+            return np.concatenate(parts).astype(dtype) if parts else np.zeros(0, dtype)
+
+        return {
+            "meta": np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8),
+            "offsets": np.asarray(offsets, dtype=np.int64),
+            "members": _concat(row_members, np.int32),
+            "ranks": _concat(row_ranks, np.int32),
+            "deltas": _concat(row_deltas, np.int64),
+            "raw": np.frombuffer(b"".join(raw_blobs), dtype=np.uint8),
+            "raw_offsets": raw_offsets,
+        }
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with np.load(self.path) as npz:
+                header = json.loads(npz["meta"].tobytes().decode("utf-8"))
+                if header.get("version") != HISTORY_STORE_VERSION:
+                    print(f"History store {self.path} has unknown version, rebuilding")
+                    return
+                offsets = npz["offsets"]
+                members = npz["members"]
+                ranks = npz["ranks"]
+                deltas = npz["deltas"]
+                raw = npz["raw"].tobytes()
+                raw_offsets = npz["raw_offsets"]
+        except Exception as e:
+            print(f"Error loading history store from {self.path}: {e}")
+            return
+        self._member_names = list(header["members"])
+        self._member_joined = list(header["joined"])
+        self._member_index = {n: i for i, n in enumerate(self._member_names)}
+        last_points = np.zeros(len(self._member_names), dtype=np.int64)
+        for i, meta in enumerate(header["days"]):
+            day = _Day(meta["date"], meta["file"], meta["sha256"], meta["size"])
+            day.mtime = meta.get("mtime", 0.0)
+            if "raw" in meta:
+                k = meta["raw"]
+                day.raw = raw[raw_offsets[k] : raw_offsets[k + 1]]
+            else:
+                lo, hi = offsets[i], offsets[i + 1]
+                day.header = meta["header"]
+                day.lineterminator = meta["lineterminator"]
+                day.joined_overrides = {
+                    int(k): v for k, v in meta.get("joined", {}).items()
+                }
+                day.members = members[lo:hi].astype(np.int32)
+                day.ranks = ranks[lo:hi] + np.arange(1, hi - lo + 1, dtype=np.int32)
+                day.points = last_points[day.members] + deltas[lo:hi]
+                last_points[day.members] = day.points
+            self._days[day.date] = day
+
+
+def dates_in_range(
+    dates: List[str], start: Optional[str], end: Optional[str]
+) -> List[str]:
+    """Filter YYYY-MM-DD strings to the inclusive [start, end] range."""
+    return [d for d in dates if (not start or d >= start) and (not end or d <= end)]
+
+
+def store_footprint(store: HistoryStore, csv_paths: List[str]) -> Tuple[int, int]:
+    """Return (csv_bytes, store_bytes) for quick footprint comparisons."""
+    csv_bytes = sum(os.path.getsize(p) for p in csv_paths if os.path.exists(p))
+    store_bytes = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+    return csv_bytes, store_bytes
+
+
+if __name__ == "__main__":
+    import glob
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    folder = os.getenv("DATA_FOLDER", "Scraped_Team_Info")
+    paths = sorted(glob.glob(os.path.join(folder, "sheepit_team_points_*.csv")))
+    history = HistoryStore()
+    stored = history.sync(paths)
+    csv_size, store_size = store_footprint(history, paths)
+    print(f"Ingested {len(stored)} new day(s); {len(history.dates())} day(s) stored")
+    print(f"CSV files: {csv_size:,} bytes, history store: {store_size:,} bytes")
@@ -0,0 +1,116 @@
+from typing import List, Sequence, Set
+
+import numpy as np
+
+# Per-interval production for the trends "interval" value mode, computed for
+# all series at once. Series are concatenated into one flat array with a
+# series index per element; segment membership is found with searchsorted
+# over the observation positions instead of per-series Python loops.
+#
+# Results keep the previous list semantics exactly: integer series give
+# ints, and positions that produced nothing are the int 0 even in float
+# series (as max(0, ...) returned before).
+
+
+def _concat(lists: Sequence[list]):
+    """Flat float64 values, series index per element, lengths, and whether
+    each series held only integers."""
+    arrays = [np.asarray(v) for v in lists]
+    lengths = np.array([len(a) for a in arrays], dtype=np.int64)
+    series_idx = np.repeat(np.arange(len(arrays)), lengths)
+    int_series = [a.dtype.kind in "iu" or not len(a) for a in arrays]
+    values = (
+        np.concatenate([a.astype(np.float64) for a in arrays])
+        if arrays
+        else np.zeros(0)
+    )
+    return values, series_idx, lengths, int_series
+
+
+def _split(
+    values: np.ndarray, produced: np.ndarray, lengths, int_series
+) -> List[list]:
+    """Back to one list per series (ints for integer series; int 0 where
+    nothing was produced)."""
+    out = []
+    offset = 0
+    for n, as_int in zip(lengths.tolist(), int_series):
+        part = values[offset : offset + n]
+        if as_int:
+            out.append(part.astype(np.int64).tolist())
+        else:
+            mixed = part.astype(object)
+            mixed[~produced[offset : offset + n]] = 0
+            out.append(mixed.tolist())
+        offset += n
+    return out
+
+
+def period_over_period(points_lists: Sequence[list]) -> List[list]:
+    """max(0, p[i] - p[i-1]) per series, 0 for each series' first value."""
+    points, series_idx, lengths, int_series = _concat(points_lists)
+    values = np.zeros(len(points))
+    produced = np.zeros(len(points), dtype=bool)
+    if len(points) > 1:
+        same = series_idx[1:] == series_idx[:-1]
+        diff = points[1:] - points[:-1]
+        produced[1:] = same & (diff > 0)
+        values[1:] = np.where(produced[1:], diff, 0)
+    return _split(values, produced, lengths, int_series)
+
+
+def distribute_gap_production(
+    dates_lists: Sequence[list],
+    points_lists: Sequence[list],
+    observed_sets: Sequence[Set[str]],
+) -> List[list]:
+    """Daily production with each observed increase spread over the days
+    since the previous observation of the same series.
+
+    Between observations at positions a < b the delta max(0, p[b] - p[a])
+    is split as delta // (b - a) per day over a+1..b, with the remainder
+    added on day b. Days before a series' first observation, the first
+    observation itself and days after the last observation produce 0.
+    """
+    # Only dates that have a point take part (zip(dates, points) before)
+    usable = [min(len(d), len(p)) for d, p in zip(dates_lists, points_lists)]
+    points, series_idx, lengths, int_series = _concat(points_lists)
+    n = len(points)
+    values = np.zeros(n)
+    produced = np.zeros(n, dtype=bool)
+
+    observed = np.zeros(n, dtype=bool)
+    offset = 0
+    for dates, seen, count, length in zip(
+        dates_lists, observed_sets, usable, lengths
+    ):
+        if count and seen:
+            observed[offset : offset + count] = np.fromiter(
+                (d in seen for d in dates[:count]), dtype=bool, count=count
+            )
+        offset += int(length)
+
+    obs = np.flatnonzero(observed)
+    if len(obs) > 1:
+        # Segment k runs from obs[k-1] (exclusive) to obs[k] (inclusive);
+        # it only counts when both ends belong to the same series
+        starts, ends = obs[:-1], obs[1:]
+        valid = series_idx[starts] == series_idx[ends]
+        gaps = ends - starts
+        diffs = points[ends] - points[starts]
+        deltas = np.where(diffs > 0, diffs, 0)
+        per_day = np.floor_divide(deltas, gaps)
+        remainder = deltas - per_day * gaps
+
+        positions = np.arange(n)
+        seg = np.searchsorted(obs, positions, side="left") - 1
+        inside = (seg >= 0) & (seg < len(starts))
+        seg_safe = np.where(inside, seg, 0)
+        inside &= valid[seg_safe]
+        values[inside] = per_day[seg_safe[inside]]
+        at_end = inside & (positions == ends[seg_safe])
+        values[at_end] += remainder[seg_safe[at_end]]
+        # Float series keep float values only where max(0, ...) was positive
+        produced = inside & (deltas[seg_safe] > 0)
+
+    return _split(values, produced, lengths, int_series)
@@ -0,0 +1,84 @@
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+# Flask JSON provider used for every jsonify()/app.json.dumps() call.
+# Uses orjson when it is installed (NumPy arrays/scalars are serialized
+# natively, no tolist() round trip) and the stdlib encoder otherwise. Both
+# paths produce the same JSON values as Flask's default provider: sorted keys,
+# dates as HTTP dates, NumPy/pandas values as plain numbers and lists.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy ships with pandas
+    np = None
+
+
+def _to_builtin(o: Any):
+    """Convert NumPy/pandas containers and scalars to JSON-native values."""
+    if np is not None:
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, np.generic):
+            return o.item()
+    # pandas Series/Index (and anything else array-like)
+    to_numpy = getattr(o, "to_numpy", None)
+    if callable(to_numpy):
+        return to_numpy().tolist()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with NumPy support and an optional orjson fast path."""
+
+    @staticmethod
+    def default(o: Any) -> Any:
+        try:
+            return DefaultJSONProvider.default(o)
+        except TypeError:
+            return _to_builtin(o)
+
+    def _orjson_option(self, indent: bool) -> int:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        # Dates go through default() so they stay HTTP dates like Flask's encoder
+        option |= orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _dumps_bytes(self, obj: Any, indent: bool = False):
+        """orjson-encoded bytes, or None when the stdlib encoder must be used."""
+        if orjson is None:
+            return None
+        try:
+            return orjson.dumps(
+                obj, default=self.default, option=self._orjson_option(indent)
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. ints beyond 64 bits or mixed-type keys: let json decide
+            return None
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not kwargs:
+            data = self._dumps_bytes(obj)
+            if data is not None:
+                return data.decode("utf-8")
+        kwargs.setdefault("default", self.default)
+        kwargs.setdefault("ensure_ascii", self.ensure_ascii)
+        kwargs.setdefault("sort_keys", self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        data = self._dumps_bytes(obj, indent)
+        if data is None:
+            return super().response(obj)
+        return self._app.response_class(data, mimetype=self.mimetype)
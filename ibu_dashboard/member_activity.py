@@ -0,0 +1,238 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+# Per-member activity index maintained one snapshot at a time. A member is
+# active on a snapshot when their points rose since their previous snapshot;
+# per member it keeps the last active day and the current/longest streak of
+# consecutive active snapshots (days without a snapshot don't break a
+# streak), plus the positive production of the last ACTIVITY_DAYS days for
+# the rolling 7/30/90-day totals. The per-member table and summary are
+# rebuilt after every sync, so reads are plain lookups; they only cover the
+# members of the latest snapshot (members who left keep their state in case
+# they come back). Syncing is done when snapshots are ingested (precompute /
+# snapshot watcher); other processes pick the saved index up when its file
+# changes.
+MEMBER_ACTIVITY_FILE = os.getenv(
+    "MEMBER_ACTIVITY_FILE", os.path.join("cache", "member_activity.json")
+)
+MEMBER_ACTIVITY_VERSION = 2
+
+ACTIVITY_WINDOWS = (7, 30, 90)
+ACTIVITY_DAYS = max(ACTIVITY_WINDOWS)
+TOP_STREAKS = 20
+
+
+class MemberActivityIndex:
+    """Persistent, incrementally updated member activity table."""
+
+    def __init__(self, path: str = MEMBER_ACTIVITY_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._dates: List[str] = []
+        # Checksum of each applied snapshot (rewritten snapshots force a rebuild)
+        self._checksums: Dict[str, Optional[str]] = {}
+        # Keys of the latest applied snapshot
+        self._present: List[str] = []
+        # key -> [points, last_active_date, current_streak, longest_streak]
+        self._state: Dict[str, list] = {}
+        # [[date, {key: produced}], ...] for the last ACTIVITY_DAYS days
+        self._recent: List[list] = []
+        self._labels: Dict[str, str] = {}
+        self._view: Dict[str, object] = {}
+        self._loaded = False
+        self._file_mtime: Optional[int] = None
+
+    # --- Public API --------------------------------------------------------
+    def sync(
+        self,
+        dates: List[str],
+        snapshot: Callable[[str], Dict[str, int]],
+        labels: Optional[Dict[str, str]] = None,
+        checksum: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> int:
+        """Apply the snapshots of `dates` (ascending) not seen yet. `snapshot`
+        returns {key: points} for a date and `checksum` an identifier of its
+        content. Everything is rebuilt when an already applied date changed
+        position, disappeared or was rewritten. Returns the number of
+        snapshots applied."""
+        with self._lock:
+            self._reload_if_changed()
+            checksum = checksum or (lambda _date: None)
+            if self._dates != dates[: len(self._dates)] or any(
+                self._checksums.get(d) != checksum(d) for d in self._dates
+            ):
+                self._reset()
+            pending = dates[len(self._dates) :]
+            for snap_date in pending:
+                self._apply(snap_date, snapshot(snap_date))
+                self._checksums[snap_date] = checksum(snap_date)
+            changed = bool(pending)
+            if labels is not None and labels != self._labels:
+                self._labels = dict(labels)
+                changed = True
+            if changed:
+                self._materialize()
+                self.save()
+            return len(pending)
+
+    def summary(self) -> Optional[dict]:
+        """Active member counts per window and the longest current streaks."""
+        with self._lock:
+            self._reload_if_changed()
+            if not self._view:
+                return None
+            return {k: v for k, v in self._view.items() if k != "members"}
+
+    def members(self) -> List[dict]:
+        with self._lock:
+            self._reload_if_changed()
+            return list(self._view.get("members", {}).values())
+
+    def member(self, key: str) -> Optional[dict]:
+        with self._lock:
+            self._reload_if_changed()
+            return self._view.get("members", {}).get(key)
+
+    # --- Incremental update ------------------------------------------------
+    def _reset(self) -> None:
+        self._dates, self._checksums, self._present = [], {}, []
+        self._state, self._recent = {}, []
+
+    def _apply(self, snap_date: str, points: Dict[str, int]) -> None:
+        produced = {}
+        for key, value in points.items():
+            state = self._state.get(key)
+            if state is None:
+                # First appearance: nothing to compare against yet
+                self._state[key] = [value, None, 0, 0]
+                continue
+            delta = value - state[0]
+            state[0] = value
+            if delta > 0:
+                produced[key] = delta
+                state[1] = snap_date
+                state[2] += 1
+                state[3] = max(state[3], state[2])
+            else:
+                state[2] = 0
+        self._dates.append(snap_date)
+        self._present = list(points)
+        self._recent.append([snap_date, produced])
+        cutoff = (
+            date.fromisoformat(snap_date) - timedelta(days=ACTIVITY_DAYS)
+        ).isoformat()
+        while self._recent and self._recent[0][0] <= cutoff:
+            self._recent.pop(0)
+
+    def _materialize(self) -> None:
+        if not self._dates:
+            self._view = {}
+            return
+        as_of = self._dates[-1]
+        today = date.fromisoformat(as_of)
+        cutoffs = {
+            w: (today - timedelta(days=w)).isoformat() for w in ACTIVITY_WINDOWS
+        }
+        present = set(self._present)
+        totals = {w: {} for w in ACTIVITY_WINDOWS}
+        for snap_date, produced in self._recent:
+            for window, cutoff in cutoffs.items():
+                if snap_date > cutoff:
+                    bucket = totals[window]
+                    for key, delta in produced.items():
+                        if key in present:
+                            bucket[key] = bucket.get(key, 0) + delta
+        members = {}
+        for key in self._present:
+            _, last_active, current, longest = self._state[key]
+            members[key] = {
+                "name": self._labels.get(key, key),
+                "last_active": last_active,
+                "current_streak": current,
+                "longest_streak": longest,
+                "production": {
+                    str(w): totals[w].get(key, 0) for w in ACTIVITY_WINDOWS
+                },
+            }
+        by_streak = sorted(
+            members.values(), key=lambda m: (-m["current_streak"], m["name"])
+        )
+        self._view = {
+            "as_of": as_of,
+            "active_members": {str(w): len(totals[w]) for w in ACTIVITY_WINDOWS},
+            "top_streaks": [
+                {"name": m["name"], "current_streak": m["current_streak"]}
+                for m in by_streak[:TOP_STREAKS]
+                if m["current_streak"] > 0
+            ],
+            "members": members,
+        }
+
+    # --- Persistence -------------------------------------------------------
+    def save(self) -> bool:
+        """Persist the index atomically. Returns True on success."""
+        with self._lock:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                index_dir = os.path.dirname(self.path)
+                if index_dir:
+                    os.makedirs(index_dir, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": MEMBER_ACTIVITY_VERSION,
+                            "dates": self._dates,
+                            "checksums": self._checksums,
+                            "present": self._present,
+                            "state": self._state,
+                            "recent": self._recent,
+                            "labels": self._labels,
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.path)
+                self._file_mtime = os.stat(self.path).st_mtime_ns
+                return True
+            except Exception as e:
+                print(f"Error saving member activity to {self.path}: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+                return False
+
+    def _reload_if_changed(self) -> None:
+        """Load the saved index, and again whenever another process replaced it."""
+        try:
+            mtime: Optional[int] = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._file_mtime:
+            return
+        self._loaded = True
+        self._file_mtime = mtime
+        if mtime is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MEMBER_ACTIVITY_VERSION:
+                self._reset()
+                self._view = {}
+                return
+            self._dates = data["dates"]
+            self._checksums = data["checksums"]
+            self._present = data["present"]
+            self._state = data["state"]
+            self._recent = data["recent"]
+            self._labels = data["labels"]
+            self._materialize()
+        except Exception as e:
+            print(f"Error loading member activity from {self.path}: {e}")
+            self._reset()
+            self._view = {}
@@ -0,0 +1,149 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Persisted color palette keyed by member ID. Each member's base color (the
+# historical MD5-of-name color) and the blended candlestick colors are
+# computed once, when the member is first seen, and shared by every chart.
+MEMBER_COLORS_FILE = os.getenv(
+    "MEMBER_COLORS_FILE", os.path.join("cache", "member_colors.json")
+)
+
+INCREASING_BASE_RGB = (34, 197, 94)  # emerald-500
+DECREASING_BASE_RGB = (248, 113, 113)  # red-400
+CANDLE_BLEND_ALPHA = 0.55
+
+
+def name_to_color(name):
+    # Hash the name to get a consistent value
+    hash_object = hashlib.md5(name.encode())
+    hex_color = "#" + hash_object.hexdigest()[:6]
+    return hex_color
+
+
+def _hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip("#")
+    if len(hex_color) == 3:
+        hex_color = "".join(c * 2 for c in hex_color)
+    try:
+        r = int(hex_color[0:2], 16)
+        g = int(hex_color[2:4], 16)
+        b = int(hex_color[4:6], 16)
+        return r, g, b
+    except Exception:
+        return 128, 128, 128
+
+
+def blend_with(color_hex, base_rgb, alpha=0.5):
+    """Blend a member color (hex) with a base RGB tuple (e.g. green or red) by alpha.
+    alpha: portion of base color; (1-alpha) of member color.
+    Returns hex string."""
+    mr, mg, mb = _hex_to_rgb(color_hex)
+    br, bg, bb = base_rgb
+    r = int(mr * (1 - alpha) + br * alpha)
+    g = int(mg * (1 - alpha) + bg * alpha)
+    b = int(mb * (1 - alpha) + bb * alpha)
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _palette_entry(name: str) -> Dict[str, str]:
+    color = name_to_color(name)
+    return {
+        "color": color,
+        "increasing": blend_with(color, INCREASING_BASE_RGB, CANDLE_BLEND_ALPHA),
+        "decreasing": blend_with(color, DECREASING_BASE_RGB, CANDLE_BLEND_ALPHA),
+    }
+
+
+class MemberColorTable:
+    """Member ID -> {color, increasing, decreasing}, persisted as JSON.
+
+    Names that are not registered members (teams, "Total Team Points") are
+    memoized per process, so no chart render hashes the same name twice.
+    """
+
+    def __init__(self, path: str = MEMBER_COLORS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._by_id: Dict[int, Dict[str, str]] = {}
+        self._by_name: Dict[str, Dict[str, str]] = {}
+        self._loaded = False
+
+    def entry(
+        self, name, resolve: Optional[Callable[[str], Optional[int]]] = None
+    ) -> Dict[str, str]:
+        """Palette entry for a series name (member ID lookup via `resolve`)."""
+        return self.entries([name], resolve)[0]
+
+    def color(self, name, resolve=None) -> str:
+        return self.entry(name, resolve)["color"]
+
+    def candle_colors(self, name, resolve=None) -> Tuple[str, str]:
+        palette = self.entry(name, resolve)
+        return palette["increasing"], palette["decreasing"]
+
+    def colors(self, names: Iterable, resolve=None) -> List[str]:
+        return [e["color"] for e in self.entries(names, resolve)]
+
+    def entries(self, names: Iterable, resolve=None) -> List[Dict[str, str]]:
+        result = []
+        added = False
+        with self._lock:
+            self._ensure_loaded()
+            for name in names:
+                name = str(name)
+                member_id = resolve(name) if resolve else None
+                if member_id is not None:
+                    palette = self._by_id.get(member_id)
+                    if palette is None:
+                        palette = self._by_id[member_id] = _palette_entry(name)
+                        added = True
+                else:
+                    palette = self._by_name.get(name)
+                    if palette is None:
+                        palette = self._by_name[name] = _palette_entry(name)
+                result.append(palette)
+            if added:
+                self._save()
+        return result
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                self._by_id = {
+                    int(k): v for k, v in (data.get("members") or {}).items()
+                }
+        except Exception as e:
+            print(f"Error loading member colors from {self.path}: {e}")
+            self._by_id = {}
+
+    def _save(self) -> None:
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            colors_dir = os.path.dirname(self.path)
+            if colors_dir:
+                os.makedirs(colors_dir, exist_ok=True)
+            # Keep entries other workers persisted first, so a member's color never flips
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    on_disk = json.load(f).get("members") or {}
+                self._by_id.update({int(k): v for k, v in on_disk.items()})
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"members": {str(k): v for k, v in sorted(self._by_id.items())}}, f
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving member colors to {self.path}: {e}")
+            try:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            except Exception:
+                pass
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Persistent name -> stable integer ID registry for team members. IDs are
+# dense (0..n-1) so they can index snapshot arrays directly, and every name a
+# member has ever used is kept as an alias of the same ID, so a rename does not
+# split the member's history in two.
+MEMBER_REGISTRY_FILE = os.getenv(
+    "MEMBER_REGISTRY_FILE", os.path.join("config", "member_registry.json")
+)
+
+
+class MemberRegistry:
+    """File-backed member registry.
+
+    JSON shape:
+    { "revision": int,
+      "members": [ {"id": 0, "name": "current name", "joined": "...",
+                    "aliases": ["old name"], "merged_into": null}, ... ] }
+    """
+
+    def __init__(self, path: str = MEMBER_REGISTRY_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._members: List[Dict] = []
+        self._by_name: Dict[str, int] = {}
+        self._revision = 0
+        self._file_mtime = None
+        self._dirty = False
+
+    # --- Lookups -----------------------------------------------------------
+    @property
+    def revision(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return self._revision
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._reload_if_changed()
+            return len(self._members)
+
+    def resolve(self, name) -> Optional[int]:
+        """Return the member ID for a current or former name (None if unknown)."""
+        with self._lock:
+            self._reload_if_changed()
+            member_id = self._by_name.get(str(name).strip())
+            return self._follow(member_id) if member_id is not None else None
+
+    def name_of(self, member_id: int) -> Optional[str]:
+        with self._lock:
+            self._reload_if_changed()
+            if 0 <= member_id < len(self._members):
+                return self._members[self._follow(member_id)]["name"]
+            return None
+
+    def names(self) -> List[str]:
+        """Current display name for every ID (row order of ID-indexed arrays)."""
+        with self._lock:
+            self._reload_if_changed()
+            return [m["name"] for m in self._members]
+
+    def aliases(self) -> Dict[str, int]:
+        """Every known name (current and former) -> resolved member ID."""
+        with self._lock:
+            self._reload_if_changed()
+            return {name: self._follow(i) for name, i in self._by_name.items()}
+
+    def resolver(self) -> Callable[[str], Optional[int]]:
+        """resolve() for a batch of names: the registry file is checked once,
+        when the resolver is created, instead of on every lookup."""
+        aliases = self.aliases()
+        return lambda name: aliases.get(str(name).strip())
+
+    # --- Updates -----------------------------------------------------------
+    def ensure(self, name, joined: str = "") -> int:
+        """Return the ID for `name`, registering a new member if needed."""
+        with self._lock:
+            self._reload_if_changed()
+            key = str(name).strip()
+            member_id = self._by_name.get(key)
+            if member_id is not None:
+                return self._follow(member_id)
+            member_id = len(self._members)
+            self._members.append(
+                {
+                    "id": member_id,
+                    "name": key,
+                    "joined": joined,
+                    "aliases": [],
+                    "merged_into": None,
+                }
+            )
+            self._by_name[key] = member_id
+            self._touch()
+            return member_id
+
+    def add_alias(self, alias, name) -> Optional[int]:
+        """Record that `alias` is (or was) the same member as `name`.
+        If both names already have separate IDs, the alias' ID is merged into `name`'s."""
+        with self._lock:
+            self._reload_if_changed()
+            alias_key = str(alias).strip()
+            target = self.resolve(name)
+            if not alias_key or target is None:
+                return None
+            current = self._by_name.get(alias_key)
+            if current is not None and self._follow(current) == target:
+                return target
+            entry = self._members[target]
+            if current is not None:
+                # Both names have their own history: fold the alias' ID into target
+                old = self._members[self._follow(current)]
+                old["merged_into"] = target
+                for old_name in [old["name"]] + old["aliases"]:
+                    if old_name != entry["name"] and old_name not in entry["aliases"]:
+                        entry["aliases"].append(old_name)
+            else:
+                self._by_name[alias_key] = target
+                entry["aliases"].append(alias_key)
+            self._touch()
+            return target
+
+    def record_rename(self, member_id: int, new_name) -> None:
+        """Make `new_name` the display name of `member_id`, keeping the old one as alias."""
+        with self._lock:
+            self._reload_if_changed()
+            key = str(new_name).strip()
+            entry = self._members[self._follow(member_id)]
+            if entry["name"] == key:
+                return
+            if entry["name"] not in entry["aliases"]:
+                entry["aliases"].append(entry["name"])
+            if key in entry["aliases"]:
+                entry["aliases"].remove(key)
+            entry["name"] = key
+            self._by_name[key] = entry["id"]
+            self._touch()
+
+    def assign_ids(
+        self,
+        snapshots: Sequence[Dict],
+    ) -> List[np.ndarray]:
+        """Map every snapshot's member names to IDs (snapshots oldest first).
+
+        Also detects renames between consecutive snapshots: when exactly one
+        member disappears and exactly one never-seen name appears with the same
+        joined date and at least the same points, the new name becomes an alias.
+        """
+        with self._lock:
+            self._reload_if_changed()
+            ids_per_snapshot = []
+            prev_ids: Dict[int, int] = {}  # id -> points in previous snapshot
+            prev_joined: Dict[int, str] = {}
+            for snap in snapshots:
+                names = [str(n).strip() for n in snap["members"]]
+                joined = list(snap.get("joined") or [""] * len(names))
+                points = [int(p) for p in snap["points"]]
+                unseen = [
+                    i for i, n in enumerate(names) if n not in self._by_name
+                ]
+                if unseen and prev_ids:
+                    present = {self.resolve(n) for n in names if n in self._by_name}
+                    gone = [i for i in prev_ids if i not in present]
+                    for row in unseen:
+                        candidates = [
+                            i
+                            for i in gone
+                            if joined[row]
+                            and prev_joined.get(i) == joined[row]
+                            and prev_ids[i] <= points[row]
+                        ]
+                        rivals = [
+                            r
+                            for r in unseen
+                            if joined[r] == joined[row] and r != row
+                        ]
+                        if len(candidates) == 1 and not rivals:
+                            print(
+                                f"Member rename detected: {self.name_of(candidates[0])} -> {names[row]}"
+                            )
+                            self.record_rename(candidates[0], names[row])
+                            gone.remove(candidates[0])
+                ids = np.asarray(
+                    [self.ensure(n, j) for n, j in zip(names, joined)], dtype=np.int64
+                )
+                ids_per_snapshot.append(ids)
+                prev_ids = {int(i): p for i, p in zip(ids, points)}
+                prev_joined = {int(i): j for i, j in zip(ids, joined)}
+            self.save()
+            return ids_per_snapshot
+
+    def save(self) -> bool:
+        """Persist pending changes atomically. Returns True on success."""
+        with self._lock:
+            if not self._dirty:
+                return True
+            tmp_path = self.path + ".tmp"
+            try:
+                registry_dir = os.path.dirname(self.path)
+                if registry_dir and not os.path.exists(registry_dir):
+                    os.makedirs(registry_dir, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"revision": self._revision, "members": self._members},
+                        f,
+                        indent=2,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.path)
+                self._file_mtime = os.path.getmtime(self.path)
+                self._dirty = False
+                return True
+            except Exception as e:
+                print(f"Error saving member registry to {self.path}: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+                return False
+
+    # --- Internals ---------------------------------------------------------
+    def _follow(self, member_id: int) -> int:
+        seen = set()
+        while (
+            self._members[member_id].get("merged_into") is not None
+            and member_id not in seen
+        ):
+            seen.add(member_id)
+            member_id = self._members[member_id]["merged_into"]
+        return member_id
+
+    def _touch(self) -> None:
+        self._revision += 1
+        self._dirty = True
+
+    def _reload_if_changed(self) -> None:
+        if self._dirty:
+            return
+        try:
+            mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        except OSError:
+            mtime = None
+        if mtime == self._file_mtime:
+            return
+        self._file_mtime = mtime
+        self._members, self._by_name, self._revision = [], {}, 0
+        if mtime is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._revision = int(data.get("revision", 0))
+            for entry in data.get("members", []):
+                self._members.append(entry)
+                for name in [entry["name"]] + list(entry.get("aliases", [])):
+                    self._by_name[name] = entry["id"]
+        except Exception as e:
+            print(f"Error loading member registry from {self.path}: {e}")
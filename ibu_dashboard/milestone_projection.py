@@ -0,0 +1,233 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Batch projection of when each member reaches the probation milestones and
+# the post-probation 3M-per-90-days target. Runs once per points matrix
+# (i.e. once per snapshot set) over every member at the same time; the
+# result is stored by the caller and served as-is.
+#
+# Rates are average points per day over the last 7/30/90 days of snapshots,
+# measured from each member's last snapshot at or before the window start
+# (or their first snapshot when they joined inside the window). Projections
+# use the 30-day rate, falling back to the rate since the member first
+# appeared when the 30-day window has no span. Milestones with an admin
+# override report the override instead of a projection.
+
+# Probation rules, also used by get_member_probation_status in main.py:
+# (name, target points, days after joining the target is due)
+PROBATION_MILESTONES = (
+    ("week_1", 250000, 7),
+    ("month_1", 1000000, 30),
+    ("month_3", 3000000, 90),
+)
+MILESTONE_TARGETS = {name: target for name, target, _ in PROBATION_MILESTONES}
+MILESTONE_DUE_DAYS = {name: due for name, _, due in PROBATION_MILESTONES}
+PROBATION_DAYS = MILESTONE_DUE_DAYS["month_3"]
+# Post-probation: PERIOD_TARGET points per PERIOD_DAYS-day period
+PERIOD_DAYS = 90
+PERIOD_TARGET = 3000000
+RATE_WINDOWS = (7, 30, 90)
+PRIMARY_WINDOW = 30
+
+
+def _last_present_cols(present: np.ndarray) -> np.ndarray:
+    """Per cell, the latest column <= it where the member is present (-1 if none)."""
+    cols = np.where(present, np.arange(present.shape[1]), -1)
+    return np.maximum.accumulate(cols, axis=1)
+
+
+def _next_present_cols(present: np.ndarray) -> np.ndarray:
+    """Per cell, the earliest column >= it where the member is present
+    (n_days if none)."""
+    n_days = present.shape[1]
+    cols = np.where(present, np.arange(n_days), n_days)
+    return np.minimum.accumulate(cols[:, ::-1], axis=1)[:, ::-1]
+
+
+def _window_rates(points, days, last_cols, first_col, rows, window):
+    """Points/day over the last `window` days and the day span it covers."""
+    last = len(days) - 1
+    start = int(np.searchsorted(days, days[last] - window, side="right")) - 1
+    base = last_cols[rows, start] if start >= 0 else np.full(len(rows), -1)
+    base = np.where(base >= 0, base, first_col)
+    span = days[last] - days[base]
+    gained = points[rows, last] - points[rows, base]
+    rate = np.where(span > 0, np.maximum(gained, 0) / np.maximum(span, 1), 0.0)
+    return rate, span
+
+
+def _projection(
+    current: int, target: int, rate: float, as_of: date, deadline: date
+) -> dict:
+    remaining = max(0, target - current)
+    eta = None
+    if remaining == 0:
+        eta = as_of
+    elif rate > 0:
+        eta = as_of + timedelta(days=int(np.ceil(remaining / rate)))
+    days_left = max(0, (deadline - as_of).days)
+    return {
+        "remaining_points": remaining,
+        "projected_date": eta.isoformat() if eta else None,
+        "on_track": eta is not None and eta <= deadline,
+        "daily_needed": remaining / days_left if days_left else None,
+    }
+
+
+def project_milestones(
+    matrix, joined: Dict[int, date], overrides: Optional[Dict[str, dict]] = None
+) -> dict:
+    """Projection payload for every member in the latest snapshot with a
+    known join date (`joined` maps member ID -> join date, `overrides` member
+    name -> {milestone: passed} as in load_probation_overrides())."""
+    dates = matrix.dates
+    if not dates:
+        return {"success": True, "as_of": None, "members": {}}
+    days = np.asarray(matrix.days, dtype=np.int64)
+    last = len(dates) - 1
+    as_of = date.fromisoformat(dates[last])
+    present = np.asarray(matrix.present, dtype=bool)
+    points = np.asarray(matrix.points)
+
+    rows = np.array(
+        [r for r in sorted(joined) if r < present.shape[0] and present[r, last]],
+        dtype=np.int64,
+    )
+    if not len(rows):
+        return {"success": True, "as_of": dates[last], "members": {}}
+    sub_present = present[rows]
+    sub_points = points[rows]
+    local = np.arange(len(rows))
+    last_cols = _last_present_cols(sub_present)
+    next_cols = _next_present_cols(sub_present)
+    first_col = next_cols[:, 0]
+    current = sub_points[:, last]
+
+    rates = {}
+    for window in RATE_WINDOWS:
+        rates[window] = _window_rates(
+            sub_points, days, last_cols, first_col, local, window
+        )
+    primary, primary_span = rates[PRIMARY_WINDOW]
+    overall_span = days[last] - days[first_col]
+    overall = np.where(
+        overall_span > 0,
+        np.maximum(current - sub_points[local, first_col], 0)
+        / np.maximum(overall_span, 1),
+        0.0,
+    )
+    model_rate = np.where(primary_span > 0, primary, overall)
+
+    # First snapshot date each cumulative milestone target was reached
+    reached: Dict[str, np.ndarray] = {}
+    for name, target, _ in PROBATION_MILESTONES:
+        hit = sub_present & (sub_points >= target)
+        reached[name] = np.where(hit.any(axis=1), hit.argmax(axis=1), -1)
+
+    epoch = matrix.epoch
+    members: Dict[str, dict] = {}
+    for i, row in enumerate(rows.tolist()):
+        joined_on = joined[row]
+        rate = float(model_rate[i])
+        points_now = int(current[i])
+        override = (overrides or {}).get(matrix.members[row])
+        override = override if isinstance(override, dict) else {}
+        milestones = {}
+        for name, target, due in PROBATION_MILESTONES:
+            deadline = joined_on + timedelta(days=due)
+            entry = {"target": target, "deadline": deadline.isoformat()}
+            col = int(reached[name][i])
+            if override.get(name) in (True, False):
+                entry.update({"overridden": True, "passed": override[name]})
+            elif col >= 0:
+                reached_on = date.fromisoformat(dates[col])
+                on_time = reached_on <= deadline
+                if not on_time and col == first_col[i]:
+                    # Already past the target in their first snapshot: the
+                    # actual date is unknown
+                    on_time = None
+                entry.update(
+                    {
+                        "reached": True,
+                        "reached_date": reached_on.isoformat(),
+                        "on_time": on_time,
+                    }
+                )
+            else:
+                entry["reached"] = False
+                entry.update(_projection(points_now, target, rate, as_of, deadline))
+            milestones[name] = entry
+
+        members[matrix.members[row]] = {
+            "member_id": row,
+            "joined_date": joined_on.isoformat(),
+            "current_points": points_now,
+            "rates": {
+                f"{window}d": round(float(rates[window][0][i]), 2)
+                for window in RATE_WINDOWS
+            },
+            "model_rate": round(rate, 2),
+            "milestones": milestones,
+            "post_probation": _period_projection(
+                joined_on,
+                as_of,
+                epoch,
+                days,
+                next_cols[i],
+                sub_points[i],
+                points_now,
+                rate,
+                dates,
+            ),
+        }
+    return {
+        "success": True,
+        "as_of": dates[last],
+        "windows": list(RATE_WINDOWS),
+        "primary_window": PRIMARY_WINDOW,
+        "members": members,
+    }
+
+
+def _period_projection(
+    joined_on: date,
+    as_of: date,
+    epoch: date,
+    days: np.ndarray,
+    next_cols: np.ndarray,
+    member_points: np.ndarray,
+    points_now: int,
+    rate: float,
+    dates: List[str],
+) -> Optional[dict]:
+    """Projection for the post-probation period containing `as_of` (None while
+    still on probation). The period baseline is the member's first snapshot
+    on/after its start."""
+    first_start = joined_on + timedelta(days=PROBATION_DAYS)
+    if as_of < first_start:
+        return None
+    number = (as_of - first_start).days // PERIOD_DAYS
+    start = first_start + timedelta(days=number * PERIOD_DAYS)
+    end = start + timedelta(days=PERIOD_DAYS)
+    entry = {
+        "period_number": number + 1,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "target_points": PERIOD_TARGET,
+    }
+    start_col = int(np.searchsorted(days, (start - epoch).days, side="left"))
+    base_col = int(next_cols[start_col]) if start_col < len(days) else len(days)
+    if base_col >= len(days):
+        entry["baseline_date"] = None
+        return entry
+    earned = max(0, points_now - int(member_points[base_col]))
+    entry.update(
+        {
+            "baseline_date": dates[base_col],
+            "points_earned": earned,
+            **_projection(earned, PERIOD_TARGET, rate, as_of, end),
+        }
+    )
+    return entry
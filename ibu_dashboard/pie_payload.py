@@ -0,0 +1,239 @@
+import json
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Plotly pie chart payload for the dashboard's points-share chart. Everything
+# except labels, values, colors, text and the two annotation numbers is the
+# same on every request, so the figure is serialized once per layout size and
+# requests only splice their arrays into the frozen JSON fragments.
+
+# Slices smaller than this share of the total (in %) get no inside label
+MIN_LABEL_PERCENT = 0.95
+
+_SLOTS = ("labels", "values", "text", "colors")
+_INLINE_SLOTS = ("total", "active")
+
+
+def _slot(name: str) -> str:
+    return f"@@IBU_PIE_{name.upper()}@@"
+
+
+def _pie_figure(width: int, height: int) -> Dict:
+    return {
+        "data": [
+            {
+                "type": "pie",
+                "labels": _slot("labels"),
+                "values": _slot("values"),
+                "hole": 0.6,
+                "text": _slot("text"),
+                "textinfo": "text",
+                "textposition": "inside",
+                "hoverinfo": "label+percent+value",
+                "hovertemplate": "<b>%{label}</b><br>"
+                + "Points: %{value:,}<br>"
+                + "Percentage: %{percent}<br>"
+                + "<extra></extra>",
+                "marker": {
+                    "colors": _slot("colors"),
+                    "line": {"color": "rgba(255, 255, 255, 0.2)", "width": 1},
+                },
+                "automargin": False,
+                "domain": {"x": [0, 1], "y": [0, 1]},
+            }
+        ],
+        "layout": {
+            "width": width,
+            "height": height,
+            "margin": {"t": 50, "b": 50, "l": 0, "r": 0},
+            "showlegend": True,
+            "paper_bgcolor": "rgba(0,0,0,0)",
+            "plot_bgcolor": "rgba(0,0,0,0)",
+            "annotations": [
+                {
+                    "text": f"<b>Total Points</b><br><br><span style='font-size:24px; color:#e06150'>{_slot('total')}</span>",
+                    "x": 0.5,
+                    "y": 0.55,
+                    "xref": "paper",
+                    "yref": "paper",
+                    "showarrow": False,
+                    "font": {
+                        "size": 14,
+                        "color": "white",
+                        "family": "Inter, Arial, sans-serif",
+                    },
+                    "align": "center",
+                },
+                {
+                    "text": f"Active Members: {_slot('active')}",
+                    "x": 0.5,
+                    "y": 0.4,
+                    "xref": "paper",
+                    "yref": "paper",
+                    "showarrow": False,
+                    "font": {
+                        "size": 12,
+                        "color": "rgba(255, 255, 255, 0.7)",
+                        "family": "Inter, Arial, sans-serif",
+                    },
+                    "align": "center",
+                },
+            ],
+            "font": {
+                "color": "white",
+                "family": "Inter, Arial, sans-serif",
+                "size": 14,
+            },
+            "legend": {
+                "title": {
+                    "text": "<b style='color:#e06150; font-size:16px'>👥 Team Members</b>",
+                    "font": {
+                        "color": "#e06150",
+                        "size": 16,
+                        "family": "Inter, Arial, sans-serif",
+                    },
+                },
+                "orientation": "v",
+                "xanchor": "left",
+                "x": 1,
+                "y": 0,
+                "bgcolor": "rgba(42, 42, 42, 0.8)",
+                "bordercolor": "rgba(224, 97, 80, 0.3)",
+                "borderwidth": 1,
+                "font": {
+                    "color": "white",
+                    "size": 12,
+                    "family": "Inter, Arial, sans-serif",
+                },
+                "itemsizing": "constant",
+                "itemwidth": 50,
+            },
+        },
+        "config": {"displaylogo": False, "displayModeBar": False, "showTips": False},
+    }
+
+
+class PieChartTemplate:
+    """Pre-serialized pie figure split into constant JSON fragments around the slots."""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        serialized = json.dumps(_pie_figure(width, height))
+        # Array slots replace the quoted sentinel, inline slots sit inside a string
+        markers = [(f'"{_slot(n)}"', n) for n in _SLOTS]
+        markers += [(_slot(n), n) for n in _INLINE_SLOTS]
+        positions = sorted(
+            (serialized.index(marker), marker, name) for marker, name in markers
+        )
+        self._fragments: List[str] = []
+        self._order: List[str] = []
+        cursor = 0
+        for pos, marker, name in positions:
+            self._fragments.append(serialized[cursor:pos])
+            self._order.append(name)
+            cursor = pos + len(marker)
+        self._tail = serialized[cursor:]
+        # Frozen copy for callers that need the plain dict
+        self._figure = json.loads(serialized)
+
+    def render(
+        self, parts: Dict[str, str], extra: Optional[Dict] = None, dumps=json.dumps
+    ) -> str:
+        out = []
+        for fragment, name in zip(self._fragments, self._order):
+            out.append(fragment)
+            out.append(parts[name])
+        if extra:
+            # Extra top-level keys go before the closing brace of the figure
+            out.append(self._tail[:-1])
+            for key, value in extra.items():
+                out.append(f", {dumps(key)}: {dumps(value)}")
+            out.append("}")
+        else:
+            out.append(self._tail)
+        return "".join(out)
+
+    def figure(self) -> Dict:
+        return json.loads(json.dumps(self._figure))
+
+
+_templates: Dict[tuple, PieChartTemplate] = {}
+
+
+def get_pie_template(width: int, height: int) -> PieChartTemplate:
+    key = (width, height)
+    template = _templates.get(key)
+    if template is None:
+        template = _templates[key] = PieChartTemplate(width, height)
+    return template
+
+
+def pie_text(values: np.ndarray, labels: Sequence) -> List[str]:
+    """Inside-slice label "   name (x.x%)   " for slices of at least MIN_LABEL_PERCENT."""
+    text = [""] * len(values)
+    total = values.sum() if len(values) else 0
+    if total == 0:
+        return text
+    percent = values / total * 100
+    for i in np.flatnonzero((values != 0) & (percent >= MIN_LABEL_PERCENT)):
+        text[i] = f"   {labels[i]} ({percent[i]:.1f}%)   "
+    return text
+
+
+class PieChartPayload:
+    """Pie chart response. Behaves like the old payload dict where routes need it
+    ("error" in payload, payload["date_range"] = ...) and serializes by splicing."""
+
+    def __init__(self, labels, values, colors, width: int, height: int):
+        self.labels = list(labels)
+        self.values = np.asarray(values)
+        self.colors = list(colors)
+        self.template = get_pie_template(width, height)
+        self.extra: Dict = {}
+        self.text = pie_text(self.values, self.labels)
+        total = self.values.sum() if len(self.values) else 0
+        self.total = total.item() if hasattr(total, "item") else total
+        self.active = int(np.count_nonzero(self.values > 0))
+
+    def __contains__(self, key) -> bool:
+        return key in self.extra or key in ("data", "layout", "config")
+
+    def __getitem__(self, key):
+        if key in self.extra:
+            return self.extra[key]
+        return self.to_dict()[key]
+
+    def __setitem__(self, key, value) -> None:
+        self.extra[key] = value
+
+    def to_json(self, dumps=json.dumps) -> str:
+        """Serialize; `dumps` may be any encoder that accepts NumPy arrays."""
+        values = self.values if dumps is not json.dumps else self.values.tolist()
+        parts = {
+            "labels": dumps(self.labels),
+            "values": dumps(values),
+            "text": dumps(self.text),
+            "colors": dumps(self.colors),
+            "total": f"{self.total:,}",
+            "active": str(self.active),
+        }
+        return self.template.render(parts, self.extra, dumps)
+
+    def to_dict(self) -> Dict:
+        figure = self.template.figure()
+        trace = figure["data"][0]
+        trace["labels"] = self.labels
+        trace["values"] = self.values.tolist()
+        trace["text"] = self.text
+        trace["marker"]["colors"] = self.colors
+        annotations = figure["layout"]["annotations"]
+        annotations[0]["text"] = annotations[0]["text"].replace(
+            _slot("total"), f"{self.total:,}"
+        )
+        annotations[1]["text"] = annotations[1]["text"].replace(
+            _slot("active"), str(self.active)
+        )
+        figure.update(self.extra)
+        return figure
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Consolidated member x day points/rank history in a fixed-width binary file.
+# Every uwsgi worker maps the same file read-only, so the pages live once in
+# the OS page cache no matter how many workers are running.
+#
+# Layout (little-endian):
+#   header   struct _HEADER (magic, version, sizes, epoch, generation, offsets)
+#   names    UTF-8 JSON {"names": [...], "aliases": {name: row}}; row == member ID
+#   days     int32[n_days]              day offsets from the epoch date
+#   points   int64[n_members, n_days]   cumulative points (0 when absent)
+#   ranks    int32[n_members, n_days]   rank (0 when absent)
+#   present  uint8[n_members, n_days]   1 when the member is in that snapshot
+POINTS_MATRIX_FILE = os.getenv(
+    "POINTS_MATRIX_FILE", os.path.join("cache", "points_matrix.bin")
+)
+POINTS_MATRIX_VERSION = 2
+
+_MAGIC = b"IBUPTS01"
+_HEADER = struct.Struct("<8sIIIi16sQQQQQQ")
+_ALIGN = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _map(path: str, dtype, offset: int, shape) -> np.ndarray:
+    # mmap refuses zero-length regions (e.g. before the first snapshot exists)
+    if int(np.prod(shape)) == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(path, dtype, "r", offset, shape)
+
+
+class PointsMatrix:
+    """Read-only, memory-mapped view of the points/rank history file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            raw_header = f.read(_HEADER.size)
+            (
+                magic,
+                version,
+                n_members,
+                n_days,
+                epoch_ordinal,
+                generation,
+                names_offset,
+                names_len,
+                days_offset,
+                points_offset,
+                ranks_offset,
+                present_offset,
+            ) = _HEADER.unpack(raw_header)
+            if magic != _MAGIC or version != POINTS_MATRIX_VERSION:
+                raise ValueError(f"{path} is not a points matrix v{POINTS_MATRIX_VERSION}")
+            f.seek(names_offset)
+            index = json.loads(f.read(names_len).decode("utf-8"))
+        self.members: List[str] = index["names"]
+        self.generation = generation.decode("ascii").rstrip("\0")
+        self.epoch = date.fromordinal(epoch_ordinal) if n_days else None
+        shape = (n_members, n_days)
+        self.days = _map(path, np.int32, days_offset, (n_days,))
+        self.points = _map(path, np.int64, points_offset, shape)
+        self.ranks = _map(path, np.int32, ranks_offset, shape)
+        self.present = _map(path, np.uint8, present_offset, shape)
+        self._member_rows: Dict[str, int] = index["aliases"]
+        self._dates = [(self.epoch + timedelta(days=int(d))).isoformat() for d in self.days]
+
+    @property
+    def dates(self) -> List[str]:
+        """YYYY-MM-DD label for every column."""
+        return self._dates
+
+    def member_row(self, name: str) -> Optional[int]:
+        """Member ID (row) for a current or former member name."""
+        return self._member_rows.get(str(name).strip())
+
+    def aliases(self) -> Dict[str, int]:
+        """Every current and former member name -> member ID (row)."""
+        return dict(self._member_rows)
+
+    def date_columns(self, start: Optional[str] = None, end: Optional[str] = None) -> np.ndarray:
+        """Column indices whose date lies in the inclusive [start, end] range."""
+        cols = np.arange(len(self._dates))
+        if not len(cols):
+            return cols
+        if start:
+            cols = cols[self.days[cols] >= (date.fromisoformat(start) - self.epoch).days]
+        if end:
+            cols = cols[self.days[cols] <= (date.fromisoformat(end) - self.epoch).days]
+        return cols
+
+
+def matrix_generation(history, registry) -> str:
+    """Identifier of the history content + member registry state a matrix reflects."""
+    key = f"{history.generation}:{registry.revision}"
+    return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def write_points_matrix(history, registry, path: str = POINTS_MATRIX_FILE) -> bool:
+    """Build the matrix file from a HistoryStore and atomically replace `path`.
+    Rows are MemberRegistry IDs, so renamed members keep a single history."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        dates = history.dates()
+        snapshots = [history.snapshot(d) for d in dates]
+        ids_per_snapshot = registry.assign_ids(snapshots)
+        members = registry.names()
+        n_members, n_days = len(members), len(dates)
+        points = np.zeros((n_members, n_days), dtype=np.int64)
+        ranks = np.zeros((n_members, n_days), dtype=np.int32)
+        present = np.zeros((n_members, n_days), dtype=np.uint8)
+        for col, (snap, idx) in enumerate(zip(snapshots, ids_per_snapshot)):
+            if not len(idx):
+                continue
+            # Reverse so the first row wins when an ID appears twice in a file
+            points[idx[::-1], col] = snap["points"][::-1]
+            ranks[idx[::-1], col] = snap["ranks"][::-1]
+            present[idx, col] = 1
+        epoch = date.fromisoformat(dates[0]) if dates else date(1970, 1, 1)
+        days = np.asarray(
+            [(date.fromisoformat(d) - epoch).days for d in dates], dtype=np.int32
+        )
+        names = json.dumps(
+            {"names": members, "aliases": registry.aliases()}
+        ).encode("utf-8")
+
+        names_offset = _HEADER.size
+        days_offset = _align(names_offset + len(names))
+        points_offset = _align(days_offset + days.nbytes)
+        ranks_offset = _align(points_offset + points.nbytes)
+        present_offset = _align(ranks_offset + ranks.nbytes)
+        header = _HEADER.pack(
+            _MAGIC,
+            POINTS_MATRIX_VERSION,
+            n_members,
+            n_days,
+            epoch.toordinal(),
+            matrix_generation(history, registry).encode("ascii"),
+            names_offset,
+            len(names),
+            days_offset,
+            points_offset,
+            ranks_offset,
+            present_offset,
+        )
+        matrix_dir = os.path.dirname(path)
+        if matrix_dir:
+            os.makedirs(matrix_dir, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            for offset, blob in (
+                (0, header),
+                (names_offset, names),
+                (days_offset, days.tobytes()),
+                (points_offset, points.tobytes()),
+                (ranks_offset, ranks.tobytes()),
+                (present_offset, present.tobytes()),
+            ):
+                f.seek(offset)
+                f.write(blob)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        print(f"Error writing points matrix to {path}: {e}")
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        except Exception:
+            pass
+        return False
+
+
+class PointsMatrixCache:
+    """Per-process handle that rebuilds/remaps the shared file when history changes."""
+
+    def __init__(self, path: str = POINTS_MATRIX_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._matrix: Optional[PointsMatrix] = None
+        self._stat_key = None
+
+    def get(self, history, registry) -> Optional[PointsMatrix]:
+        with self._lock:
+            try:
+                matrix = self._open_current()
+                if matrix is None or matrix.generation != matrix_generation(
+                    history, registry
+                ):
+                    if not write_points_matrix(history, registry, self.path):
+                        return matrix
+                    matrix = self._open_current()
+                return matrix
+            except Exception as e:
+                print(f"Error opening points matrix {self.path}: {e}")
+                return None
+
+    def _open_current(self) -> Optional[PointsMatrix]:
+        if not os.path.exists(self.path):
+            return None
+        st = os.stat(self.path)
+        stat_key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        if self._matrix is None or stat_key != self._stat_key:
+            # The old mapping stays valid until dropped (replaced files keep their inode)
+            self._matrix = PointsMatrix(self.path)
+            self._stat_key = stat_key
+        return self._matrix
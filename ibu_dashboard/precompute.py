@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from typing import Callable, Iterable, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from flask import Response, request
+
+# Precomputed GET responses, rebuilt in the background whenever the data
+# generation changes (a new snapshot arrives, or the day rolls over for the
+# relative pie ranges). Each rebuild renders the configured URLs through the
+# app itself and stores the finished set in the shared cache in one
+# transaction, so every worker sees either the complete old set or the
+# complete new one, and a set built by one worker is reused by the others.
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true"
+# Upper bound on how long a rendered response is kept (generation still applies)
+PRECOMPUTE_TTL_SECONDS = int(os.getenv("PRECOMPUTE_TTL_SECONDS", str(2 * 24 * 3600)))
+CACHE_NAMESPACE = "precomputed"
+
+# WSGI environ flag marking the scheduler's own requests (never served from cache)
+_BYPASS_ENVIRON_KEY = "ibu.precompute"
+
+
+def _pack(status: int, mimetype: str, body: bytes) -> bytes:
+    return f"{status} {mimetype}\n".encode("utf-8") + body
+
+
+def _unpack(entry: bytes) -> Tuple[int, str, bytes]:
+    head, _, body = entry.partition(b"\n")
+    status, _, mimetype = head.decode("utf-8").partition(" ")
+    return int(status), mimetype, body
+
+
+def request_key(path: str, args) -> str:
+    """Cache key for a GET request: path plus its query args in sorted order."""
+    items = sorted(args.items(multi=True)) if hasattr(args, "items") else sorted(args)
+    return f"{path}?{urlencode(items)}"
+
+
+class ResponsePrecomputer:
+    """Background renderer for the app's most requested read-only GET responses."""
+
+    def __init__(
+        self,
+        app,
+        cache,
+        generation: Callable[[], str],
+        urls: Callable[[], Iterable[str]],
+        warmups: Iterable[Tuple[str, Callable[[], object]]] = (),
+    ):
+        self.app = app
+        self.cache = cache
+        self.generation = generation
+        self.urls = urls
+        self.warmups = list(warmups)
+        # Generation of the newest set this process built or found in the cache
+        self.ready_generation: Optional[str] = None
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._pending = False
+        self.last_run_seconds: Optional[float] = None
+
+    def install(self) -> None:
+        @self.app.before_request
+        def _serve_precomputed():
+            if request.method != "GET" or request.environ.get(_BYPASS_ENVIRON_KEY):
+                return None
+            return self.lookup(request.path, request.args)
+
+    def lookup(self, path: str, args) -> Optional[Response]:
+        generation = self.generation()
+        if generation != self.ready_generation:
+            # Stale or missing set: serve live and (re)build in the background
+            self.schedule()
+        entry = self.cache.get(
+            CACHE_NAMESPACE, request_key(path, args), generation=generation
+        )
+        if entry is None:
+            return None
+        status, mimetype, body = _unpack(entry)
+        return Response(body, status=status, mimetype=mimetype)
+
+    def schedule(self) -> None:
+        """Start a rebuild (or queue one more if a rebuild is already running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._pending = True
+                return
+            self._pending = False
+            self._thread = threading.Thread(
+                target=self._run, daemon=True, name="ResponsePrecomputer"
+            )
+            self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            started = time.time()
+            generation = self.generation()
+            if self.cache.get(CACHE_NAMESPACE, "ready", generation=generation):
+                # Another worker already built this generation
+                self.ready_generation = generation
+                if self._finish(generation):
+                    return
+                continue
+            for name, warmup in self.warmups:
+                try:
+                    warmup()
+                except Exception as e:
+                    print(f"[Precompute] {name} failed: {e}")
+            responses = {}
+            client = self.app.test_client()
+            for url in self.urls():
+                try:
+                    resp = client.get(
+                        url, environ_overrides={_BYPASS_ENVIRON_KEY: True}
+                    )
+                    if resp.status_code == 200:
+                        path, _, query = url.partition("?")
+                        key = request_key(
+                            path, parse_qsl(query, keep_blank_values=True)
+                        )
+                        responses[key] = _pack(
+                            resp.status_code, resp.mimetype, resp.get_data()
+                        )
+                except Exception as e:
+                    print(f"[Precompute] {url} failed: {e}")
+            responses["ready"] = True
+            self.cache.purge_expired()
+            if self.cache.set_many(
+                CACHE_NAMESPACE,
+                responses,
+                ttl=PRECOMPUTE_TTL_SECONDS,
+                generation=generation,
+            ):
+                self.ready_generation = generation
+            self.last_run_seconds = time.time() - started
+            print(
+                f"[Precompute] {len(responses) - 1} responses ready "
+                f"in {self.last_run_seconds:.1f}s"
+            )
+            if self._finish(generation):
+                return
+
+    def _finish(self, generation: str) -> bool:
+        """True when no further rebuild is needed (clears the running thread)."""
+        with self._lock:
+            if not self._pending and generation == self.generation():
+                self._thread = None
+                return True
+            self._pending = False
+            return False
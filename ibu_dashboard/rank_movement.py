@@ -0,0 +1,272 @@
+import json
+import os
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+# Materialized view of rank movements for members and teams. Snapshots are
+# applied one date at a time as they are ingested; per entity it keeps the
+# latest rank and the current streak (consecutive snapshots moving in the
+# same direction), plus the ranks of the last RECENT_DAYS days so period
+# changes can be taken without rescanning history. After every sync the
+# "top movers" tables are rebuilt, so reads are plain lookups. Syncing is
+# done when snapshots are ingested (precompute / snapshot watcher); other
+# processes pick the saved view up when its file changes.
+#
+# Rank changes are positive when an entity moved up (its rank number fell).
+RANK_MOVEMENT_FILE = os.getenv(
+    "RANK_MOVEMENT_FILE", os.path.join("cache", "rank_movement.json")
+)
+RANK_MOVEMENT_VERSION = 2
+
+MOVEMENT_PERIODS = (1, 7, 30)
+RECENT_DAYS = max(MOVEMENT_PERIODS)
+TOP_MOVERS = 20
+
+
+def _baseline(recent: List[list], as_of: str, period: int) -> Optional[dict]:
+    """Ranks of the latest snapshot at least `period` days before `as_of`
+    (for period 1: simply the previous snapshot)."""
+    if period == 1:
+        return recent[-2][1] if len(recent) > 1 else None
+    cutoff = (date.fromisoformat(as_of) - timedelta(days=period)).isoformat()
+    for snap_date, ranks in reversed(recent[:-1]):
+        if snap_date <= cutoff:
+            return ranks
+    return None
+
+
+class _KindState:
+    """Incremental state for one kind of entity (members or teams)."""
+
+    def __init__(self):
+        self.dates: List[str] = []
+        # Checksum of each applied snapshot (rewritten snapshots force a rebuild)
+        self.checksums: Dict[str, Optional[str]] = {}
+        # [[date, {key: rank}], ...] for the last RECENT_DAYS days
+        self.recent: List[list] = []
+        # key -> [rank, date, streak]
+        self.state: Dict[str, list] = {}
+        self.labels: Dict[str, str] = {}
+        self.view: Dict[str, object] = {}
+
+    def apply(self, snap_date: str, ranks: Dict[str, int]) -> None:
+        for key, rank in ranks.items():
+            previous = self.state.get(key)
+            if previous is None:
+                self.state[key] = [rank, snap_date, 0]
+                continue
+            step = previous[0] - rank
+            streak = previous[2]
+            if step > 0:
+                streak = streak + 1 if streak > 0 else 1
+            elif step < 0:
+                streak = streak - 1 if streak < 0 else -1
+            else:
+                streak = 0
+            self.state[key] = [rank, snap_date, streak]
+        self.dates.append(snap_date)
+        self.recent.append([snap_date, ranks])
+        cutoff = (
+            date.fromisoformat(snap_date) - timedelta(days=RECENT_DAYS)
+        ).isoformat()
+        # Keep one snapshot at/before the cutoff as the oldest baseline
+        while len(self.recent) > 2 and self.recent[1][0] <= cutoff:
+            self.recent.pop(0)
+
+    def materialize(self) -> None:
+        if not self.recent:
+            self.view = {}
+            return
+        as_of, current = self.recent[-1]
+        entities = {}
+        movers = {}
+        for key, rank in current.items():
+            entities[key] = {
+                "name": self.labels.get(key, key),
+                "rank": rank,
+                "streak": self.state[key][2],
+                "changes": {},
+            }
+        for period in MOVEMENT_PERIODS:
+            base = _baseline(self.recent, as_of, period)
+            rows = []
+            for key, rank in current.items():
+                before = base.get(key) if base else None
+                change = before - rank if before is not None else None
+                entities[key]["changes"][str(period)] = change
+                if change is not None:
+                    rows.append(
+                        {
+                            "name": entities[key]["name"],
+                            "rank": rank,
+                            "previous_rank": before,
+                            "change": change,
+                        }
+                    )
+            rows.sort(key=lambda r: (-r["change"], r["rank"]))
+            movers[str(period)] = {
+                "up": [r for r in rows[:TOP_MOVERS] if r["change"] > 0],
+                "down": [r for r in reversed(rows[-TOP_MOVERS:]) if r["change"] < 0],
+            }
+        by_streak = [
+            {"name": e["name"], "rank": e["rank"], "streak": e["streak"]}
+            for e in sorted(
+                entities.values(), key=lambda e: (-e["streak"], e["rank"])
+            )
+        ]
+        self.view = {
+            "as_of": as_of,
+            "movers": movers,
+            "streaks": {
+                "up": [e for e in by_streak[:TOP_MOVERS] if e["streak"] > 0],
+                "down": [
+                    e for e in reversed(by_streak[-TOP_MOVERS:]) if e["streak"] < 0
+                ],
+            },
+            "entities": entities,
+        }
+
+    def to_json(self) -> dict:
+        return {
+            "dates": self.dates,
+            "checksums": self.checksums,
+            "recent": self.recent,
+            "state": self.state,
+            "labels": self.labels,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_KindState":
+        kind = cls()
+        kind.dates = data["dates"]
+        kind.checksums = data["checksums"]
+        kind.recent = data["recent"]
+        kind.state = data["state"]
+        kind.labels = data["labels"]
+        kind.materialize()
+        return kind
+
+
+class RankMovementView:
+    """Persistent, incrementally updated rank-movement tables per kind."""
+
+    def __init__(self, path: str = RANK_MOVEMENT_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._kinds: Dict[str, _KindState] = {}
+        self._loaded = False
+        self._file_mtime: Optional[int] = None
+
+    def sync(
+        self,
+        kind: str,
+        dates: List[str],
+        snapshot: Callable[[str], Dict[str, int]],
+        labels: Optional[Dict[str, str]] = None,
+        checksum: Optional[Callable[[str], Optional[str]]] = None,
+    ) -> int:
+        """Apply the snapshots of `dates` (ascending, repeats ignored) not
+        seen yet. `snapshot` returns {key: rank} for a date and `checksum` an
+        identifier of its content. The kind is rebuilt from scratch when an
+        already applied date changed position, disappeared or was rewritten.
+        Returns the number of snapshots applied."""
+        with self._lock:
+            self._reload_if_changed()
+            dates = list(dict.fromkeys(dates))
+            checksum = checksum or (lambda _date: None)
+            state = self._kinds.get(kind)
+            if (
+                state is None
+                or state.dates != dates[: len(state.dates)]
+                or any(state.checksums.get(d) != checksum(d) for d in state.dates)
+            ):
+                state = self._kinds[kind] = _KindState()
+            pending = dates[len(state.dates) :]
+            for snap_date in pending:
+                state.apply(snap_date, snapshot(snap_date))
+                state.checksums[snap_date] = checksum(snap_date)
+            changed = bool(pending)
+            if labels is not None and labels != state.labels:
+                state.labels = dict(labels)
+                changed = True
+            if changed:
+                state.materialize()
+                self.save()
+            return len(pending)
+
+    def movers(self, kind: str, period: int) -> Optional[dict]:
+        """Top movers over `period` days and the longest current streaks."""
+        with self._lock:
+            self._reload_if_changed()
+            view = self._kinds[kind].view if kind in self._kinds else {}
+            if not view or str(period) not in view["movers"]:
+                return None
+            return {
+                "as_of": view["as_of"],
+                "period": period,
+                **view["movers"][str(period)],
+                "streaks": view["streaks"],
+            }
+
+    def entity(self, kind: str, key: str) -> Optional[dict]:
+        """Rank, streak and per-period changes of one member/team."""
+        with self._lock:
+            self._reload_if_changed()
+            view = self._kinds[kind].view if kind in self._kinds else {}
+            entry = view.get("entities", {}).get(key) if view else None
+            return dict(entry, as_of=view["as_of"]) if entry else None
+
+    def save(self) -> bool:
+        """Persist the view atomically. Returns True on success."""
+        with self._lock:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                view_dir = os.path.dirname(self.path)
+                if view_dir:
+                    os.makedirs(view_dir, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": RANK_MOVEMENT_VERSION,
+                            "kinds": {k: s.to_json() for k, s in self._kinds.items()},
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.path)
+                self._file_mtime = os.stat(self.path).st_mtime_ns
+                return True
+            except Exception as e:
+                print(f"Error saving rank movements to {self.path}: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+                return False
+
+    def _reload_if_changed(self) -> None:
+        """Load the saved view, and again whenever another process replaced it."""
+        try:
+            mtime: Optional[int] = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if self._loaded and mtime == self._file_mtime:
+            return
+        self._loaded = True
+        self._file_mtime = mtime
+        if mtime is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != RANK_MOVEMENT_VERSION:
+                self._kinds = {}
+                return
+            self._kinds = {
+                k: _KindState.from_json(v) for k, v in data["kinds"].items()
+            }
+        except Exception as e:
+            print(f"Error loading rank movements from {self.path}: {e}")
+            self._kinds = {}
@@ -0,0 +1,120 @@
+from datetime import date
+from typing import List, Optional
+
+import numpy as np
+
+# Rolling-window production over the members' cumulative points. The points
+# matrix is spread onto a dense calendar grid (first to last snapshot day),
+# filling the days without a snapshot of a member according to a policy:
+#
+#   strict         only snapshot days have a value
+#   carry_forward  the member's last known points
+#   interpolate    linear between the surrounding snapshots (carried
+#                  forward after the member's last snapshot)
+#
+# Gaps longer than `max_gap_days` stay unknown under every policy. Since the
+# series is already cumulative, the points earned in any window are the
+# difference of two grid cells.
+GAP_POLICIES = ("strict", "carry_forward", "interpolate")
+ROLLING_WINDOWS = (7, 30, 90, 180)
+
+
+class RollingWindows:
+    """Dense per-member cumulative points grid for O(1) window queries."""
+
+    def __init__(self, matrix, policy: str = "interpolate", max_gap_days: int = 14):
+        if policy not in GAP_POLICIES:
+            raise ValueError(f"Unknown gap policy '{policy}'")
+        self.policy = policy
+        self.max_gap_days = max_gap_days
+        self.generation = matrix.generation
+        days = np.asarray(matrix.days, dtype=np.int64)
+        self.epoch = matrix.epoch
+        self.first_day = int(days[0]) if len(days) else 0
+        n_days = int(days[-1] - days[0]) + 1 if len(days) else 0
+        present = np.asarray(matrix.present, dtype=bool)
+        n_members = present.shape[0]
+        known = np.zeros((n_members, n_days), dtype=bool)
+        values = np.full((n_members, n_days), np.nan)
+        offsets = days - self.first_day
+        known[:, offsets] = present
+        values[:, offsets] = np.where(present, np.asarray(matrix.points), np.nan)
+        self.known = known
+        self.cumulative = (
+            values if policy == "strict" else self._fill(known, values, policy)
+        )
+
+    def _fill(self, known: np.ndarray, values: np.ndarray, policy: str) -> np.ndarray:
+        n_days = known.shape[1]
+        cols = np.arange(n_days)
+        prev = np.maximum.accumulate(np.where(known, cols, -1), axis=1)
+        nxt = np.minimum.accumulate(np.where(known, cols, n_days)[:, ::-1], axis=1)
+        nxt = nxt[:, ::-1]
+        rows = np.arange(known.shape[0])[:, None]
+        has_prev = prev >= 0
+        has_next = nxt < n_days
+        prev_safe = np.where(has_prev, prev, 0)
+        next_safe = np.where(has_next, nxt, 0)
+        before = values[rows, prev_safe]
+        # Inside a gap the whole gap must be short enough; after the last
+        # snapshot only the distance to it counts
+        span = np.where(has_next, nxt - prev, cols - prev)
+        fillable = has_prev & (span <= self.max_gap_days)
+        filled = before
+        if policy == "interpolate":
+            after = values[rows, next_safe]
+            gap = np.maximum(nxt - prev, 1)
+            interpolated = before + (after - before) * (cols - prev) / gap
+            filled = np.where(has_next, interpolated, before)
+        return np.where(known, values, np.where(fillable, filled, np.nan))
+
+    # --- Queries -----------------------------------------------------------
+    def column(self, date_str: str) -> Optional[int]:
+        """Grid column of a YYYY-MM-DD date (None outside the grid)."""
+        if self.epoch is None:
+            return None
+        try:
+            day = (date.fromisoformat(date_str) - self.epoch).days
+        except ValueError:
+            return None
+        col = day - self.first_day
+        return col if 0 <= col < self.cumulative.shape[1] else None
+
+    def value_on(self, row: Optional[int], date_str: str) -> Optional[int]:
+        """Cumulative points of a member on a date under the gap policy."""
+        col = self.column(date_str)
+        if row is None or col is None or row >= self.cumulative.shape[0]:
+            return None
+        value = self.cumulative[row, col]
+        return None if np.isnan(value) else int(round(value))
+
+    def is_observed(self, row: Optional[int], date_str: str) -> bool:
+        """True when the member has an actual snapshot on that date."""
+        col = self.column(date_str)
+        if row is None or col is None or row >= self.known.shape[0]:
+            return False
+        return bool(self.known[row, col])
+
+    def earned(self, row: Optional[int], start: str, end: str) -> Optional[int]:
+        """Points earned from `start` to `end` (difference of two cells)."""
+        first = self.value_on(row, start)
+        last = self.value_on(row, end)
+        if first is None or last is None:
+            return None
+        return max(0, last - first)
+
+    def series(self, row: int, window: int) -> np.ndarray:
+        """Points earned in the `window` days ending on each grid day (NaN
+        where either end is unknown or before the grid)."""
+        cumulative = self.cumulative[row]
+        out = np.full(len(cumulative), np.nan)
+        if 0 < window < len(cumulative):
+            out[window:] = np.maximum(cumulative[window:] - cumulative[:-window], 0)
+        return out
+
+    def dates(self) -> List[str]:
+        """YYYY-MM-DD label of every grid column."""
+        if self.epoch is None:
+            return []
+        start = np.datetime64(self.epoch) + self.first_day
+        return [str(d) for d in np.arange(start, start + self.cumulative.shape[1])]
@@ -0,0 +1,221 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+# Cache for computed payloads shared by every uwsgi worker. Each entry carries
+# an optional expiry (TTL) and an optional generation string; a read with a
+# different generation is a miss, so bumping the data generation invalidates
+# everything derived from the old data without explicit deletes.
+#
+# Values are JSON-serializable objects or raw bytes. Backends:
+#   sqlite  (default) one WAL-mode SQLite file, safe across processes
+#   memory  per-process dict, for development/single-process runs
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+SHARED_CACHE_FILE = os.getenv(
+    "SHARED_CACHE_FILE", os.path.join("cache", "shared_cache.sqlite3")
+)
+
+
+def _encode(value) -> Tuple[str, bytes]:
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "bytes", bytes(value)
+    return "json", json.dumps(value).encode("utf-8")
+
+
+def _decode(kind: str, blob: bytes):
+    if kind == "bytes":
+        return bytes(blob)
+    return json.loads(bytes(blob).decode("utf-8"))
+
+
+class MemoryCacheBackend:
+    """In-process backend (entries are not shared between workers)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Optional[str], Optional[float], str, bytes]] = {}
+
+    def get(self, key: str, generation: Optional[str] = None, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return default
+        entry_generation, expires, kind, blob = entry
+        if expires is not None and expires <= time.time():
+            return default
+        if generation is not None and entry_generation != generation:
+            return default
+        return _decode(kind, blob)
+
+    def set_many(
+        self,
+        items: Iterable[Tuple[str, object]],
+        ttl: Optional[float] = None,
+        generation: Optional[str] = None,
+    ) -> None:
+        expires = time.time() + ttl if ttl else None
+        encoded = {k: (generation, expires) + _encode(v) for k, v in items}
+        with self._lock:
+            self._entries.update(encoded)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def purge_expired(self) -> None:
+        now = time.time()
+        with self._lock:
+            for key in [
+                k for k, e in self._entries.items() if e[1] is not None and e[1] <= now
+            ]:
+                del self._entries[key]
+
+
+class SQLiteCacheBackend:
+    """File-backed backend; one connection per thread, WAL for concurrent readers."""
+
+    def __init__(self, path: str = SHARED_CACHE_FILE):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, generation TEXT, expires REAL,"
+                " kind TEXT NOT NULL, value BLOB NOT NULL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str, generation: Optional[str] = None, default=None):
+        row = (
+            self._conn()
+            .execute(
+                "SELECT generation, expires, kind, value FROM cache WHERE key = ?",
+                (key,),
+            )
+            .fetchone()
+        )
+        if row is None:
+            return default
+        entry_generation, expires, kind, blob = row
+        if expires is not None and expires <= time.time():
+            return default
+        if generation is not None and entry_generation != generation:
+            return default
+        return _decode(kind, blob)
+
+    def set_many(
+        self,
+        items: Iterable[Tuple[str, object]],
+        ttl: Optional[float] = None,
+        generation: Optional[str] = None,
+    ) -> None:
+        expires = time.time() + ttl if ttl else None
+        rows = [(k, generation, expires) + _encode(v) for k, v in items]
+        conn = self._conn()
+        # One transaction: readers in other workers see all new rows or none
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, generation, expires, kind, value)"
+                " VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete_prefix(self, prefix: str) -> None:
+        escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        self._conn().execute(
+            "DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (escaped + "%",)
+        )
+
+    def purge_expired(self) -> None:
+        self._conn().execute(
+            "DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?",
+            (time.time(),),
+        )
+
+
+class SharedCache:
+    """Namespaced front end over a cache backend. Errors degrade to cache misses."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(namespace: str, key: str) -> str:
+        return f"{namespace}:{key}"
+
+    def get(self, namespace: str, key: str, generation: Optional[str] = None):
+        """Cached value, or None on a miss/expiry/generation mismatch."""
+        try:
+            return self.backend.get(self._key(namespace, key), generation)
+        except Exception as e:
+            print(f"Shared cache read failed for {namespace}:{key}: {e}")
+            return None
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value,
+        ttl: Optional[float] = None,
+        generation: Optional[str] = None,
+    ) -> bool:
+        return self.set_many(namespace, {key: value}, ttl=ttl, generation=generation)
+
+    def set_many(
+        self,
+        namespace: str,
+        values: Dict[str, object],
+        ttl: Optional[float] = None,
+        generation: Optional[str] = None,
+    ) -> bool:
+        """Store several entries atomically (all visible together)."""
+        try:
+            self.backend.set_many(
+                ((self._key(namespace, k), v) for k, v in values.items()),
+                ttl=ttl,
+                generation=generation,
+            )
+            return True
+        except Exception as e:
+            print(f"Shared cache write failed for {namespace}: {e}")
+            return False
+
+    def clear(self, namespace: str) -> None:
+        try:
+            self.backend.delete_prefix(f"{namespace}:")
+        except Exception as e:
+            print(f"Shared cache clear failed for {namespace}: {e}")
+
+    def purge_expired(self) -> None:
+        try:
+            self.backend.purge_expired()
+        except Exception as e:
+            print(f"Shared cache purge failed: {e}")
+
+
+def create_shared_cache(backend: str = CACHE_BACKEND) -> SharedCache:
+    if backend == "memory":
+        return SharedCache(MemoryCacheBackend())
+    if backend != "sqlite":
+        print(f"Unknown CACHE_BACKEND '{backend}', using sqlite")
+    return SharedCache(SQLiteCacheBackend())
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional, TypeVar
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None
+
+# Request coalescing for expensive computations. Within a process, concurrent
+# callers for the same key wait for the first caller's result instead of
+# computing it again. Across uwsgi processes the leader holds an exclusive
+# file lock while computing; a process that gets the lock afterwards first
+# re-checks the shared cache (`lookup`) and only computes on a real miss.
+#
+# flock() locks belong to the open file, so a bucket this process already
+# holds is re-entered instead of locked again (a nested or concurrent do()
+# hashing to the same bucket would otherwise wait on its own lock), and the
+# lock is polled for at most SINGLE_FLIGHT_TIMEOUT seconds.
+SINGLE_FLIGHT_LOCK_DIR = os.getenv(
+    "SINGLE_FLIGHT_LOCK_DIR", os.path.join("cache", "locks")
+)
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "120"))
+# Keys hash into a fixed set of lock files, so arbitrary query keys don't
+# leave one file each behind
+_LOCK_BUCKETS = 256
+_LOCK_POLL_SECONDS = 0.05
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(self, lock_dir: str = SINGLE_FLIGHT_LOCK_DIR):
+        self.lock_dir = lock_dir
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        # bucket -> [open lock file, holders in this process]
+        self._held: Dict[int, list] = {}
+
+    def do(
+        self,
+        key: str,
+        compute: Callable[[], T],
+        lookup: Optional[Callable[[], Optional[T]]] = None,
+    ) -> T:
+        """Return compute()'s result, computing it at most once at a time per key.
+        `lookup` returns an already cached result (or None) once the lock is held."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            if call.done.wait(SINGLE_FLIGHT_TIMEOUT):
+                if call.error is not None:
+                    raise call.error
+                return call.result
+            # Leader is stuck: don't wait forever, compute independently
+            print(f"[SingleFlight] Timed out waiting for {key}; computing")
+            return compute()
+        try:
+            with self._file_lock(key):
+                result = lookup() if lookup else None
+                if result is None:
+                    result = compute()
+            call.result = result
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    @contextmanager
+    def _file_lock(self, key: str):
+        if fcntl is None:
+            yield
+            return
+        bucket = int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % _LOCK_BUCKETS
+        acquired = self._acquire_bucket(bucket, key)
+        try:
+            yield
+        finally:
+            if acquired:
+                self._release_bucket(bucket)
+
+    def _acquire_bucket(self, bucket: int, key: str) -> bool:
+        """Hold the bucket's file lock (re-entrant within the process). Returns
+        False when it could not be taken; the caller then runs unlocked."""
+        deadline = time.monotonic() + SINGLE_FLIGHT_TIMEOUT
+        while True:
+            with self._lock:
+                held = self._held.get(bucket)
+                if held is not None:
+                    held[1] += 1
+                    return True
+                try:
+                    os.makedirs(self.lock_dir, exist_ok=True)
+                    handle = open(
+                        os.path.join(self.lock_dir, f"{bucket:02x}.lock"), "a+"
+                    )
+                except OSError as e:
+                    # Locking is an optimisation; never fail the request over it
+                    print(f"[SingleFlight] File lock unavailable for {key}: {e}")
+                    return False
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    self._held[bucket] = [handle, 1]
+                    return True
+                except BlockingIOError:
+                    handle.close()
+                except OSError as e:
+                    handle.close()
+                    print(f"[SingleFlight] File lock unavailable for {key}: {e}")
+                    return False
+            if time.monotonic() >= deadline:
+                print(f"[SingleFlight] Timed out locking {key}; computing")
+                return False
+            time.sleep(_LOCK_POLL_SECONDS)
+
+    def _release_bucket(self, bucket: int) -> None:
+        with self._lock:
+            held = self._held[bucket]
+            held[1] -= 1
+            if held[1]:
+                return
+            del self._held[bucket]
+            try:
+                fcntl.flock(held[0], fcntl.LOCK_UN)
+            finally:
+                held[0].close()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    from ibu_dashboard.event_bus import format_sse
+except ImportError:  # run as a script from inside ibu_dashboard/
+    from event_bus import format_sse
+
+# Standalone asyncio Server-Sent Events server. The Flask workers forward
+# every bus event as a small JSON datagram to SSE_EVENTS_UDP (localhost) and
+# this process fans them out to all open EventSource connections, so idle
+# browser tabs cost one socket and a few KB here instead of a uwsgi thread.
+#
+#   python -m ibu_dashboard.sse_server
+#
+# Routes: /events (named new_snapshot/probation_recomputed events) and
+# /progress_stream (unnamed progress messages), same as the Flask routes.
+load_dotenv()
+
+SSE_SERVER_HOST = os.getenv("SSE_SERVER_HOST", "0.0.0.0")
+SSE_SERVER_PORT = int(os.getenv("SSE_SERVER_PORT", "5001"))
+SSE_EVENTS_UDP = os.getenv("SSE_EVENTS_UDP", "127.0.0.1:5002")
+# Comma-separated origins allowed to open the streams cross-origin ("*" = any).
+# Empty: only pages served from the same host (on any port, e.g. the app on
+# :5000) may connect.
+SSE_ALLOW_ORIGIN = os.getenv("SSE_ALLOW_ORIGIN", "")
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "64"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# Identical events forwarded by several workers within this window are sent once
+DUPLICATE_WINDOW_SECONDS = 10.0
+DEDUPLICATED_EVENTS = {"new_snapshot", "probation_recomputed"}
+
+ROUTES = {
+    "/events": ({"new_snapshot", "probation_recomputed"}, True),
+    "/progress_stream": ({"progress"}, False),
+}
+
+
+def parse_addr(value: str) -> Tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _hostname(value: str) -> str:
+    """Host part of a "host[:port]" value (IPv6 brackets kept)."""
+    if value.startswith("["):
+        return value.split("]", 1)[0] + "]"
+    return value.split(":", 1)[0]
+
+
+def allowed_origin(origin: str, host: str) -> Optional[str]:
+    """Access-Control-Allow-Origin value for a request, or None to omit it."""
+    if not origin:
+        return None
+    allowed = [o.strip() for o in SSE_ALLOW_ORIGIN.split(",") if o.strip()]
+    if allowed:
+        if "*" in allowed:
+            return "*"
+        return origin if origin in allowed else None
+    origin_host = _hostname(origin.split("://", 1)[-1]).lower()
+    return origin if host and origin_host == _hostname(host).lower() else None
+
+
+def _header(head: bytes, name: str) -> str:
+    prefix = name.lower().encode("latin-1") + b":"
+    for line in head.split(b"\r\n")[1:]:
+        if line.lower().startswith(prefix):
+            return line[len(prefix) :].strip().decode("latin-1")
+    return ""
+
+
+class Client:
+    """One EventSource connection with a bounded queue (oldest dropped when full)."""
+
+    __slots__ = ("events", "named", "queue")
+
+    def __init__(self, events: Set[str], named: bool):
+        self.events = events
+        self.named = named
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=EVENT_BUFFER_SIZE)
+
+    def offer(self, message: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class SSEServer:
+    def __init__(self):
+        self.clients: Set[Client] = set()
+        self.last: Dict[str, str] = {}
+        self._recent: Dict[Tuple[str, str], float] = {}
+        self._next_id = 1
+
+    # --- Event intake (UDP datagrams from the app workers) --------------------
+    def publish(self, event: str, data: str) -> None:
+        if event in DEDUPLICATED_EVENTS:
+            now = time.monotonic()
+            key = (event, data)
+            if now - self._recent.get(key, float("-inf")) < DUPLICATE_WINDOW_SECONDS:
+                return
+            self._recent = {
+                k: t
+                for k, t in self._recent.items()
+                if now - t < DUPLICATE_WINDOW_SECONDS
+            }
+            self._recent[key] = now
+        self.last[event] = data
+        event_id = self._next_id
+        self._next_id += 1
+        for client in self.clients:
+            if event in client.events:
+                name = event if client.named else None
+                client.offer(format_sse(data, name, event_id))
+
+    def datagram_received(self, payload: bytes) -> None:
+        try:
+            message = json.loads(payload.decode("utf-8"))
+            self.publish(str(message["event"]), str(message["data"]))
+        except Exception as e:
+            print(f"[SSE] Ignoring malformed event datagram: {e}")
+
+    # --- HTTP side -------------------------------------------------------------
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=10)
+            request_line = head.split(b"\r\n", 1)[0].decode("latin-1")
+            method, target, _ = (request_line.split(" ") + ["", ""])[:3]
+            route = ROUTES.get(target.split("?", 1)[0])
+            if method != "GET" or route is None:
+                writer.write(
+                    b"HTTP/1.1 404 Not Found\r\n"
+                    b"Content-Length: 0\r\nConnection: close\r\n\r\n"
+                )
+                await writer.drain()
+                return
+            origin = allowed_origin(_header(head, "Origin"), _header(head, "Host"))
+            await self.stream(writer, *route, origin)
+        except (
+            asyncio.IncompleteReadError,
+            asyncio.LimitOverrunError,
+            asyncio.TimeoutError,
+            ConnectionError,
+            OSError,
+        ):
+            # Client went away (or never sent a full request)
+            pass
+        finally:
+            writer.close()
+
+    async def stream(
+        self,
+        writer: asyncio.StreamWriter,
+        events: Set[str],
+        named: bool,
+        origin: Optional[str] = None,
+    ) -> None:
+        cors = f"Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n"
+        writer.write(
+            (
+                "HTTP/1.1 200 OK\r\n"
+                "Content-Type: text/event-stream\r\n"
+                "Cache-Control: no-cache\r\n"
+                "X-Accel-Buffering: no\r\n"
+                f"{cors if origin else ''}"
+                "Connection: keep-alive\r\n\r\n"
+                f"retry: {int(EVENT_HEARTBEAT_SECONDS * 1000)}\n\n"
+            ).encode("utf-8")
+        )
+        client = Client(events, named)
+        # Latest snapshot info first, like the Flask /events route
+        if "new_snapshot" in events and "new_snapshot" in self.last:
+            client.offer(format_sse(self.last["new_snapshot"], "new_snapshot"))
+        self.clients.add(client)
+        try:
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        client.queue.get(), timeout=EVENT_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    message = ": heartbeat\n\n"
+                writer.write(message.encode("utf-8"))
+                await writer.drain()
+        finally:
+            self.clients.discard(client)
+
+
+class _EventDatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, server: SSEServer):
+        self.server = server
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        self.server.datagram_received(data)
+
+
+async def serve(
+    host: str = SSE_SERVER_HOST,
+    port: int = SSE_SERVER_PORT,
+    udp_addr: Optional[str] = SSE_EVENTS_UDP,
+) -> None:
+    server = SSEServer()
+    loop = asyncio.get_running_loop()
+    await loop.create_datagram_endpoint(
+        lambda: _EventDatagramProtocol(server), local_addr=parse_addr(udp_addr)
+    )
+    http_server = await asyncio.start_server(server.handle, host, port)
+    print(f"[SSE] Serving events on http://{host}:{port} (intake udp://{udp_addr})")
+    async with http_server:
+        await http_server.serve_forever()
+
+
+def main() -> None:
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Pairwise gap / overtake analytics over the team rankings history. All
+# teams of the latest snapshot are compared at once as matrices:
+#
+#   gap[i, j]      points team i is behind team j (j's total - i's total)
+#   closing[i, j]  how much faster i gains than j (points/day)
+#   eta[i, j]      days until i overtakes j, where i is behind and closing
+#
+# Velocities are average points/day over a trailing window, measured from
+# each team's last snapshot at or before the window start (its first
+# snapshot when it appeared inside the window).
+GAP_WINDOWS = (7, 30)
+# Overtakes further out than this are reported as not happening
+OVERTAKE_HORIZON_DAYS = 730
+
+
+def team_velocities(
+    days: np.ndarray, points: np.ndarray, present: np.ndarray, window: int
+) -> np.ndarray:
+    """Points/day of each team (row) over the last `window` days."""
+    n_days = points.shape[1]
+    last = n_days - 1
+    cols = np.arange(n_days)
+    last_present = np.maximum.accumulate(np.where(present, cols, -1), axis=1)
+    first_present = np.argmax(present, axis=1)
+    start = int(np.searchsorted(days, days[last] - window, side="right")) - 1
+    base = last_present[:, start] if start >= 0 else np.full(len(points), -1)
+    base = np.where(base >= 0, base, first_present)
+    rows = np.arange(len(points))
+    span = days[last] - days[base]
+    gained = points[:, last] - points[rows, base]
+    return np.where(span > 0, gained / np.maximum(span, 1), 0.0)
+
+
+def overtake_days(totals: np.ndarray, velocity: np.ndarray):
+    """gap, closing and eta matrices (eta is NaN where i never catches j
+    within OVERTAKE_HORIZON_DAYS)."""
+    gap = totals[None, :] - totals[:, None]
+    closing = velocity[:, None] - velocity[None, :]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        eta = np.ceil(gap / closing)
+    eta[~((gap > 0) & (closing > 0))] = np.nan
+    eta[eta > OVERTAKE_HORIZON_DAYS] = np.nan
+    return gap, closing, eta
+
+
+def team_gap_analytics(
+    dates: List[str],
+    names: List[str],
+    totals: List[List[Optional[int]]],
+    ranks: List[Optional[int]],
+    window: int,
+) -> Dict[str, object]:
+    """Summary of every team plus per-team pairwise detail.
+
+    `totals` holds each team's total_points per date (None where missing);
+    teams must be present on the last date. Returns {"summary": [...],
+    "teams": {name: detail}}.
+    """
+    if not dates or not names:
+        return {"as_of": dates[-1] if dates else None, "summary": [], "teams": {}}
+    days = np.array([date.fromisoformat(d).toordinal() for d in dates])
+    points = np.array(
+        [[np.nan if v is None else v for v in row] for row in totals],
+        dtype=np.float64,
+    )
+    present = ~np.isnan(points)
+    points = np.where(present, points, 0.0)
+    velocity = team_velocities(days, points, present, window)
+    current = points[:, -1]
+    gap, closing, eta = overtake_days(current, velocity)
+    as_of = date.fromisoformat(dates[-1])
+
+    def eta_date(value: float) -> Optional[str]:
+        if np.isnan(value):
+            return None
+        return (as_of + timedelta(days=int(value))).isoformat()
+
+    def nearest(values: np.ndarray) -> Optional[int]:
+        if np.all(np.isnan(values)):
+            return None
+        return int(np.nanargmin(values))
+
+    summary = []
+    teams = {}
+    for i, name in enumerate(names):
+        target = nearest(eta[i])
+        threat = nearest(eta[:, i])
+        summary.append(
+            {
+                "team": name,
+                "rank": ranks[i],
+                "total_points": int(current[i]),
+                "velocity": round(float(velocity[i]), 2),
+                "next_overtake": None
+                if target is None
+                else {"team": names[target], "date": eta_date(eta[i, target])},
+                "next_threat": None
+                if threat is None
+                else {"team": names[threat], "date": eta_date(eta[threat, i])},
+            }
+        )
+        pairs = [
+            {
+                "team": other,
+                "rank": ranks[j],
+                "gap": int(gap[i, j]),
+                "closing_velocity": round(float(closing[i, j]), 2),
+                "overtake_date": eta_date(eta[i, j]),
+                "overtaken_date": eta_date(eta[j, i]),
+            }
+            for j, other in enumerate(names)
+            if j != i
+        ]
+        teams[name] = {
+            **summary[-1],
+            "overtakes": sorted(
+                (p for p in pairs if p["overtake_date"]),
+                key=lambda p: p["overtake_date"],
+            ),
+            "closing_in": sorted(
+                (p for p in pairs if p["overtaken_date"]),
+                key=lambda p: p["overtaken_date"],
+            ),
+            "pairs": pairs,
+        }
+    return {"as_of": dates[-1], "window": window, "summary": summary, "teams": teams}
@@ -0,0 +1,388 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+# Persistent index over the daily team rankings CSVs (Scraped_Teams_Points).
+# Each file is parsed once: team names, their normalized and sanitized match
+# keys and the metric columns are kept per day and saved to disk, so later
+# processes only re-read files whose size/mtime changed.
+#
+# Requested team names are resolved against every day once and memoized;
+# a team series is then one list lookup per date. Matching per day keeps the
+# trends API's cascade: exact normalized name, exact sanitized name, unique
+# normalized/sanitized prefix (first 12 chars), then a sanitized-token
+# substring match (lowest rank wins when several teams contain it).
+TEAM_INDEX_FILE = os.getenv(
+    "TEAM_INDEX_FILE", os.path.join("cache", "team_index.json")
+)
+TEAM_INDEX_VERSION = 1
+
+TEAM_METRICS = ("total_points", "members", "90_days", "180_days")
+PREFIX_CHARS = 12
+# Bound on memoized name resolutions (names come from request parameters)
+MAX_RESOLVED_NAMES = 4096
+
+_DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_AMBIGUOUS = -1
+_NO_RANK = 999999
+
+
+def sanitize_team_name(name) -> str:
+    """Return a simplified version of a team name for fuzzy-ish matching.
+    - Lowercase
+    - Strip spaces
+    - Remove punctuation & emoji / non-word chars
+    - Collapse multiple spaces
+    """
+    try:
+        if name is None:
+            return ""
+        n = unicodedata.normalize("NFKC", str(name)).lower()
+        return " ".join(_NON_ALNUM_RE.sub(" ", n).split())
+    except Exception:
+        return str(name).strip().lower()
+
+
+def normalize_team_name(name) -> str:
+    return str(name).strip().lower()
+
+
+def _int_or_zero(value) -> int:
+    try:
+        return int(value) if pd.notna(value) else 0
+    except Exception:
+        return 0
+
+
+def _prefix_table(keys: List[str]) -> Dict[str, int]:
+    """prefix (up to PREFIX_CHARS chars, including "") -> row of the only key
+    starting with it, or _AMBIGUOUS when several do."""
+    table: Dict[str, int] = {}
+    for row, key in enumerate(keys):
+        for length in range(min(len(key), PREFIX_CHARS) + 1):
+            prefix = key[:length]
+            table[prefix] = _AMBIGUOUS if prefix in table else row
+    return table
+
+
+def _first_rows(keys: List[str]) -> Dict[str, int]:
+    table: Dict[str, int] = {}
+    for row, key in enumerate(keys):
+        table.setdefault(key, row)
+    return table
+
+
+class _TeamDay:
+    """Parsed rankings file for one date plus its lookup tables."""
+
+    __slots__ = (
+        "date",
+        "filename",
+        "size",
+        "mtime",
+        "names",
+        "sanitized",
+        "ranks",
+        "metrics",
+        "_tables",
+    )
+
+    def __init__(self, date: str, filename: str, size: int, mtime: float):
+        self.date = date
+        self.filename = filename
+        self.size = size
+        self.mtime = mtime
+        self.names: List[str] = []
+        self.sanitized: List[str] = []
+        # Rank as read (None when missing/not numeric); see rank()
+        self.ranks: List[Optional[int]] = []
+        self.metrics: Dict[str, List[int]] = {m: [] for m in TEAM_METRICS}
+        self._tables = None
+
+    def rank(self, row: int) -> int:
+        value = self.ranks[row]
+        return value if value is not None else 0
+
+    def _lookup_tables(self):
+        if self._tables is None:
+            normalized = [normalize_team_name(n) for n in self.names]
+            self._tables = (
+                _first_rows(normalized),
+                _first_rows(self.sanitized),
+                _prefix_table(normalized),
+                _prefix_table(self.sanitized),
+            )
+        return self._tables
+
+    def resolve(self, name: str, exact: bool = False) -> int:
+        """Row matching a requested team name, or -1. With `exact` only the
+        normalized/sanitized name itself matches (no prefix or token
+        fallbacks that could pick another team)."""
+        norm_first, san_first, norm_prefix, san_prefix = self._lookup_tables()
+        target_norm = normalize_team_name(name)
+        target_san = sanitize_team_name(name)
+        tables = [(norm_first, target_norm), (san_first, target_san)]
+        if not exact:
+            tables += [
+                (norm_prefix, target_norm[:PREFIX_CHARS]),
+                (san_prefix, target_san[:PREFIX_CHARS]),
+            ]
+        for table, key in tables:
+            row = table.get(key, _AMBIGUOUS)
+            if row != _AMBIGUOUS:
+                return row
+        if exact or not target_san:
+            return -1
+        token = target_san.split(" ")[0]
+        best, best_rank = -1, None
+        for row, key in enumerate(self.sanitized):
+            if token in key:
+                rank = self.ranks[row] if self.ranks[row] is not None else _NO_RANK
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = row, rank
+        return best
+
+    def to_json(self) -> dict:
+        return {
+            "date": self.date,
+            "filename": self.filename,
+            "size": self.size,
+            "mtime": self.mtime,
+            "names": self.names,
+            "sanitized": self.sanitized,
+            "ranks": self.ranks,
+            "metrics": self.metrics,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_TeamDay":
+        day = cls(data["date"], data["filename"], data["size"], data["mtime"])
+        day.names = data["names"]
+        day.sanitized = data["sanitized"]
+        day.ranks = data["ranks"]
+        day.metrics = {m: data["metrics"][m] for m in TEAM_METRICS}
+        return day
+
+
+def _parse_day(path: str, date: str, stat) -> _TeamDay:
+    day = _TeamDay(date, os.path.basename(path), stat.st_size, stat.st_mtime)
+    df = pd.read_csv(path)
+    if "Name" not in df.columns:
+        return day
+    day.names = df["Name"].astype(str).tolist()
+    day.sanitized = [sanitize_team_name(n) for n in df["Name"].tolist()]
+    if "Rank" in df.columns:
+        ranks = pd.to_numeric(df["Rank"], errors="coerce")
+        day.ranks = [int(r) if pd.notna(r) else None for r in ranks]
+    else:
+        day.ranks = [None] * len(df)
+    for metric in TEAM_METRICS:
+        if metric in df.columns:
+            day.metrics[metric] = [_int_or_zero(v) for v in df[metric].tolist()]
+        else:
+            day.metrics[metric] = [0] * len(df)
+    return day
+
+
+class TeamIndex:
+    """Team rankings history with precomputed match keys.
+
+    The CSV files stay the source of truth; `sync()` (re)parses new or
+    changed files and drops removed ones.
+    """
+
+    def __init__(self, path: str = TEAM_INDEX_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._days: List[_TeamDay] = []
+        # date -> last rankings file of that date
+        self._by_date: Dict[str, _TeamDay] = {}
+        self._resolved: Dict[Tuple[str, bool], List[int]] = {}
+        self._loaded = False
+
+    # --- Public API --------------------------------------------------------
+    @property
+    def generation(self) -> str:
+        """Identifier of the indexed files (changes whenever one does)."""
+        with self._lock:
+            self._ensure_loaded()
+            digest = hashlib.sha256()
+            for day in self._days:
+                digest.update(f"{day.filename}:{day.size}:{day.mtime};".encode())
+            return digest.hexdigest()[:16]
+
+    def dates(self) -> List[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return [day.date for day in self._days]
+
+    def latest(self) -> Optional[_TeamDay]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._days[-1] if self._days else None
+
+    def _last_day(self, date: str) -> Optional[_TeamDay]:
+        return self._by_date.get(date)
+
+    def _set_days(self, days: List[_TeamDay]) -> None:
+        self._days = days
+        # Days are sorted by (date, filename): the last one of a date wins
+        self._by_date = {day.date: day for day in days}
+
+    def checksum(self, date: str) -> Optional[str]:
+        """Identifier of the (last) rankings file of `date` (name, size, mtime)."""
+        with self._lock:
+            self._ensure_loaded()
+            day = self._last_day(date)
+            return f"{day.filename}:{day.size}:{day.mtime}" if day else None
+
+    def ranks_on(self, date: str) -> Dict[str, int]:
+        """{team name: rank} in the (last) rankings file of `date`."""
+        with self._lock:
+            self._ensure_loaded()
+            day = self._last_day(date)
+            ranks: Dict[str, int] = {}
+            if day is not None:
+                for name, rank in zip(day.names, day.ranks):
+                    if rank is not None:
+                        ranks.setdefault(name, rank)
+            return ranks
+
+    def resolve(self, name: str, exact: bool = False) -> List[int]:
+        """Matching row of `name` in every day (-1 where it is not found)."""
+        with self._lock:
+            self._ensure_loaded()
+            key = (name, exact)
+            rows = self._resolved.get(key)
+            if rows is None:
+                if len(self._resolved) >= MAX_RESOLVED_NAMES:
+                    self._resolved.clear()
+                rows = self._resolved[key] = [
+                    day.resolve(name, exact) for day in self._days
+                ]
+            return rows
+
+    def history(
+        self,
+        names: List[str],
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        exact: bool = False,
+    ) -> Dict[str, object]:
+        """Every metric and the rank of each team on the days within
+        [start, end], as columns aligned on one date axis (None where a team
+        was not found that day; see _TeamDay.resolve for `exact`)."""
+        with self._lock:
+            self._ensure_loaded()
+            picked = [
+                i
+                for i, day in enumerate(self._days)
+                if not ((start and day.date < start) or (end and day.date > end))
+            ]
+            days = [self._days[i] for i in picked]
+            teams = {}
+            for name in dict.fromkeys(names):
+                all_rows = self.resolve(name, exact)
+                rows = [all_rows[i] for i in picked]
+                columns = {
+                    metric: [
+                        day.metrics[metric][row] if row >= 0 else None
+                        for day, row in zip(days, rows)
+                    ]
+                    for metric in TEAM_METRICS
+                }
+                columns["rank"] = [
+                    day.rank(row) if row >= 0 else None for day, row in zip(days, rows)
+                ]
+                columns["matched"] = [
+                    day.names[row] if row >= 0 else None for day, row in zip(days, rows)
+                ]
+                teams[name] = columns
+            return {"dates": [day.date for day in days], "teams": teams}
+
+    def sync(self, csv_paths: List[str]) -> bool:
+        """Parse new/changed files and drop removed ones. Returns True when
+        the index changed."""
+        with self._lock:
+            self._ensure_loaded()
+            known = {day.filename: day for day in self._days}
+            days = []
+            changed = False
+            for path in csv_paths:
+                filename = os.path.basename(path)
+                match = _DATE_RE.search(filename)
+                if not match:
+                    continue
+                try:
+                    stat = os.stat(path)
+                    day = known.get(filename)
+                    if (
+                        day is None
+                        or day.size != stat.st_size
+                        or day.mtime != stat.st_mtime
+                    ):
+                        day = _parse_day(path, match.group(1), stat)
+                        changed = True
+                    days.append(day)
+                except Exception as e:
+                    print(f"Failed reading team rankings {path}: {e}")
+            if set(known) - {day.filename for day in days}:
+                changed = True
+            if changed:
+                days.sort(key=lambda d: (d.date, d.filename))
+                self._set_days(days)
+                self._resolved.clear()
+                self.save()
+            return changed
+
+    def save(self) -> bool:
+        """Persist the index atomically. Returns True on success."""
+        with self._lock:
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                index_dir = os.path.dirname(self.path)
+                if index_dir:
+                    os.makedirs(index_dir, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "version": TEAM_INDEX_VERSION,
+                            "days": [day.to_json() for day in self._days],
+                        },
+                        f,
+                        ensure_ascii=False,
+                    )
+                os.replace(tmp_path, self.path)
+                return True
+            except Exception as e:
+                print(f"Error saving team index to {self.path}: {e}")
+                try:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                except Exception:
+                    pass
+                return False
+
+    # --- Loading -----------------------------------------------------------
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != TEAM_INDEX_VERSION:
+                return
+            self._set_days([_TeamDay.from_json(d) for d in data["days"]])
+        except Exception as e:
+            print(f"Error loading team index from {self.path}: {e}")
+            self._set_days([])
@@ -0,0 +1,82 @@
+import base64
+import math
+import re
+from datetime import date
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Compact encoding for chart traces (/api/trends/data?arrays=typed). Numeric
+# arrays become {"dtype", "bdata"} objects holding base64 little-endian typed
+# arrays, the same shape Plotly uses for binary arrays. Date arrays
+# ("YYYY-MM-DD") become integer day offsets from a per-array "epoch" date, so
+# a date costs 2-4 bytes instead of a 12-byte string. Anything else (text,
+# customdata rows, mixed lists) is left as plain JSON.
+TYPED_ARRAY_KEYS = ("x", "y", "open", "high", "low", "close")
+
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_INT_DTYPES = (("u1", 0, 0xFF), ("u2", 0, 0xFFFF), ("i4", -(2**31), 2**31 - 1))
+
+
+def _pack(values: np.ndarray, dtype: str) -> Dict[str, str]:
+    data = values.astype(np.dtype(dtype).newbyteorder("<"), copy=False).tobytes()
+    return {"dtype": dtype, "bdata": base64.b64encode(data).decode("ascii")}
+
+
+def _int_dtype(lo: int, hi: int) -> Optional[str]:
+    for dtype, min_value, max_value in _INT_DTYPES:
+        if lo >= min_value and hi <= max_value:
+            return dtype
+    return None
+
+
+def encode_dates(values: List[str]) -> Optional[Dict[str, str]]:
+    """Day offsets from the earliest date, or None if not all ISO dates."""
+    if not all(isinstance(v, str) and _DATE_RE.match(v) for v in values):
+        return None
+    try:
+        ordinals = np.array([date.fromisoformat(v).toordinal() for v in values])
+    except ValueError:
+        return None
+    first = int(ordinals.min())
+    offsets = ordinals - first
+    spec = _pack(offsets, _int_dtype(0, int(offsets.max())) or "i4")
+    spec["epoch"] = date.fromordinal(first).isoformat()
+    return spec
+
+
+def encode_numbers(values: list) -> Optional[Dict[str, str]]:
+    """Smallest fitting integer array, float64 (None -> NaN), or None if the
+    list holds anything but numbers."""
+    floats = []
+    for v in values:
+        if v is None:
+            floats.append(math.nan)
+        elif isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(
+            v, bool
+        ):
+            floats.append(float(v))
+        else:
+            return None
+    arr = np.array(floats, dtype=np.float64)
+    finite = np.isfinite(arr)
+    if finite.all() and np.array_equal(arr, np.round(arr)):
+        dtype = _int_dtype(int(arr.min()), int(arr.max()))
+        if dtype:
+            return _pack(arr.astype(np.int64), dtype)
+    return _pack(arr, "f8")
+
+
+def encode_trace(trace: dict) -> dict:
+    """Copy of `trace` with its data arrays typed-encoded where possible."""
+    encoded = dict(trace)
+    for key in TYPED_ARRAY_KEYS:
+        values = trace.get(key)
+        if not isinstance(values, list) or not values:
+            continue
+        spec = encode_dates(values) if key == "x" else None
+        if spec is None:
+            spec = encode_numbers(values)
+        if spec is not None:
+            encoded[key] = spec
+    return encoded
@@ -8,12 +8,12 @@ from flask import (
     redirect,
     url_for,
     send_file,
+    stream_with_context,
 )
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 import os
-import hashlib
-import queue
 import json
 import sys
 import signal
@@ -25,11 +25,48 @@ import io
 import threading
 import logging
 import time
+import bisect
+from urllib.parse import urlencode
 from dotenv import load_dotenv
 
 # Rust imports
 from rustlibs import get_csv_files_from_folder
 
+from ibu_dashboard.history_store import HistoryStore, dates_in_range
+from ibu_dashboard.interval_production import (
+    distribute_gap_production,
+    period_over_period,
+)
+from ibu_dashboard.member_activity import MemberActivityIndex
+from ibu_dashboard.member_colors import MemberColorTable
+from ibu_dashboard.compression import init_compression
+from ibu_dashboard.downsample import TraceDownsampler
+from ibu_dashboard.forecast import BAND_Z, forecast_cache
+from ibu_dashboard.event_bus import FolderWatcher, UdpEventForwarder, event_bus
+from ibu_dashboard.json_provider import FastJSONProvider
+from ibu_dashboard.member_registry import MemberRegistry
+from ibu_dashboard.milestone_projection import (
+    MILESTONE_DUE_DAYS,
+    MILESTONE_TARGETS,
+    PERIOD_DAYS,
+    PERIOD_TARGET,
+    project_milestones,
+)
+from ibu_dashboard.pie_payload import PieChartPayload
+from ibu_dashboard.precompute import (
+    PRECOMPUTE_ENABLED,
+    ResponsePrecomputer,
+    request_key,
+)
+from ibu_dashboard.rank_movement import MOVEMENT_PERIODS, RankMovementView
+from ibu_dashboard.rolling_windows import GAP_POLICIES, ROLLING_WINDOWS, RollingWindows
+from ibu_dashboard.shared_cache import create_shared_cache
+from ibu_dashboard.single_flight import single_flight
+from ibu_dashboard.team_gaps import GAP_WINDOWS, team_gap_analytics
+from ibu_dashboard.team_index import TEAM_METRICS, TeamIndex
+from ibu_dashboard.typed_arrays import encode_trace
+from ibu_dashboard.points_matrix import PointsMatrixCache
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -48,7 +85,6 @@ DATA_FOLDER = os.getenv("DATA_FOLDER", "Scraped_Team_Info")
 # Additional folder for scraped team rankings (top 150 teams with multiple metrics)
 TEAMS_POINTS_FOLDER = os.getenv("SCRAPED_TEAMS_POINTS_FOLDER", "Scraped_Teams_Points")
 
-progress_queue = queue.Queue()
 layout_height = 700
 layout_width = 1000  # aspect_ratio variable removed (unused)
 
@@ -58,7 +94,31 @@ OVERRIDES_FILE = os.getenv(
     "PROBATION_OVERRIDES_FILE", os.path.join("config", "probation_overrides.json")
 )
 
-MEMBER_INFO_CACHE_FILE = "./cache/member_info.json"
+# Computed payloads shared by all workers (SQLite file by default)
+shared_cache = create_shared_cache()
+
+# Compact delta-encoded copy of every daily member CSV (see history_store.py)
+history_store = HistoryStore()
+# Stable member IDs (with rename/alias tracking) used as matrix rows
+member_registry = MemberRegistry()
+# Precomputed chart colors keyed by member ID
+member_color_table = MemberColorTable()
+# Memory-mapped member x day points/rank matrix shared by all workers
+points_matrix_cache = PointsMatrixCache()
+# Parsed team rankings history with precomputed match keys
+team_index = TeamIndex()
+# Incrementally maintained rank-movement and member activity tables
+rank_movements = RankMovementView()
+member_activity = MemberActivityIndex()
+# Gap policy for the rolling-window grid: strict|carry_forward|interpolate
+ROLLING_GAP_POLICY = os.getenv("ROLLING_GAP_POLICY", "interpolate")
+if ROLLING_GAP_POLICY not in GAP_POLICIES:
+    print(f"Unknown ROLLING_GAP_POLICY '{ROLLING_GAP_POLICY}', using interpolate")
+    ROLLING_GAP_POLICY = "interpolate"
+# Snapshot gaps longer than this stay unknown under every policy
+ROLLING_MAX_GAP_DAYS = int(os.getenv("ROLLING_MAX_GAP_DAYS", "14"))
+_rolling_windows = {}
+_rolling_windows_lock = threading.Lock()
 
 
 def load_probation_overrides() -> dict:
@@ -100,36 +160,15 @@ def save_probation_overrides(data: dict) -> bool:
         return False
 
 
-def name_to_color(name):
-    # Hash the name to get a consistent value
-    hash_object = hashlib.md5(name.encode())
-    hex_color = "#" + hash_object.hexdigest()[:6]
-    return hex_color
-
-
-def _hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip("#")
-    if len(hex_color) == 3:
-        hex_color = "".join(c * 2 for c in hex_color)
-    try:
-        r = int(hex_color[0:2], 16)
-        g = int(hex_color[2:4], 16)
-        b = int(hex_color[4:6], 16)
-        return r, g, b
-    except Exception:
-        return 128, 128, 128
+def series_colors(names):
+    """Colors for a list of series names from the persisted member color table."""
+    return member_color_table.colors(names, member_registry.resolver())
 
 
-def blend_with(color_hex, base_rgb, alpha=0.5):
-    """Blend a member color (hex) with a base RGB tuple (e.g. green or red) by alpha.
-    alpha: portion of base color; (1-alpha) of member color.
-    Returns hex string."""
-    mr, mg, mb = _hex_to_rgb(color_hex)
-    br, bg, bb = base_rgb
-    r = int(mr * (1 - alpha) + br * alpha)
-    g = int(mg * (1 - alpha) + bg * alpha)
-    b = int(mb * (1 - alpha) + bb * alpha)
-    return f"#{r:02x}{g:02x}{b:02x}"
+def series_palette(name, resolve=None):
+    """{color, increasing, decreasing} palette entry for one series name
+    (pass a member_registry.resolver() when looking up several)."""
+    return member_color_table.entry(name, resolve or member_registry.resolve)
 
 
 # --- Normalization Helpers -------------------------------------------------
@@ -176,30 +215,134 @@ def get_team_points_files_from_folder():
         return []
 
 
-# --- Team name normalization / sanitization helpers (for robust matching) ----
-def _sanitize_team_name(name: str) -> str:
-    """Return a simplified version of a team name for fuzzy-ish matching.
-    - Lowercase
-    - Strip spaces
-    - Remove punctuation & emoji / non-word chars
-    - Collapse multiple spaces
-    This keeps alphanumerics + basic periods removed to avoid subtle differences.
-    """
+def sync_history_store():
+    """Ingest any new/changed daily CSVs into the compact history store."""
     try:
-        if name is None:
-            return ""
-        # Normalize unicode form
-        import unicodedata
-        import re as _re
-
-        n = unicodedata.normalize("NFKC", str(name)).lower()
-        # Replace non-alphanumeric with space
-        n = _re.sub(r"[^a-z0-9]+", " ", n)
-        # Collapse spaces
-        n = " ".join(n.split())
-        return n
-    except Exception:
-        return str(name).strip().lower()
+        history_store.sync(get_csv_files_from_folder())
+    except Exception as e:
+        print(f"Error syncing history store: {e}")
+    return history_store
+
+
+def sync_team_index():
+    """Index any new/changed team rankings CSVs (see team_index.py)."""
+    try:
+        team_index.sync(get_team_points_files_from_folder())
+    except Exception as e:
+        print(f"Error syncing team index: {e}")
+    return team_index
+
+
+def sync_rank_movements():
+    """Apply any new member/team snapshots to the rank-movement view."""
+    try:
+        matrix = get_points_matrix()
+        if matrix is not None:
+            columns = {d: i for i, d in enumerate(matrix.dates)}
+
+            def member_ranks(date_str):
+                col = columns[date_str]
+                rows = np.flatnonzero(matrix.present[:, col]).tolist()
+                return {str(r): int(matrix.ranks[r, col]) for r in rows}
+
+            rank_movements.sync(
+                "members",
+                list(matrix.dates),
+                member_ranks,
+                {str(i): name for i, name in enumerate(matrix.members)},
+                history_store.checksum,
+            )
+        index = sync_team_index()
+        rank_movements.sync(
+            "teams", index.dates(), index.ranks_on, checksum=index.checksum
+        )
+    except Exception as e:
+        print(f"Error syncing rank movements: {e}")
+    return rank_movements
+
+
+def sync_member_activity():
+    """Apply any new member snapshots to the activity index."""
+    try:
+        matrix = get_points_matrix()
+        if matrix is not None:
+            columns = {d: i for i, d in enumerate(matrix.dates)}
+
+            def member_points(date_str):
+                col = columns[date_str]
+                rows = np.flatnonzero(matrix.present[:, col]).tolist()
+                return {str(r): int(matrix.points[r, col]) for r in rows}
+
+            member_activity.sync(
+                list(matrix.dates),
+                member_points,
+                {str(i): name for i, name in enumerate(matrix.members)},
+                history_store.checksum,
+            )
+    except Exception as e:
+        print(f"Error syncing member activity: {e}")
+    return member_activity
+
+
+def sync_snapshot_views():
+    """Apply newly ingested snapshots to the rank-movement view and the
+    member activity index (their endpoints only read them)."""
+    sync_rank_movements()
+    sync_member_activity()
+
+
+def get_rolling_windows(policy=None):
+    """Rolling-window grid for the current points matrix (built once per
+    matrix generation and gap policy)."""
+    matrix = get_points_matrix()
+    if matrix is None:
+        return None
+    key = (matrix.generation, policy or ROLLING_GAP_POLICY)
+    with _rolling_windows_lock:
+        engine = _rolling_windows.get(key)
+        if engine is None:
+            for stale in [k for k in _rolling_windows if k[0] != key[0]]:
+                del _rolling_windows[stale]
+            engine = _rolling_windows[key] = RollingWindows(
+                matrix, key[1], ROLLING_MAX_GAP_DAYS
+            )
+        return engine
+
+
+def get_points_matrix():
+    """Return the shared points/rank matrix, rebuilding it when new snapshots land."""
+    return points_matrix_cache.get(sync_history_store(), member_registry)
+
+
+def get_snapshot_archive_entries(start_date=None, end_date=None):
+    """Return [(filename, path_or_None, date_str)] for every downloadable snapshot.
+    Dates whose CSV is no longer on disk are served from the history store (path None).
+    """
+    entries = {}
+    covered_dates = set()
+    for csv_file in glob.glob(os.path.join(DATA_FOLDER, "*.csv")):
+        filename = os.path.basename(csv_file)
+        date_match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
+        date_str = date_match.group(1) if date_match else None
+        if date_str:
+            covered_dates.add(date_str)
+        if start_date and end_date:
+            # Date-filtered downloads only include files with a date in range
+            if not date_str or not dates_in_range([date_str], start_date, end_date):
+                continue
+        entries[filename] = (filename, csv_file, date_str)
+    store = sync_history_store()
+    for date_str in dates_in_range(store.dates(), start_date, end_date):
+        if date_str not in covered_dates:
+            filename = store.filename_for(date_str)
+            entries[filename] = (filename, None, date_str)
+    return sorted(entries.values(), key=lambda e: e[0])
+
+
+def archive_entries_in_range(entries, start_date, end_date):
+    """Filter get_snapshot_archive_entries() output to the [start, end] range
+    (same result as passing the range to it, without another sync)."""
+    return [e for e in entries if e[2] and dates_in_range([e[2]], start_date, end_date)]
 
 
 def get_latest_csv_file():
@@ -364,7 +507,7 @@ def get_chart_total():
 
         member = df["Member"]
         points = df["Points"]
-        color = df["Member"].apply(name_to_color)
+        color = series_colors(df["Member"])
         return data_for_return(member, points, color)
 
     except Exception as e:
@@ -474,7 +617,7 @@ def get_last_90_days_range():
                 "error": f"End date file not found for {latest_date_str}. Cannot calculate last 90 days without an exact file on the end date."
             }
         data = standardize_range_formats(file_start, file_end)
-        if isinstance(data, dict):
+        if isinstance(data, (dict, PieChartPayload)):
             data["date_range"] = {"start": start_date_str, "end": latest_date_str}
         return data
     except Exception as e:
@@ -506,7 +649,7 @@ def get_last_180_days_range():
                 "error": f"End date file not found for {latest_date_str}. Cannot calculate last 180 days without an exact file on the end date."
             }
         data = standardize_range_formats(file_start, file_end)
-        if isinstance(data, dict):
+        if isinstance(data, (dict, PieChartPayload)):
             data["date_range"] = {"start": start_date_str, "end": latest_date_str}
         return data
     except Exception as e:
@@ -562,7 +705,7 @@ def standardize_range_formats(file_start_raw, file_end_raw):
     merged = pd.merge(df_end, df_start, on="Member", suffixes=("_end", "_start"))
     merged["Delta"] = merged["Points_end"] - merged["Points_start"]
     # merged = merged[merged["Delta"] > 0] # Uncomment to filter out non-positive/0 points members
-    color = merged["Member"].apply(name_to_color)
+    color = series_colors(merged["Member"])
     member = merged["Member"]
     points = merged["Delta"]
 
@@ -571,116 +714,28 @@ def standardize_range_formats(file_start_raw, file_end_raw):
 
 
 def data_for_return(data_member, data_points, color_data):
-    return {
-        "data": [
-            {
-                "type": "pie",
-                "labels": data_member.tolist(),
-                "values": data_points.tolist(),
-                "hole": 0.6,
-                "text": get_custom_text(data_points, data_member),
-                "textinfo": "text",
-                "textposition": "inside",
-                "hoverinfo": "label+percent+value",
-                "hovertemplate": "<b>%{label}</b><br>"
-                + "Points: %{value:,}<br>"
-                + "Percentage: %{percent}<br>"
-                + "<extra></extra>",
-                "marker": {
-                    "colors": color_data.tolist(),
-                    "line": {"color": "rgba(255, 255, 255, 0.2)", "width": 1},
-                },
-                "automargin": False,
-                "domain": {"x": [0, 1], "y": [0, 1]},
-            }
-        ],
-        "layout": {
-            "width": layout_width,
-            "height": layout_height,
-            "margin": {"t": 50, "b": 50, "l": 0, "r": 0},
-            "showlegend": True,
-            "paper_bgcolor": "rgba(0,0,0,0)",
-            "plot_bgcolor": "rgba(0,0,0,0)",
-            "annotations": [
-                {
-                    "text": f"<b>Total Points</b><br><br><span style='font-size:24px; color:#e06150'>{sum(data_points):,}</span>",
-                    "x": 0.5,
-                    "y": 0.55,
-                    "xref": "paper",
-                    "yref": "paper",
-                    "showarrow": False,
-                    "font": {
-                        "size": 14,
-                        "color": "white",
-                        "family": "Inter, Arial, sans-serif",
-                    },
-                    "align": "center",
-                },
-                {
-                    "text": f"Active Members: {len([x for x in data_points if x > 0])}",
-                    "x": 0.5,
-                    "y": 0.4,
-                    "xref": "paper",
-                    "yref": "paper",
-                    "showarrow": False,
-                    "font": {
-                        "size": 12,
-                        "color": "rgba(255, 255, 255, 0.7)",
-                        "family": "Inter, Arial, sans-serif",
-                    },
-                    "align": "center",
-                },
-            ],
-            "font": {
-                "color": "white",
-                "family": "Inter, Arial, sans-serif",
-                "size": 14,
-            },
-            "legend": {
-                "title": {
-                    "text": "<b style='color:#e06150; font-size:16px'>👥 Team Members</b>",
-                    "font": {
-                        "color": "#e06150",
-                        "size": 16,
-                        "family": "Inter, Arial, sans-serif",
-                    },
-                },
-                "orientation": "v",
-                "xanchor": "left",
-                "x": 1,
-                "y": 0,
-                "bgcolor": "rgba(42, 42, 42, 0.8)",
-                "bordercolor": "rgba(224, 97, 80, 0.3)",
-                "borderwidth": 1,
-                "font": {
-                    "color": "white",
-                    "size": 12,
-                    "family": "Inter, Arial, sans-serif",
-                },
-                "itemsizing": "constant",
-                "itemwidth": 50,
-            },
-        },
-        "config": {"displaylogo": False, "displayModeBar": False, "showTips": False},
-    }
+    # Pie figure built from a frozen template; serialized in chart_response()
+    return PieChartPayload(
+        data_member.tolist(),
+        data_points.to_numpy(),
+        color_data,
+        layout_width,
+        layout_height,
+    )
 
 
-def get_custom_text(values, labels):
-    total = sum(values)
-    result = []
-    for i, v in enumerate(values):
-        if v == 0 or total == 0:
-            result.append("")
-        else:
-            percent = (v / total) * 100
-            if percent >= 0.95:
-                result.append(f"   {labels[i]} ({percent:.1f}%)   ")
-            else:
-                result.append("")
-    return result
+def chart_response(data):
+    """JSON response for a chart payload (pie payloads splice their own JSON)."""
+    if isinstance(data, PieChartPayload):
+        return Response(data.to_json(app.json.dumps), mimetype="application/json")
+    return jsonify(data)
 
 
 app = Flask(__name__)  # . .venv/bin/activate
+# NumPy-aware JSON encoding (orjson when installed) for every JSON response
+app.json = FastJSONProvider(app)
+# gzip/brotli Content-Encoding with a cache of already-compressed bodies
+init_compression(app)
 
 # Configure Flask session
 app.secret_key = os.getenv(
@@ -808,7 +863,10 @@ def index():
         latest_file = "No data"
         latest_date = "No data"
         time_ago = "No recent data"
+        file_timestamp = None
+        latest_file_name = ""
     else:
+        latest_file_name = os.path.basename(file_path)
         # Format the file string if possible
         try:
             latest_file = os.path.abspath(file_path)
@@ -821,7 +879,15 @@ def index():
 
     print(f"Latest file: {latest_file}, Date: {latest_date}, Time ago: {time_ago}")
     return render_template(
-        "index.html", saved_file=latest_file, latest_date=latest_date, time_ago=time_ago
+        "index.html",
+        saved_file=latest_file,
+        latest_date=latest_date,
+        time_ago=time_ago,
+        # Lets the page keep time_ago current client-side
+        file_timestamp=file_timestamp.timestamp() if file_timestamp else None,
+        # Seeds the page's lastKnownFile, so the first new_snapshot event is
+        # recognized as a new file even without an initial event
+        latest_file_name=latest_file_name,
     )
 
 
@@ -837,42 +903,42 @@ def get_chart_data():
             return jsonify(
                 {"error": "Not enough data available for the last day."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "last_week":
         data = get_last_week_range()
         if not data or "error" in data:
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "last_month":
         data = get_last_month_range()
         if not data or "error" in data:
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "last_year":
         data = get_last_year_range()
         if not data or "error" in data:
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "last_90_days":
         data = get_last_90_days_range()
         if not data or "error" in data:
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "last_180_days":
         data = get_last_180_days_range()
         if not data or "error" in data:
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "custom" and start and end:
         start_date = datetime.strptime(start, "%Y-%m-%d").date()
         end_date = datetime.strptime(end, "%Y-%m-%d").date()
@@ -881,12 +947,12 @@ def get_chart_data():
             return jsonify(
                 {"error": "Not enough data available for the selected range."}
             ), 400
-        return jsonify(data)
+        return chart_response(data)
     elif chart_type == "total":
         data = get_chart_total()
         if not data or "error" in data:
             return jsonify({"error": "Not enough data available."}), 400
-        return jsonify(data)
+        return chart_response(data)
     else:
         return jsonify({"error": "Invalid request"}), 400
 
@@ -925,17 +991,85 @@ def flask_progress_callback(msg, progress_percent, latest_date=None, saved_file=
         payload["latest_date"] = latest_date
     if saved_file is not None:
         payload["saved_file"] = saved_file
-    progress_queue.put(json.dumps(payload))
+    event_bus.publish("progress", payload)
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# host:port the sidecar receives events on; empty = serve SSE from Flask only
+SSE_EVENTS_UDP = os.getenv("SSE_EVENTS_UDP", "")
+# URL the pages open their EventSource on. With the asyncio SSE sidecar
+# (ibu_dashboard/sse_server.py) running it defaults to its port on the page's
+# host (":5001/events", resolved in the browser), so open tabs don't hold
+# uwsgi threads; set it to a proxied path such as "/events" behind a proxy.
+EVENTS_URL = os.getenv("EVENTS_URL") or (
+    f":{os.getenv('SSE_SERVER_PORT', '5001')}/events" if SSE_EVENTS_UDP else "/events"
+)
 
 
 @app.route("/progress_stream")
 def progress_stream():
-    def event_stream():
-        while True:
-            message = progress_queue.get()
-            yield f"data: {message}\n\n"
+    # Unnamed messages, as before; every open stream receives every update
+    return Response(
+        event_bus.stream(events={"progress"}, named=False),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
-    return Response(event_stream(), mimetype="text/event-stream")
+
+_snapshot_watcher = None
+_snapshot_watcher_lock = threading.Lock()
+_last_published_file = None
+
+
+def _on_snapshot_folder_change():
+    global _last_published_file
+    if PRECOMPUTE_ENABLED:
+        # Its warmups include sync_snapshot_views
+        response_precomputer.schedule()
+    else:
+        sync_snapshot_views()
+    info = latest_file_info()
+    if info.get("success") and info.get("latest_file") != _last_published_file:
+        _last_published_file = info.get("latest_file")
+        event_bus.publish("new_snapshot", info)
+
+
+def start_snapshot_watcher():
+    """Start (once per process) the thread that announces new snapshot CSVs."""
+    global _snapshot_watcher, _last_published_file
+    with _snapshot_watcher_lock:
+        if _snapshot_watcher is not None:
+            return
+        _last_published_file = latest_file_info().get("latest_file")
+        _snapshot_watcher = FolderWatcher(DATA_FOLDER, _on_snapshot_folder_change)
+        _snapshot_watcher.start()
+        if not PRECOMPUTE_ENABLED:
+            # Catch up on snapshots that landed while the app was down
+            threading.Thread(target=sync_snapshot_views, daemon=True).start()
+
+
+@app.context_processor
+def inject_events_url():
+    return {"events_url": EVENTS_URL}
+
+
+if SSE_EVENTS_UDP:
+    # Started at the end of the module (see below), once latest_file_info exists
+    event_bus.add_listener(UdpEventForwarder(SSE_EVENTS_UDP))
+
+
+@app.route("/events")
+def events():
+    """Broadcast SSE channel: new_snapshot and probation_recomputed events."""
+    start_snapshot_watcher()
+    return Response(
+        event_bus.stream(
+            events={"new_snapshot", "probation_recomputed"},
+            initial=lambda: [("new_snapshot", latest_file_info())],
+        ),
+        mimetype="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
 
 @app.route("/local_status")
@@ -1181,23 +1315,20 @@ def get_simple_stats():
         )
 
 
-@app.route("/get_latest_file_info")
-def get_latest_file_info():
-    """Get information about the latest CSV file for real-time updates"""
+def latest_file_info():
+    """Information about the latest CSV file (polled and pushed over /events)"""
     try:
         file_path, date_str, file_timestamp = get_latest_csv_file()
 
         if not file_path or not date_str:
-            return jsonify(
-                {
-                    "success": False,
-                    "message": "No CSV files found",
-                    "latest_file": "No data",
-                    "latest_date": "No data",
-                    "time_ago": "No recent data",
-                    "file_count": 0,
-                }
-            )
+            return {
+                "success": False,
+                "message": "No CSV files found",
+                "latest_file": "No data",
+                "latest_date": "No data",
+                "time_ago": "No recent data",
+                "file_count": 0,
+            }
 
         # Format the information
         try:
@@ -1212,27 +1343,31 @@ def get_latest_file_info():
         # Get total file count
         csv_files = get_csv_files_from_folder()
 
-        return jsonify(
-            {
-                "success": True,
-                "latest_file": latest_file,
-                "latest_date": latest_date,
-                "time_ago": time_ago,
-                "file_count": len(csv_files),
-                "file_path": file_path,
-                "date_str": date_str,
-            }
-        )
+        return {
+            "success": True,
+            "latest_file": latest_file,
+            "latest_date": latest_date,
+            "time_ago": time_ago,
+            # Epoch seconds, for clients re-rendering time_ago as time passes
+            "file_timestamp": file_timestamp.timestamp() if file_timestamp else None,
+            "file_count": len(csv_files),
+            "file_path": file_path,
+            "date_str": date_str,
+        }
 
     except Exception as e:
         print(f"Error getting latest file info: {str(e)}")
-        return jsonify(
-            {
-                "success": False,
-                "error": str(e),
-                "message": "Error retrieving file information",
-            }
-        )
+        return {
+            "success": False,
+            "error": str(e),
+            "message": "Error retrieving file information",
+        }
+
+
+@app.route("/get_latest_file_info")
+def get_latest_file_info():
+    """Get information about the latest CSV file for real-time updates"""
+    return jsonify(latest_file_info())
 
 
 @app.route("/get_updates")
@@ -1351,6 +1486,24 @@ def get_member_probation_status():
                 "error": f"Joined Date column missing. Found columns: {list(latest_df.columns)}. Please ensure your CSV files contain member join date information."
             }
 
+        # Member x date points history, indexed by stable member ID
+        matrix = get_points_matrix()
+        if matrix is None or not matrix.dates:
+            return {"error": "No CSV files found"}
+        snapshot_days = np.asarray(matrix.dates, dtype="datetime64[D]")
+        # Period boundaries without a snapshot are filled per ROLLING_GAP_POLICY
+        rolling = get_rolling_windows()
+
+        def first_points_from(member_id, since):
+            """Points in the first snapshot on/after `since` that contains the member."""
+            if member_id is None:
+                return None
+            hits = np.flatnonzero(
+                (snapshot_days >= np.datetime64(since.date()))
+                & matrix.present[member_id].astype(bool)
+            )
+            return int(matrix.points[member_id, hits[0]]) if len(hits) else None
+
         members_status = []
 
         for _, member_row in latest_df.iterrows():
@@ -1367,73 +1520,27 @@ def get_member_probation_status():
                 # Calculate time since joining
                 days_since_joined = (current_date - joined_date).days
 
-                # Define probation milestones
-                week_1_target = 250000  # 250k points
-                month_1_target = 1000000  # 1M points
-                month_3_target = 3000000  # 3M points
+                # Probation milestones (see milestone_projection.py)
+                week_1_target = MILESTONE_TARGETS["week_1"]
+                month_1_target = MILESTONE_TARGETS["month_1"]
+                month_3_target = MILESTONE_TARGETS["month_3"]
 
                 # Calculate milestone dates
-                week_1_date = joined_date + timedelta(days=7)
-                month_1_date = joined_date + timedelta(days=30)
-                month_3_date = joined_date + timedelta(days=90)
+                week_1_date = joined_date + timedelta(days=MILESTONE_DUE_DAYS["week_1"])
+                month_1_date = joined_date + timedelta(
+                    days=MILESTONE_DUE_DAYS["month_1"]
+                )
+                month_3_date = joined_date + timedelta(
+                    days=MILESTONE_DUE_DAYS["month_3"]
+                )
 
                 # Track points at each milestone - use None to indicate no data found
-                week_1_points = None
-                month_1_points = None
+                # (first snapshot on/after the milestone date that contains the member)
+                member_id = matrix.member_row(member_name)
+                week_1_points = first_points_from(member_id, week_1_date)
+                month_1_points = first_points_from(member_id, month_1_date)
                 month_3_points = current_points  # Current total
 
-                # Go through historical data to find points at milestone dates
-                for csv_file in reversed(csv_files):  # Start from oldest
-                    try:
-                        # Extract date from filename
-                        filename = os.path.basename(csv_file)
-                        date_match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
-                        if not date_match:
-                            continue
-
-                        file_date = datetime.strptime(date_match.group(1), "%Y-%m-%d")
-
-                        # Skip files before the member joined
-                        if file_date < joined_date:
-                            continue
-
-                        # Load CSV and find member
-                        df = pd.read_csv(csv_file)
-
-                        # Clean column names first
-                        df.columns = df.columns.str.strip()
-
-                        # Apply standard renames but preserve other columns
-                        column_renames = {}
-                        if "name" in df.columns:
-                            column_renames["name"] = "Member"
-                        if "points" in df.columns:
-                            column_renames["points"] = "Points"
-
-                        if column_renames:
-                            df = df.rename(columns=column_renames)
-
-                        # Skip if essential columns are missing
-                        if "Member" not in df.columns or "Points" not in df.columns:
-                            continue
-
-                        # Find member data
-                        member_data = df[df["Member"] == member_name]
-
-                        if member_data.empty:
-                            continue
-
-                        points_at_date = int(member_data.iloc[0]["Points"])
-
-                        # Record points at milestone dates (find closest date after milestone)
-                        if file_date >= week_1_date and week_1_points is None:
-                            week_1_points = points_at_date
-                        if file_date >= month_1_date and month_1_points is None:
-                            month_1_points = points_at_date
-
-                    except Exception:
-                        continue
-
                 # Calculate remaining points needed (always show actual remaining, even after deadline)
                 week_1_remaining = max(0, week_1_target - current_points)
                 month_1_remaining = max(0, month_1_target - current_points)
@@ -1545,14 +1652,14 @@ def get_member_probation_status():
 
                     # Check if enough time has passed to start post-probation tracking
                     if current_date >= probation_end_date:
-                        # Calculate all 90-day periods since probation ended
+                        # Calculate all PERIOD_DAYS periods since probation ended
                         period_start = probation_end_date
                         period_number = 1
 
                         # Process all periods (completed and current active period)
                         # Process all periods (completed and current active period)
                         while period_start <= current_date:
-                            period_end = period_start + timedelta(days=90)
+                            period_end = period_start + timedelta(days=PERIOD_DAYS)
                             is_current_period = (
                                 current_date < period_end
                             )  # True if this is the ongoing period
@@ -1561,153 +1668,34 @@ def get_member_probation_status():
                             points_at_start = 0
                             points_at_end = 0
 
-                            # Look through historical data for points at period boundaries
-                            # We need EXACT dates for both boundaries, not closest approximations
-                            period_start_found = False
-                            period_end_found = False
+                            # Look up points at period boundaries by member ID; a
+                            # boundary without a snapshot comes from the rolling grid
+                            # (unknown when the gap is too long)
 
                             # Debug: print period info for current calculations
                             print(
                                 f"Processing period {period_number} for {member_name}: {period_start.date()} to {period_end.date()}, current_period: {is_current_period}"
                             )
 
-                            for (
-                                csv_file
-                            ) in csv_files:  # Check all files, not just reversed
-                                try:
-                                    filename = os.path.basename(csv_file)
-                                    date_match = re.search(
-                                        r"(\d{4}-\d{2}-\d{2})", filename
-                                    )
-                                    if not date_match:
-                                        continue
-
-                                    file_date = datetime.strptime(
-                                        date_match.group(1), "%Y-%m-%d"
-                                    )
-
-                                    # Check for EXACT match with period start date
-                                    if (
-                                        file_date.date() == period_start.date()
-                                        and not period_start_found
-                                    ):
-                                        # Load CSV and find member for period start
-                                        df = pd.read_csv(csv_file)
-                                        df.columns = df.columns.str.strip()
-
-                                        column_renames = {}
-                                        if "name" in df.columns:
-                                            column_renames["name"] = "Member"
-                                        if "points" in df.columns:
-                                            column_renames["points"] = "Points"
-
-                                        if column_renames:
-                                            df = df.rename(columns=column_renames)
-
-                                        if (
-                                            "Member" not in df.columns
-                                            or "Points" not in df.columns
-                                        ):
-                                            continue
-
-                                        member_data = df[df["Member"] == member_name]
-                                        if not member_data.empty:
-                                            points_at_start = int(
-                                                member_data.iloc[0]["Points"]
-                                            )
-                                            period_start_found = True
-                                            print(
-                                                f"Found period start data: {points_at_start} points on {file_date.date()}"
-                                            )
-
-                                    # For current period, use current points instead of end date
-                                    if is_current_period:
-                                        # For ongoing period, use the latest available CSV file for current points
-                                        # Since current_date might not have a CSV, use the latest file
-                                        if (
-                                            csv_file == csv_files[0]
-                                        ):  # This is the latest/most recent file
-                                            df = pd.read_csv(csv_file)
-                                            df.columns = df.columns.str.strip()
-
-                                            column_renames = {}
-                                            if "name" in df.columns:
-                                                column_renames["name"] = "Member"
-                                            if "points" in df.columns:
-                                                column_renames["points"] = "Points"
-
-                                            if column_renames:
-                                                df = df.rename(columns=column_renames)
-
-                                            if (
-                                                "Member" not in df.columns
-                                                or "Points" not in df.columns
-                                            ):
-                                                continue
-
-                                            member_data = df[
-                                                df["Member"] == member_name
-                                            ]
-                                            if not member_data.empty:
-                                                points_at_end = int(
-                                                    member_data.iloc[0]["Points"]
-                                                )
-                                                period_end_found = True
-                                                print(
-                                                    f"Found current period end data: {points_at_end} points on {file_date.date()}"
-                                                )
-                                    else:
-                                        # Check for EXACT match with period end date (completed periods only)
-                                        if (
-                                            file_date.date() == period_end.date()
-                                            and not period_end_found
-                                        ):
-                                            # Load CSV and find member for period end
-                                            df = pd.read_csv(csv_file)
-                                            df.columns = df.columns.str.strip()
-
-                                            column_renames = {}
-                                            if "name" in df.columns:
-                                                column_renames["name"] = "Member"
-                                            if "points" in df.columns:
-                                                column_renames["points"] = "Points"
-
-                                            if column_renames:
-                                                df = df.rename(columns=column_renames)
-
-                                            if (
-                                                "Member" not in df.columns
-                                                or "Points" not in df.columns
-                                            ):
-                                                continue
-
-                                            member_data = df[
-                                                df["Member"] == member_name
-                                            ]
-                                            if not member_data.empty:
-                                                points_at_end = int(
-                                                    member_data.iloc[0]["Points"]
-                                                )
-                                                period_end_found = True
-                                                print(
-                                                    f"Found period end data: {points_at_end} points on {file_date.date()}"
-                                                )
-
-                                    # Stop searching if we found both boundary points
-                                    if period_start_found and (
-                                        period_end_found or is_current_period
-                                    ):
-                                        break
-
-                                except Exception:
-                                    continue
-
-                            # Calculate points earned in this period - ONLY if we have EXACT boundary data
+                            start_label = period_start.strftime("%Y-%m-%d")
+                            if is_current_period:
+                                # For ongoing period, use the latest available snapshot for current points
+                                end_label = matrix.dates[-1]
+                            else:
+                                end_label = period_end.strftime("%Y-%m-%d")
+                            start_value = rolling.value_on(member_id, start_label)
+                            end_value = rolling.value_on(member_id, end_label)
+                            period_start_found = start_value is not None
+                            period_end_found = end_value is not None
+                            points_at_start = start_value if period_start_found else 0
+                            points_at_end = end_value if period_end_found else 0
+
+                            # Calculate points earned in this period - ONLY if both boundaries are known
                             points_earned = 0
-                            target_points = 3000000  # 3M points per 90-day period
+                            target_points = PERIOD_TARGET  # per PERIOD_DAYS period
 
                             # Determine if this period was successful
-                            # We REQUIRE exact data for BOTH boundaries to make any determination
+                            # We REQUIRE data for BOTH boundaries to make any determination
                             period_status = "insufficient_data"
                             if (
                                 period_start_found
@@ -1729,7 +1717,7 @@ def get_member_probation_status():
                                         1, (current_date - period_start).days
                                     )  # Ensure at least 1 day
 
-                                    if days_elapsed > 0 and days_elapsed <= 90:
+                                    if days_elapsed > 0 and days_elapsed <= PERIOD_DAYS:
                                         if points_earned >= target_points:
                                             period_status = (
                                                 "compliant"  # Already achieved target
@@ -1767,6 +1755,11 @@ def get_member_probation_status():
                                 "status": period_status,
                                 "start_date_found": period_start_found,
                                 "end_date_found": period_end_found,
+                                # Boundary filled across a snapshot gap (not observed)
+                                "start_date_estimated": period_start_found
+                                and not rolling.is_observed(member_id, start_label),
+                                "end_date_estimated": period_end_found
+                                and not rolling.is_observed(member_id, end_label),
                                 "is_current_period": is_current_period,
                             }
 
@@ -1780,16 +1773,16 @@ def get_member_probation_status():
                                 days_elapsed = max(
                                     1, (current_date - period_start).days
                                 )  # Ensure at least 1 day
-                                days_remaining = max(0, 90 - days_elapsed)
+                                days_remaining = max(0, PERIOD_DAYS - days_elapsed)
 
                                 # Additional validation
                                 if (
                                     days_elapsed > 0
-                                    and days_elapsed <= 90
+                                    and days_elapsed <= PERIOD_DAYS
                                     and points_earned >= 0
                                 ):
                                     daily_rate = points_earned / days_elapsed
-                                    projected_total = daily_rate * 90
+                                    projected_total = daily_rate * PERIOD_DAYS
                                     remaining_needed = max(
                                         0, target_points - points_earned
                                     )
@@ -1882,6 +1875,7 @@ def get_member_probation_status():
 
                 member_status = {
                     "name": member_name,
+                    "member_id": member_id,
                     "joined_date": joined_date_str,
                     "joined_date_parsed": joined_date.strftime("%Y-%m-%d"),
                     "days_since_joined": days_since_joined,
@@ -1993,6 +1987,97 @@ def member_info():
         )
 
 
+@app.route("/api/member_activity")
+def api_member_activity():
+    """Last active day, production streaks and rolling 7/30/90-day production
+    for every member (or ?member=<name>)."""
+    try:
+        # Synced when snapshots are ingested; only a never-synced index is
+        # built here
+        start_snapshot_watcher()
+        index = member_activity
+        if index.summary() is None:
+            sync_member_activity()
+        name = request.args.get("member", "").strip()
+        if name:
+            # Member IDs are the index keys (current or former names resolve)
+            row = member_registry.resolve(name)
+            entry = index.member(str(row)) if row is not None else None
+            if entry is None:
+                return jsonify({"success": False, "error": "Unknown member"}), 404
+            return jsonify({"success": True, **entry})
+        summary = index.summary()
+        if summary is None:
+            return jsonify({"success": False, "error": "No CSV files found"}), 404
+        return jsonify({"success": True, **summary, "members": index.members()})
+    except Exception as e:
+        print(f"Error in api_member_activity: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/api/rolling_windows")
+def api_rolling_windows():
+    """Points a member earned in trailing windows (?windows=7,30,90,180) for
+    every day, with snapshot gaps handled per ?policy= (see
+    rolling_windows.py)."""
+    try:
+        name = request.args.get("member", "").strip()
+        policy = request.args.get("policy", ROLLING_GAP_POLICY)
+        if policy not in GAP_POLICIES:
+            return jsonify({"success": False, "error": "Invalid policy"}), 400
+        try:
+            windows = [
+                int(w)
+                for w in request.args.get(
+                    "windows", ",".join(map(str, ROLLING_WINDOWS))
+                ).split(",")
+                if w.strip()
+            ]
+        except ValueError:
+            windows = []
+        if not windows or any(w <= 0 for w in windows):
+            return jsonify({"success": False, "error": "Invalid windows"}), 400
+        start_date = request.args.get("start_date") or None
+        end_date = request.args.get("end_date") or None
+        try:
+            if start_date:
+                start_date = datetime.strptime(start_date, "%Y-%m-%d").date()
+            if end_date:
+                end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid date range"}), 400
+        engine = get_rolling_windows(policy)
+        matrix = get_points_matrix()
+        row = matrix.member_row(name) if name and matrix is not None else None
+        if engine is None or row is None:
+            return jsonify({"success": False, "error": "Unknown member"}), 404
+        # Grid days within [start_date, end_date] (empty outside the grid)
+        dates = engine.dates()
+        start = bisect.bisect_left(dates, start_date.isoformat()) if start_date else 0
+        end = (
+            bisect.bisect_right(dates, end_date.isoformat()) if end_date else len(dates)
+        )
+        end = max(start, end)
+        series = {}
+        for window in dict.fromkeys(windows):
+            values = engine.series(row, window)[start:end]
+            series[str(window)] = [
+                None if np.isnan(v) else int(round(v)) for v in values.tolist()
+            ]
+        return jsonify(
+            {
+                "success": True,
+                "member": matrix.members[row],
+                "policy": policy,
+                "dates": dates[start:end],
+                "windows": series,
+            }
+        )
+    except Exception as e:
+        print(f"Error in api_rolling_windows: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route("/get_probation_data")
 def get_probation_data():
     """API endpoint to get probation status data"""
@@ -2026,23 +2111,120 @@ def check_num_csv():
 
 def check_probation_cache():
     csv_count = check_num_csv()
+    # Recompute only when the number of snapshot CSVs changed
+    generation = str(csv_count)
+
+    def lookup():
+        return shared_cache.get("probation", "status", generation=generation)
+
+    def compute():
+        data = get_member_probation_status()
+        data["_csv_count"] = csv_count
+        shared_cache.set("probation", "status", data, generation=generation)
+        event_bus.publish(
+            "probation_recomputed",
+            {"csv_count": csv_count, "member_count": len(data.get("members", []))},
+        )
+        return data
+
+    cached = lookup()
+    if cached is not None:
+        return cached
+    # One recompute at a time across threads and workers; the rest reuse it
+    return single_flight.do(f"probation:{generation}", compute, lookup)
+
+
+def compute_milestone_projections(matrix):
+    """Milestone projections for the members of the latest snapshot, with the
+    join dates taken from that snapshot and the admin overrides applied."""
+    snapshot = history_store.snapshot(matrix.dates[-1]) if matrix.dates else None
+    joined = {}
+    for name, joined_str in zip(
+        (snapshot or {}).get("members", []), (snapshot or {}).get("joined", [])
+    ):
+        row = matrix.member_row(name)
+        joined_date = parse_joined_date(str(joined_str).strip('"'))
+        if row is not None and joined_date:
+            joined[row] = joined_date.date()
+    return project_milestones(matrix, joined, load_probation_overrides())
+
+
+def _overrides_stamp():
+    try:
+        return str(os.stat(OVERRIDES_FILE).st_mtime_ns)
+    except OSError:
+        return "0"
+
+
+def milestone_projection_entry(key):
+    """Pre-serialized projection JSON: "all" or "member:<name>" (current or
+    former name). Computed once per points matrix generation and overrides
+    file, stored in the shared cache with a "generation" entry naming the
+    current set; None when the key is unknown."""
+    matrix = get_points_matrix()
+    if matrix is None:
+        return None
+    generation = f"{matrix.generation}:{_overrides_stamp()}"
+    cached = shared_cache.get("milestones", key, generation=generation)
+    if cached is not None:
+        return cached
+
+    def lookup():
+        payload = shared_cache.get("milestones", "all", generation=generation)
+        return {"all": payload} if payload is not None else None
+
+    def compute():
+        payload = compute_milestone_projections(matrix)
+        payload["generation"] = generation
+        entries = {"all": app.json.dumps(payload).encode("utf-8")}
+        for name, projection in payload["members"].items():
+            entries[f"member:{name}"] = app.json.dumps(projection).encode("utf-8")
+        for alias, row in matrix.aliases().items():
+            current = f"member:{matrix.members[row]}"
+            if current in entries:
+                entries[f"member:{alias}"] = entries[current]
+        entries["generation"] = generation
+        shared_cache.set_many("milestones", entries, generation=generation)
+        return entries
+
+    entries = single_flight.do(f"milestones:{generation}", compute, lookup)
+    if key in entries:
+        return entries[key]
+    return shared_cache.get("milestones", key, generation=generation)
+
+
+def cached_milestone_projection(key):
+    """Projection JSON from the newest stored set without syncing the history
+    (the precomputer refreshes it when a snapshot lands); None when no set
+    is stored yet."""
+    generation = shared_cache.get("milestones", "generation")
+    if generation is None:
+        return None
+    body = shared_cache.get("milestones", key, generation=generation)
+    # A member missing from a stored set is unknown: b"" marks the 404
+    return body if body is not None else b""
 
-    # Check the cache to see if it needs to recompute
-    if os.path.exists(MEMBER_INFO_CACHE_FILE):
-        with open(MEMBER_INFO_CACHE_FILE) as f:
-            cached = json.load(f)
-        cached_csv_count = cached.get("_csv_count", 0)
-        # Return cache if CSV count is the same.
-        if cached_csv_count == csv_count:
-            return cached
 
-    # Otherwise recompute
-    data = get_member_probation_status()
-    data["_csv_count"] = csv_count
-    os.makedirs(os.path.dirname(MEMBER_INFO_CACHE_FILE), exist_ok=True)
-    with open(MEMBER_INFO_CACHE_FILE, "w") as f:
-        json.dump(data, f)
-    return data
+@app.route("/api/probation/projections")
+def api_probation_projections():
+    """Projected milestone completion dates (all members, or ?member=<name>)."""
+    try:
+        member = request.args.get("member", "").strip()
+        key = f"member:{member}" if member else "all"
+        body = cached_milestone_projection(key) if PRECOMPUTE_ENABLED else None
+        if body is None:
+            body = milestone_projection_entry(key)
+        if not body:
+            if member:
+                return (
+                    jsonify({"success": False, "error": "No projection for member"}),
+                    404,
+                )
+            return jsonify({"success": False, "error": "No CSV files found"}), 500
+        return Response(body, mimetype="application/json")
+    except Exception as e:
+        print(f"Error in api_probation_projections: {str(e)}")
+        return jsonify({"success": False, "error": str(e)}), 500
 
 
 @app.route("/test_notification")
@@ -2297,6 +2479,8 @@ def api_overrides():
 
         if not save_probation_overrides(data):
             return jsonify({"success": False, "error": "Failed to save overrides"}), 500
+        # Projections apply the overrides: recompute on the next request
+        shared_cache.clear("milestones")
 
         # Build a stable tri-state response for the member (include missing keys as null)
         per = data.get(member, {}) if member in data else {}
@@ -2318,6 +2502,48 @@ def api_overrides():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+@app.route("/api/admin/member_aliases", methods=["GET", "POST"])
+def api_admin_member_aliases():
+    """Get or record member renames. Admin only.
+    GET -> { members: [{id, name, aliases}] }
+    POST body: { alias: str, member: str } - 'alias' is another (usually former) name of 'member'.
+    """
+    if not session.get("admin_authenticated"):
+        return jsonify({"error": "Authentication required"}), 401
+    try:
+        if request.method == "GET":
+            aliases = {}
+            for alias, member_id in member_registry.aliases().items():
+                aliases.setdefault(member_id, []).append(alias)
+            members = [
+                {
+                    "id": member_id,
+                    "name": member_registry.name_of(member_id),
+                    "aliases": sorted(
+                        a for a in names if a != member_registry.name_of(member_id)
+                    ),
+                }
+                for member_id, names in sorted(aliases.items())
+            ]
+            return jsonify({"success": True, "members": members})
+
+        payload = request.get_json(silent=True) or {}
+        alias = str(payload.get("alias", "")).strip()
+        member = str(payload.get("member", "")).strip()
+        if not alias or not member:
+            return jsonify(
+                {"success": False, "error": "Both 'alias' and 'member' are required"}
+            ), 400
+        member_id = member_registry.add_alias(alias, member)
+        if member_id is None:
+            return jsonify({"success": False, "error": f"Unknown member '{member}'"}), 404
+        if not member_registry.save():
+            return jsonify({"success": False, "error": "Failed to save aliases"}), 500
+        return jsonify({"success": True, "member_id": member_id})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
 @app.route("/admin_login", methods=["GET", "POST"])
 def admin_login():
     """Admin login page"""
@@ -2396,26 +2622,12 @@ def get_file_count():
         if not os.path.exists(DATA_FOLDER):
             return jsonify({"error": "Data folder not found"}), 404
 
-        # Get all CSV files in the data folder
-        csv_files = glob.glob(os.path.join(DATA_FOLDER, "*.csv"))
-
-        # Filter files based on date range
-        filtered_files = []
-        for csv_file in csv_files:
-            filename = os.path.basename(csv_file)
-            # Extract date from filename (format: sheepit_team_points_YYYY-MM-DD.csv)
-            date_match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
-            if date_match:
-                file_date_str = date_match.group(1)
-                try:
-                    file_date = datetime.strptime(file_date_str, "%Y-%m-%d")
-                    if start_dt <= file_date <= end_dt:
-                        filtered_files.append(csv_file)
-                except ValueError:
-                    continue
+        # Count CSV files on disk plus snapshots kept only in the history store
+        all_entries = get_snapshot_archive_entries()
+        filtered_files = archive_entries_in_range(all_entries, start_date, end_date)
 
         return jsonify(
-            {"file_count": len(filtered_files), "total_files": len(csv_files)}
+            {"file_count": len(filtered_files), "total_files": len(all_entries)}
         )
 
     except Exception as e:
@@ -2435,8 +2647,8 @@ def download_csv_files():
         if not os.path.exists(DATA_FOLDER):
             return jsonify({"error": "Data folder not found"}), 404
 
-        # Get all CSV files in the data folder
-        csv_files = glob.glob(os.path.join(DATA_FOLDER, "*.csv"))
+        # CSV files on disk, plus snapshots only kept in the history store
+        csv_files = get_snapshot_archive_entries()
 
         if not csv_files:
             return jsonify({"error": "No CSV files found in data folder"}), 404
@@ -2445,40 +2657,30 @@ def download_csv_files():
         filtered_files = csv_files
         if start_date and end_date:
             try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-
-                filtered_files = []
-                for csv_file in csv_files:
-                    filename = os.path.basename(csv_file)
-                    # Extract date from filename (format: sheepit_team_points_YYYY-MM-DD.csv)
-                    date_match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
-                    if date_match:
-                        file_date_str = date_match.group(1)
-                        try:
-                            file_date = datetime.strptime(file_date_str, "%Y-%m-%d")
-                            if start_dt <= file_date <= end_dt:
-                                filtered_files.append(csv_file)
-                        except ValueError:
-                            continue
-
-                if not filtered_files:
-                    return jsonify(
-                        {"error": "No CSV files found in the specified date range"}
-                    ), 404
-
+                datetime.strptime(start_date, "%Y-%m-%d")
+                datetime.strptime(end_date, "%Y-%m-%d")
             except ValueError:
                 return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
 
+            filtered_files = archive_entries_in_range(csv_files, start_date, end_date)
+            if not filtered_files:
+                return jsonify(
+                    {"error": "No CSV files found in the specified date range"}
+                ), 404
+
         # Create a ZIP file in memory
         memory_file = io.BytesIO()
 
         with zipfile.ZipFile(memory_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for csv_file in filtered_files:
-                # Get just the filename (not the full path)
-                filename = os.path.basename(csv_file)
-                # Add file to ZIP
-                zf.write(csv_file, filename)
+            for filename, csv_file, date_str in filtered_files:
+                if csv_file is not None:
+                    # Add file to ZIP (just the filename, not the full path)
+                    zf.write(csv_file, filename)
+                    continue
+                # Rebuild the original CSV layout from the history store
+                data = history_store.export_csv(date_str)
+                if data is not None:
+                    zf.writestr(filename, data)
 
         memory_file.seek(0)
 
@@ -2548,6 +2750,7 @@ def api_trends_members():
         df = pd.read_csv(latest_info["path"])
         df = normalize_member_points_columns(df)
 
+        matrix = get_points_matrix()
         members = []
         for _, row in df.iterrows():
             member_name = row.get("Member", "") or row.get("Name", "")
@@ -2558,7 +2761,13 @@ def api_trends_members():
                 points_int = int(points_val) if pd.notna(points_val) else 0
             except Exception:
                 points_int = 0
-            members.append({"name": str(member_name), "current_points": points_int})
+            members.append(
+                {
+                    "name": str(member_name),
+                    "member_id": matrix.member_row(member_name) if matrix else None,
+                    "current_points": points_int,
+                }
+            )
 
         members.sort(key=lambda x: x["current_points"], reverse=True)
 
@@ -2641,9 +2850,263 @@ def api_trends_teams():
         return jsonify({"success": False, "error": str(e)}), 500
 
 
+def get_team_history(teams, start=None, end=None, coalesce=True):
+    """All-metric team history (see TeamIndex.history), cached per team index
+    generation so switching the plotted metric doesn't recompute it. Pass
+    coalesce=False from inside another single_flight.do() (no nesting)."""
+    index = sync_team_index()
+    generation = index.generation
+    teams = sorted(set(teams))
+    key = json.dumps([teams, start, end])
+
+    def lookup():
+        return shared_cache.get("team_history", key, generation=generation)
+
+    def compute():
+        data = index.history(teams, start, end)
+        shared_cache.set(
+            "team_history",
+            key,
+            data,
+            ttl=TRENDS_RESULT_TTL_SECONDS,
+            generation=generation,
+        )
+        return data
+
+    cached = lookup()
+    if cached is not None:
+        return cached
+    if not coalesce:
+        return compute()
+    return single_flight.do(f"team_history:{generation}:{key}", compute, lookup)
+
+
+@app.route("/api/trends/team_history")
+def api_trends_team_history():
+    """Rank and every team metric for ?teams=A,B over an optional date range,
+    as columns aligned on one date axis."""
+    try:
+        teams = [t.strip() for t in request.args.get("teams", "").split(",")]
+        teams = [t for t in teams if t]
+        if not teams:
+            return jsonify({"success": False, "error": "No teams requested"}), 400
+        start_date = request.args.get("start_date") or None
+        end_date = request.args.get("end_date") or None
+        try:
+            for value in (start_date, end_date):
+                if value:
+                    datetime.strptime(value, "%Y-%m-%d")
+        except ValueError:
+            return jsonify({"success": False, "error": "Invalid date range"}), 400
+        history = get_team_history(teams, start_date, end_date)
+        return jsonify(
+            {
+                "success": True,
+                "metrics": list(TEAM_METRICS) + ["rank"],
+                "dates": history["dates"],
+                "teams": {t: history["teams"][t] for t in dict.fromkeys(teams)},
+            }
+        )
+    except Exception as e:
+        print(f"Error getting team history: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+def compute_team_gaps(index):
+    """Serialized gap/overtake analytics ({"<window>:summary",
+    "<window>:team:<name>"} -> JSON bytes) for the teams of the latest
+    rankings file; {} when there is none."""
+    latest = index.latest()
+    if latest is None:
+        return {}
+    names = list(dict.fromkeys(latest.names))
+    # Exact names only: a team new to the rankings must not pick up the
+    # history of another team through the fuzzy prefix/token fallbacks
+    history = index.history(names, exact=True)
+    totals = [history["teams"][n]["total_points"] for n in names]
+    ranks = [history["teams"][n]["rank"][-1] for n in names]
+    entries = {}
+    for window in GAP_WINDOWS:
+        result = team_gap_analytics(history["dates"], names, totals, ranks, window)
+        entries[f"{window}:summary"] = app.json.dumps(
+            {
+                "success": True,
+                "as_of": result["as_of"],
+                "window": window,
+                "teams": result["summary"],
+            }
+        ).encode("utf-8")
+        for name, detail in result["teams"].items():
+            entries[f"{window}:team:{name}"] = app.json.dumps(
+                {"success": True, "as_of": result["as_of"], "window": window, **detail}
+            ).encode("utf-8")
+    return entries
+
+
+def team_gap_entry(key):
+    """Pre-serialized gap analytics for `key` (see compute_team_gaps), computed
+    once per team index generation; None when the key is unknown."""
+    index = sync_team_index()
+    generation = index.generation
+    cached = shared_cache.get("team_gaps", key, generation=generation)
+    if cached is not None:
+        return cached
+
+    def lookup():
+        summary = shared_cache.get(
+            "team_gaps", f"{GAP_WINDOWS[0]}:summary", generation=generation
+        )
+        return {} if summary is not None else None
+
+    def compute():
+        entries = compute_team_gaps(index)
+        if entries:
+            shared_cache.set_many("team_gaps", entries, generation=generation)
+        return entries
+
+    entries = single_flight.do(f"team_gaps:{generation}", compute, lookup)
+    if key in entries:
+        return entries[key]
+    return shared_cache.get("team_gaps", key, generation=generation)
+
+
+@app.route("/api/trends/team_gaps")
+def api_trends_team_gaps():
+    """Point gaps, closing velocities and projected overtakes between the
+    current teams (all teams, or pairwise detail for ?team=<name>)."""
+    try:
+        try:
+            window = int(request.args.get("window", GAP_WINDOWS[0]))
+        except ValueError:
+            window = None
+        if window not in GAP_WINDOWS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": f"window must be one of {list(GAP_WINDOWS)}",
+                    }
+                ),
+                400,
+            )
+        key = f"{window}:summary"
+        team = request.args.get("team", "").strip()
+        if team:
+            latest = sync_team_index().latest()
+            row = latest.resolve(team) if latest else -1
+            if row < 0:
+                return jsonify({"success": False, "error": "Unknown team"}), 404
+            key = f"{window}:team:{latest.names[row]}"
+        body = team_gap_entry(key)
+        if body is None:
+            return (
+                jsonify({"success": False, "error": "No team rankings files found"}),
+                404,
+            )
+        return Response(body, mimetype="application/json")
+    except Exception as e:
+        print(f"Error getting team gaps: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+@app.route("/api/rank_movements")
+def api_rank_movements():
+    """Biggest rank movers and streaks for ?kind=members|teams over ?period=
+    days, or one member/team's movement with ?name=."""
+    try:
+        kind = request.args.get("kind", "members")
+        if kind not in ("members", "teams"):
+            return jsonify({"success": False, "error": "Invalid kind"}), 400
+        try:
+            period = int(request.args.get("period", "7"))
+        except ValueError:
+            period = None
+        if period not in MOVEMENT_PERIODS:
+            return (
+                jsonify(
+                    {
+                        "success": False,
+                        "error": f"period must be one of {list(MOVEMENT_PERIODS)}",
+                    }
+                ),
+                400,
+            )
+        # Synced when snapshots are ingested; only a never-synced view is
+        # built here
+        start_snapshot_watcher()
+        view = rank_movements
+        if view.movers(kind, period) is None:
+            sync_rank_movements()
+        name = request.args.get("name", "").strip()
+        if name:
+            key = None
+            if kind == "members":
+                # Member IDs are the view keys (current or former names resolve)
+                row = member_registry.resolve(name)
+                key = str(row) if row is not None else None
+            else:
+                latest = team_index.latest()
+                row = latest.resolve(name) if latest else -1
+                key = latest.names[row] if row >= 0 else None
+            entry = view.entity(kind, key) if key is not None else None
+            if entry is None:
+                return (
+                    jsonify({"success": False, "error": f"Unknown {kind[:-1]}"}),
+                    404,
+                )
+            return jsonify({"success": True, **entry})
+        movers = view.movers(kind, period)
+        if movers is None:
+            return jsonify({"success": False, "error": "No snapshots available"}), 404
+        return jsonify({"success": True, **movers})
+    except Exception as e:
+        print(f"Error getting rank movements: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# Identical trends queries share one computation (see single_flight.py);
+# results are kept briefly in the shared cache for waiting workers
+TRENDS_RESULT_TTL_SECONDS = int(os.getenv("TRENDS_RESULT_TTL_SECONDS", "600"))
+# Lower bound for ?max_points (a line needs some resolution to keep its shape)
+MIN_MAX_POINTS = 50
+
+
 @app.route("/api/trends/data")
 def api_trends_data():
     """Return trend time-series data, with optional aggregation & predictions."""
+    if request.args.get("format") == "ndjson":
+        # Streamed progressively; not coalesced or cached
+        return _api_trends_data()
+    key = request_key(request.path, request.args)
+    generation = data_generation()
+
+    def lookup():
+        return shared_cache.get("trends", key, generation=generation)
+
+    def compute():
+        resp = app.make_response(_api_trends_data())
+        result = {
+            "status": resp.status_code,
+            "body": resp.get_data(as_text=True),
+            "mimetype": resp.mimetype,
+        }
+        if resp.status_code == 200:
+            shared_cache.set(
+                "trends",
+                key,
+                result,
+                ttl=TRENDS_RESULT_TTL_SECONDS,
+                generation=generation,
+            )
+        return result
+
+    result = single_flight.do(f"trends:{generation}:{key}", compute, lookup)
+    return Response(
+        result["body"], status=result["status"], mimetype=result["mimetype"]
+    )
+
+
+def _api_trends_data():
     # Parse requested series (comma separated in 'series' param)
     series_param = request.args.get("series", "")
     series_list = [s.strip() for s in series_param.split(",") if s.strip()]
@@ -2655,6 +3118,7 @@ def api_trends_data():
     predictions_enabled = request.args.get("predictions", "false").lower() == "true"
     prediction_method = request.args.get("prediction_method", "linear")
     prediction_days = int(request.args.get("prediction_days", "30"))
+    prediction_bands = request.args.get("prediction_bands", "false").lower() == "true"
     value_mode = request.args.get(
         "value_mode", "cumulative"
     )  # 'cumulative' or 'interval'
@@ -2677,436 +3141,161 @@ def api_trends_data():
             member_series.append(s)
     series_list = member_series
 
-    file_paths = get_csv_files_from_folder()
-    if not file_paths:
+    matrix = get_points_matrix()
+    if matrix is None or not matrix.dates:
         return jsonify({"success": False, "error": "No data files available"}), 404
 
-    # Build structured list (date parsing only once)
-    file_infos = []
-    for p in file_paths:
-        fname = os.path.basename(p)
-        m = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
-        if not m:
-            continue
-        try:
-            parsed_date = datetime.strptime(m.group(1), "%Y-%m-%d").date()
-        except ValueError:
-            continue
-        file_infos.append({"path": p, "filename": fname, "parsed_date": parsed_date})
-
-    if not file_infos:
-        return jsonify({"success": False, "error": "No parsable data files"}), 404
-
     # Date filtering
+    start_dt = end_dt = None
     if start_date:
         try:
             start_dt = datetime.strptime(start_date, "%Y-%m-%d").date()
-            file_infos = [f for f in file_infos if f["parsed_date"] >= start_dt]
         except ValueError:
             return jsonify({"success": False, "error": "Invalid start_date"}), 400
     if end_date:
         try:
             end_dt = datetime.strptime(end_date, "%Y-%m-%d").date()
-            file_infos = [f for f in file_infos if f["parsed_date"] <= end_dt]
         except ValueError:
             return jsonify({"success": False, "error": "Invalid end_date"}), 400
-
-    if not file_infos:
-        return jsonify({"success": False, "error": "No files in selected range"}), 404
-
-    file_infos.sort(key=lambda x: x["parsed_date"])
-
-    # Collect daily data
-    daily_data = {
-        name: {"dates": [], "points": [], "daily_change": [], "rank": []}
-        for name in series_list
-        if name != "total"
-    }
-    # 'total' handled separately
-    total_series_needed = "total" in series_list
-    total_data = (
-        {"dates": [], "points": [], "daily_change": []} if total_series_needed else None
+    # Optional LTTB downsampling of line traces; focus_start/focus_end (the
+    # zoomed window) stay at full resolution
+    downsampler = None
+    if request.args.get("max_points"):
+        try:
+            max_points = int(request.args["max_points"])
+            focus = None
+            if request.args.get("focus_start") and request.args.get("focus_end"):
+                focus = (
+                    datetime.strptime(request.args["focus_start"], "%Y-%m-%d").date(),
+                    datetime.strptime(request.args["focus_end"], "%Y-%m-%d").date(),
+                )
+        except ValueError:
+            return (
+                jsonify({"success": False, "error": "Invalid max_points or focus"}),
+                400,
+            )
+        if max_points > 0:
+            downsampler = TraceDownsampler(max(max_points, MIN_MAX_POINTS), focus)
+    cols = matrix.date_columns(
+        start_dt.isoformat() if start_dt else None,
+        end_dt.isoformat() if end_dt else None,
     )
 
-    last_points_tracker = {name: None for name in daily_data.keys()}
-    last_total_points = None
+    if not len(cols):
+        return jsonify({"success": False, "error": "No files in selected range"}), 404
 
-    for info in file_infos:
-        try:
-            df = pd.read_csv(info["path"])
-            df = normalize_member_points_columns(df)
-        except Exception as e:
-            print(f"Failed reading {info['path']}: {e}")
-            continue
-        date_label = info["parsed_date"].strftime("%Y-%m-%d")
+    date_labels = [matrix.dates[c] for c in cols]
+    present = matrix.present[:, cols].astype(bool)
 
-        # Total points (sum Points column) if needed
-        if total_series_needed:
-            total_points_value = 0
-            if "Points" in df.columns:
-                try:
-                    total_points_value = int(df["Points"].fillna(0).astype(int).sum())
-                except Exception:
-                    total_points_value = int(df["Points"].fillna(0).sum())
-            total_data["dates"].append(date_label)
-            total_data["points"].append(total_points_value)
-            if last_total_points is not None:
-                total_data["daily_change"].append(
-                    total_points_value - last_total_points
-                )
-            else:
-                total_data["daily_change"].append(0)
-            last_total_points = total_points_value
-
-        # Individual members
-        for member_name in daily_data.keys():
-            # Find row
-            member_row = None
-            for _, row in df.iterrows():
-                row_name = row.get("Name", str(row.get("Member", "")))
-                row_name = str(row_name).strip()
-                if row_name == member_name:
-                    member_row = row
-                    break
-            points_val = 0
-            rank_val = 0
-            if member_row is not None:
-                try:
-                    points_val = (
-                        int(member_row.get("Points", 0))
-                        if pd.notna(member_row.get("Points", 0))
-                        else 0
-                    )
-                except Exception:
-                    points_val = 0
-                try:
-                    rank_val = (
-                        int(member_row.get("Rank", 0))
-                        if pd.notna(member_row.get("Rank", 0))
-                        else 0
-                    )
-                except Exception:
-                    rank_val = 0
-            # Append
-            daily_member = daily_data[member_name]
-            daily_member["dates"].append(date_label)
-            daily_member["points"].append(points_val)
-            daily_member["rank"].append(rank_val)
-            if last_points_tracker[member_name] is not None:
-                daily_member["daily_change"].append(
-                    points_val - last_points_tracker[member_name]
-                )
-            else:
-                daily_member["daily_change"].append(0)
-            last_points_tracker[member_name] = points_val
-
-    # Combine into trends_data structure
+    def _series_from_values(values):
+        values = [int(v) for v in values]
+        changes = [0] + [b - a for a, b in zip(values, values[1:])]
+        return values, changes
 
     trends_data = {}
-    if total_series_needed:
+    if "total" in series_list:
+        totals = np.where(present, matrix.points[:, cols], 0).sum(axis=0)
+        total_points, total_changes = _series_from_values(totals)
         trends_data[
             "Total Team Points"
         ] = {  # Display label different from param 'total'
-            "dates": total_data["dates"],
-            "points": total_data["points"],
-            "daily_change": total_data["daily_change"],
+            "dates": list(date_labels),
+            "points": total_points,
+            "daily_change": total_changes,
             # Provide rank list of zeros so aggregation logic doesn't index error
-            "rank": [0] * len(total_data["dates"]),
+            "rank": [0] * len(date_labels),
+        }
+
+    # Individual members (rows of the shared memory-mapped matrix)
+    for member_name in dict.fromkeys(n for n in series_list if n != "total"):
+        row = matrix.member_row(member_name)
+        if row is None:
+            member_points = [0] * len(date_labels)
+            member_ranks = [0] * len(date_labels)
+        else:
+            member_points = np.where(present[row], matrix.points[row, cols], 0)
+            member_ranks = np.where(present[row], matrix.ranks[row, cols], 0)
+        points_list, changes = _series_from_values(member_points)
+        trends_data[member_name] = {
+            "dates": list(date_labels),
+            "points": points_list,
+            "daily_change": changes,
+            "rank": [int(r) for r in member_ranks],
         }
-    for k, v in daily_data.items():
-        trends_data[k] = v
 
     # --- Team rankings integration -------------------------------------------------
     if team_series_requested:
-        team_files = get_team_points_files_from_folder()
-        if team_files:
-            team_file_infos = []
-            for p in team_files:
-                fname = os.path.basename(p)
-                m2 = re.search(r"(\d{4}-\d{2}-\d{2})", fname)
-                if not m2:
-                    continue
-                try:
-                    parsed_date = datetime.strptime(m2.group(1), "%Y-%m-%d").date()
-                except ValueError:
-                    continue
-                # Respect date filters
-                if start_date:
-                    try:
-                        sd = datetime.strptime(start_date, "%Y-%m-%d").date()
-                        if parsed_date < sd:
-                            continue
-                    except Exception:
-                        pass
-                if end_date:
-                    try:
-                        ed = datetime.strptime(end_date, "%Y-%m-%d").date()
-                        if parsed_date > ed:
-                            continue
-                    except Exception:
-                        pass
-                team_file_infos.append({"path": p, "parsed_date": parsed_date})
-            team_file_infos.sort(key=lambda x: x["parsed_date"])
-            team_data_struct = {
-                t: {"dates": [], "points": [], "daily_change": [], "rank": []}
-                for t in team_series_requested
+        # Already coalesced per trends query (api_trends_data): don't nest
+        history = get_team_history(
+            team_series_requested,
+            start_dt.isoformat() if start_dt else None,
+            end_dt.isoformat() if end_dt else None,
+            coalesce=False,
+        )
+        metric = team_metric if team_metric in TEAM_METRICS else "total_points"
+        for tname in dict.fromkeys(team_series_requested):
+            columns = history["teams"][tname]
+            found = [i for i, v in enumerate(columns[metric]) if v is not None]
+            if not found:
+                continue
+            values = [columns[metric][i] for i in found]
+            # Prefix to distinguish from member names
+            trends_data[f"Team: {tname}"] = {
+                "dates": [history["dates"][i] for i in found],
+                "points": values,
+                "daily_change": [0]
+                + [max(0, b - a) for a, b in zip(values, values[1:])],
+                "rank": [columns["rank"][i] for i in found],
             }
-            last_vals = {t: None for t in team_series_requested}
-            for info in team_file_infos:
-                try:
-                    df_team = pd.read_csv(info["path"])
-                except Exception as e:
-                    print(f"Failed reading team rankings {info['path']}: {e}")
-                    continue
-                date_label = info["parsed_date"].strftime("%Y-%m-%d")
-                # Build normalized name map once per file for robust matching
-                try:
-                    df_team["_norm_name"] = (
-                        df_team["Name"].astype(str).str.strip().str.lower()
-                    )
-                except Exception:
-                    df_team["_norm_name"] = ""
-                # Pre-compute sanitized names
-                try:
-                    df_team["_san_name"] = df_team["Name"].apply(_sanitize_team_name)
-                except Exception:
-                    df_team["_san_name"] = df_team["_norm_name"]
-                debug_team_matching = []
-                for tname in team_series_requested:
-                    target_norm = tname.strip().lower()
-                    target_san = _sanitize_team_name(tname)
-                    # 1. Exact norm
-                    row = df_team[df_team["_norm_name"] == target_norm]
-                    # 2. Exact sanitized
-                    if row.empty:
-                        row = df_team[df_team["_san_name"] == target_san]
-                    # 3. Startswith norm (first 12 chars)
-                    if row.empty:
-                        cand = df_team[
-                            df_team["_norm_name"].str.startswith(target_norm[:12])
-                        ]
-                        if len(cand) == 1:
-                            row = cand
-                    # 4. Startswith sanitized (first 12 chars)
-                    if row.empty:
-                        cand2 = df_team[
-                            df_team["_san_name"].str.startswith(target_san[:12])
-                        ]
-                        if len(cand2) == 1:
-                            row = cand2
-                    # 5. Contains sanitized token (rare fallback) - pick first smallest rank
-                    if row.empty and target_san:
-                        subset = df_team[
-                            df_team["_san_name"].str.contains(
-                                target_san.split(" ")[0], na=False
-                            )
-                        ]
-                        if len(subset) == 1:
-                            row = subset
-                        elif len(subset) > 1:
-                            # choose row with minimal rank value if available
-                            try:
-                                subset_numeric = subset.copy()
-                                subset_numeric["__rk"] = pd.to_numeric(
-                                    subset_numeric.get("Rank"), errors="coerce"
-                                ).fillna(999999)
-                                row = subset_numeric.sort_values("__rk").head(1)
-                            except Exception:
-                                row = subset.head(1)
-                    if row.empty:
-                        debug_team_matching.append(
-                            {
-                                "requested": tname,
-                                "target_norm": target_norm,
-                                "target_san": target_san,
-                                "status": "not_found",
-                            }
-                        )
-                        continue
-                    r = row.iloc[0]
-
-                    def _metric_value(col):
-                        try:
-                            return int(r.get(col, 0)) if pd.notna(r.get(col, 0)) else 0
-                        except Exception:
-                            return 0
-
-                    if team_metric == "members":
-                        val = _metric_value("members")
-                    elif team_metric == "90_days":
-                        val = _metric_value("90_days")
-                    elif team_metric == "180_days":
-                        val = _metric_value("180_days")
-                    else:
-                        val = _metric_value("total_points")
-                    try:
-                        rk = int(r.get("Rank", 0)) if pd.notna(r.get("Rank", 0)) else 0
-                    except Exception:
-                        rk = 0
-                    entry = team_data_struct[tname]
-                    entry["dates"].append(date_label)
-                    entry["points"].append(val)
-                    if last_vals[tname] is None:
-                        entry["daily_change"].append(0)
-                    else:
-                        entry["daily_change"].append(max(0, val - last_vals[tname]))
-                    entry["rank"].append(rk)
-                    last_vals[tname] = val
-                    debug_team_matching.append(
-                        {
-                            "requested": tname,
-                            "target_norm": target_norm,
-                            "target_san": target_san,
-                            "matched_name": str(r.get("Name")),
-                            "date": date_label,
-                            "value": val,
-                            "rank": rk,
-                        }
-                    )
-                if debug_team_matching:
-                    # Print once per file to avoid log spam
-                    print(
-                        f"[TEAM_MATCH_DEBUG] file={info['path']} entries={debug_team_matching}"
-                    )
-            for tname, tdata in team_data_struct.items():
-                if tdata["dates"]:
-                    # Prefix to distinguish from member names
-                    trends_data[f"Team: {tname}"] = tdata
     # Track which dates originally existed (before gap fill) for interval production distribution
     for series_name, sdata in trends_data.items():
         sdata["observed_dates"] = set(sdata["dates"])
+    # Gap fill and 90/180-day buckets depend on the dates of all series; take
+    # them up front so each series can also be shaped on its own (streaming)
+    all_dates = [d for sdata in trends_data.values() for d in sdata["dates"]]
+    date_span = (min(all_dates), max(all_dates)) if all_dates else None
+
+    def shape_series(trends_data):
+        """Gap fill, aggregation and interval conversion of some series."""
+        # Fill missing daily dates (forward-fill points) to avoid gaps in daily view
+        if time_period == "daily":
+            trends_data = fill_missing_daily_dates(trends_data, date_span)
+
+        # Snapshot raw daily points & compute raw daily produced (before aggregation & before interval transformation)
+        raw_produced = period_over_period(
+            [sdata.get("points", []) for sdata in trends_data.values()]
+        )
+        for sdata, daily_prod in zip(trends_data.values(), raw_produced):
+            sdata["daily_points_raw"] = list(sdata.get("points", []))
+            sdata["daily_dates_raw"] = list(sdata.get("dates", []))
+            sdata["daily_produced_raw"] = daily_prod
+
+        # Aggregate if needed
+        if time_period != "daily":
+            trends_data = aggregate_time_period(
+                trends_data, time_period, date_span[0] if date_span else None
+            )
 
-    # Fill missing daily dates (forward-fill points) to avoid gaps in daily view
-    if time_period == "daily":
-        trends_data = fill_missing_daily_dates(trends_data)
-
-    # Snapshot raw daily points & compute raw daily produced (before aggregation & before interval transformation)
-    for series_name, sdata in trends_data.items():
-        pts = sdata.get("points", [])
-        daily_prod = []
-        prev = None
-        for p in pts:
-            if prev is None:
-                daily_prod.append(0)
-            else:
-                daily_prod.append(max(0, p - prev))
-            prev = p
-        sdata["daily_points_raw"] = list(pts)
-        sdata["daily_dates_raw"] = list(sdata.get("dates", []))
-        sdata["daily_produced_raw"] = daily_prod
-
-    # Aggregate if needed
-    if time_period != "daily":
-        trends_data = aggregate_time_period(trends_data, time_period)
-
-    # Convert to interval production if requested (replace points with per-period produced)
-    if value_mode == "interval":
-        for series_name, sdata in trends_data.items():
-            pts = sdata.get("points", [])
-            dates = sdata.get("dates", [])
-            produced = [0] * len(pts)
-            if not pts:
-                sdata["produced"] = produced
-                continue
-            # Daily: distribute delta across gaps between real observations
+        # Convert to interval production if requested (replace points with per-period produced)
+        if value_mode == "interval":
+            series = list(trends_data.values())
+            points_lists = [sdata.get("points", []) for sdata in series]
             if time_period == "daily":
-                observed = sdata.get("observed_dates", set())
-                last_real_index = None
-                last_real_points = None
-                for idx, (d_str, p_val) in enumerate(zip(dates, pts)):
-                    if d_str in observed:
-                        if last_real_index is None:
-                            # First observation: set produced to 0 to avoid huge spike (user preference)
-                            produced[idx] = 0
-                            last_real_index = idx
-                            last_real_points = p_val
-                            continue
-                        # Compute gap span (number of days between observations)
-                        gap_days = idx - last_real_index
-                        delta = (
-                            max(0, p_val - last_real_points)
-                            if last_real_points is not None
-                            else 0
-                        )
-                        if gap_days <= 0:
-                            last_real_index = idx
-                            last_real_points = p_val
-                            continue
-                        # Even distribution across gap_days (includes current real day)
-                        # Example: real at i0=0 and i1=2 (gap_days=2) -> distribute across indices 1 and 2
-                        per_day = delta // gap_days if gap_days > 0 else 0
-                        remainder = delta - per_day * gap_days
-                        for j in range(1, gap_days + 1):
-                            target_index = last_real_index + j
-                            add_val = per_day + (
-                                remainder if j == gap_days else 0
-                            )  # put remainder on last real day
-                            produced[target_index] = add_val
-                        last_real_index = idx
-                        last_real_points = p_val
-                sdata["produced"] = produced
+                # Daily: distribute delta across gaps between real observations
+                produced = distribute_gap_production(
+                    [sdata.get("dates", []) for sdata in series],
+                    points_lists,
+                    [sdata.get("observed_dates", set()) for sdata in series],
+                )
             else:
                 # Aggregated periods: simple difference period-over-period
-                prev = None
-                for i, p in enumerate(pts):
-                    if prev is None:
-                        # First aggregated period produced = 0 (avoid giant first bar)
-                        produced[i] = 0
-                    else:
-                        produced[i] = max(0, p - prev)
-                    prev = p
-                sdata["produced"] = produced
-        # produced now holds per-day estimated production (distributed over gaps)
-
-        # Optional: remove the first interval point entirely if requested (hide_first_interval=true)
-        if hide_first_interval:
-            for sname, sdata in trends_data.items():
-                if len(sdata.get("dates", [])) > 1:
-                    for key in [
-                        "dates",
-                        "points",
-                        "daily_change",
-                        "rank",
-                        "produced",
-                        "daily_points_raw",
-                        "daily_produced_raw",
-                        "daily_dates_raw",
-                    ]:
-                        if (
-                            key in sdata
-                            and isinstance(sdata[key], list)
-                            and len(sdata[key]) > 1
-                        ):
-                            sdata[key] = sdata[key][1:]
-                    # observed_dates is a set; remove first date if present
-                    if "observed_dates" in sdata and isinstance(
-                        sdata["observed_dates"], set
-                    ):
-                        # Determine original first date (after potential slice we don't need it)
-                        # Not strictly necessary to adjust, leave as-is or rebuild:
-                        pass
-
-    # Build traces
-    if chart_type == "candlestick":
-        traces = prepare_candlestick_data(
-            trends_data, value_mode=value_mode, time_period=time_period
-        )
-    elif chart_type == "bar":
-        traces = prepare_bar_data(trends_data, value_mode=value_mode)
-    else:
-        traces = prepare_line_data(
-            trends_data, value_mode=value_mode, fill_enabled=fill_lines
-        )
+                produced = period_over_period(points_lists)
+            for sdata, values in zip(series, produced):
+                sdata["produced"] = values
 
-    # Predictions
-    if predictions_enabled and prediction_days > 0:
-        add_prediction_traces(traces, prediction_method, prediction_days)
-
-    # Distinct dates count (from any first non-empty series)
-    data_points = 0
-    for t in traces:
-        if t.get("type") in ("scatter", "bar") and t.get("x"):
-            data_points = max(data_points, len(t.get("x", [])))
+            if hide_first_interval:
+                drop_first_interval(trends_data)
+        return trends_data
 
     y_axis_title = "Points Produced" if value_mode == "interval" else "Points"
     layout = {
@@ -3165,6 +3354,79 @@ def api_trends_data():
         "toImageButtonOptions": {"format": "png", "filename": "ibu_trends_chart"},
     }
 
+    metadata = {
+        "chart_type": chart_type,
+        "time_period": time_period,
+        "value_mode": value_mode,
+        "series_requested": original_series_list,
+        "member_series_resolved": series_list,
+        "team_series_requested": team_series_requested,
+        "team_metric": team_metric,
+        "fill_lines": fill_lines,
+        "date_range": {
+            "start": date_labels[0],
+            "end": date_labels[-1],
+        },
+    }
+    predict = predictions_enabled and prediction_days > 0
+    # arrays=typed: numeric/date arrays as base64 typed arrays (see typed_arrays.py)
+    encode = encode_trace if request.args.get("arrays") == "typed" else None
+    if encode:
+        metadata["arrays"] = "typed"
+
+    def finish(trace):
+        """Last step per trace, after predictions were derived from it."""
+        if downsampler:
+            trace = downsampler(trace)
+        return encode(trace) if encode else trace
+
+    def summary():
+        return {"downsampled": downsampler.reduced} if downsampler else {}
+
+    if request.args.get("format") == "ndjson":
+        # Each series is shaped right before its traces are sent, so the first
+        # lines go out while later series are still being aggregated
+        traces = (
+            trace
+            for name, sdata in trends_data.items()
+            for trace in iter_trend_traces(
+                shape_series({name: sdata}),
+                chart_type,
+                value_mode,
+                time_period,
+                fill_lines,
+            )
+        )
+        return Response(
+            stream_with_context(
+                _ndjson_trend_lines(
+                    traces,
+                    {"layout": layout, "config": config, "metadata": metadata},
+                    prediction_method if predict else None,
+                    prediction_days,
+                    prediction_bands,
+                    finish,
+                    summary,
+                )
+            ),
+            mimetype="application/x-ndjson",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    traces = list(
+        iter_trend_traces(
+            shape_series(trends_data), chart_type, value_mode, time_period, fill_lines
+        )
+    )
+    # Predictions
+    if predict:
+        add_prediction_traces(
+            traces, prediction_method, prediction_days, bands=prediction_bands
+        )
+    data_points = trace_data_points(traces)
+    traces = [finish(t) for t in traces]
+    metadata.update(summary())
+
     return jsonify(
         {
             "success": True,
@@ -3172,93 +3434,143 @@ def api_trends_data():
             "layout": layout,
             "config": config,
             "data_points": data_points,
-            "metadata": {
-                "chart_type": chart_type,
-                "time_period": time_period,
-                "value_mode": value_mode,
-                "series_requested": original_series_list,
-                "member_series_resolved": series_list,
-                "team_series_requested": team_series_requested,
-                "team_metric": team_metric,
-                "fill_lines": fill_lines,
-                "date_range": {
-                    "start": file_infos[0]["parsed_date"].strftime("%Y-%m-%d"),
-                    "end": file_infos[-1]["parsed_date"].strftime("%Y-%m-%d"),
-                },
-            },
+            "metadata": metadata,
         }
     )
 
 
-def add_prediction_traces(traces, method, days):
+# Per-date lists trimmed by drop_first_interval (open/high/low/close are not)
+FIRST_INTERVAL_KEYS = (
+    "dates",
+    "points",
+    "daily_change",
+    "rank",
+    "produced",
+    "daily_points_raw",
+    "daily_produced_raw",
+    "daily_dates_raw",
+)
+
+
+def drop_first_interval(trends_data):
+    """Remove each series' first interval point in place (its production is
+    always 0 and would only draw an empty first bar)."""
+    for sdata in trends_data.values():
+        if len(sdata.get("dates", [])) <= 1:
+            continue
+        for key in FIRST_INTERVAL_KEYS:
+            values = sdata.get(key)
+            if isinstance(values, list) and len(values) > 1:
+                sdata[key] = values[1:]
+
+
+def iter_trend_traces(trends_data, chart_type, value_mode, time_period, fill_lines):
+    """Yield chart traces one series at a time (same traces, same order as
+    calling the prepare_* function on the whole dict)."""
+    for name, sdata in trends_data.items():
+        single = {name: sdata}
+        if chart_type == "candlestick":
+            yield from prepare_candlestick_data(
+                single, value_mode=value_mode, time_period=time_period
+            )
+        elif chart_type == "bar":
+            yield from prepare_bar_data(single, value_mode=value_mode)
+        else:
+            yield from prepare_line_data(
+                single, value_mode=value_mode, fill_enabled=fill_lines
+            )
+
+
+def trace_data_points(traces):
+    """Distinct dates count (longest scatter/bar trace)."""
+    data_points = 0
+    for t in traces:
+        if t.get("type") in ("scatter", "bar") and t.get("x"):
+            data_points = max(data_points, len(t.get("x", [])))
+    return data_points
+
+
+def _ndjson_trend_lines(
+    traces,
+    meta,
+    prediction_method,
+    prediction_days,
+    prediction_bands=False,
+    finish=None,
+    summary=None,
+):
+    """Newline-delimited JSON for /api/trends/data?format=ndjson: a "meta"
+    line (layout/config/metadata), one "trace" line per trace as soon as it
+    is built, then an "end" line. Prediction traces follow the base traces,
+    matching the order of the regular JSON response. `finish` is applied to
+    each trace as it is sent; `summary()` adds fields to the "end" line."""
+    dumps = app.json.dumps
+    finish = finish or (lambda trace: trace)
+
+    def line(obj):
+        return dumps(obj) + "\n"
+
+    yield line({"type": "meta", **meta})
+    predictions = []
+    data_points = 0
+    try:
+        for trace in traces:
+            data_points = max(data_points, trace_data_points([trace]))
+            yield line({"type": "trace", "trace": finish(trace)})
+            if prediction_method:
+                extra = [trace]
+                add_prediction_traces(
+                    extra, prediction_method, prediction_days, bands=prediction_bands
+                )
+                predictions.extend(extra[1:])
+        for trace in predictions:
+            data_points = max(data_points, trace_data_points([trace]))
+            yield line({"type": "trace", "trace": finish(trace)})
+    except Exception as e:
+        print(f"Error streaming trends data: {e}")
+        yield line({"type": "error", "success": False, "error": str(e)})
+        return
+    end = {"type": "end", "success": True, "data_points": data_points}
+    end.update(summary() if summary else {})
+    yield line(end)
+
+
+# Line dash per forecast method (see ibu_dashboard/forecast.py)
+PREDICTION_DASH = {
+    "linear": "dash",
+    "moving_average": "dot",
+    "exponential": "dashdot",
+    "holt": "longdash",
+    "robust": "longdashdot",
+}
+
+
+def add_prediction_traces(traces, method, days, bands=False):
     """Append prediction traces in-place based on existing line/candlestick traces.
-    We only generate predictions for scatter (line) data or candlestick close values."""
+    We only generate predictions for scatter (line) data or candlestick close values.
+    All traces are fitted in one call (models cached per series content); with
+    `bands`, a shaded 95% confidence band follows each prediction line."""
     try:
-        future_color_suffix = {"linear": "dash", "moving_average": "dot"}.get(
-            method, "dash"
-        )
-        for trace in list(traces):  # iterate over a copy
+        sources = []
+        for trace in traces:
             # Determine y-series
             if trace.get("type") == "candlestick":
                 y_series = trace.get("close", [])
             else:
                 y_series = trace.get("y", [])
-            x_series = trace.get("x", [])
-            if len(y_series) < 3:
-                continue  # not enough data
-            # Build numeric x as day indices
-            base_dates = [datetime.strptime(d, "%Y-%m-%d") for d in x_series]
-            start_date = base_dates[0]
-            x_numeric = [(d - start_date).days for d in base_dates]
-
-            if method == "linear":
-                # Simple linear regression
-                n = len(x_numeric)
-                sum_x = sum(x_numeric)
-                sum_y = sum(y_series)
-                sum_xx = sum(x * x for x in x_numeric)
-                sum_xy = sum(x * y for x, y in zip(x_numeric, y_series))
-                denom = n * sum_xx - sum_x * sum_x
-                if denom == 0:
-                    continue
-                slope = (n * sum_xy - sum_x * sum_y) / denom
-                intercept = (sum_y - slope * sum_x) / n
-
-                def predict(x):
-                    return intercept + slope * x
-
-                # Use last trend continuation
-            else:  # moving_average
-                window = 5 if len(y_series) >= 5 else max(2, len(y_series) // 2)
-                avg_changes = []
-                for i in range(1, len(y_series)):
-                    avg_changes.append(y_series[i] - y_series[i - 1])
-                # average of last window changes
-                recent_change = (
-                    sum(avg_changes[-window:]) / len(avg_changes[-window:])
-                    if avg_changes
-                    else 0
-                )
-
-                def predict(x):
-                    # x here is absolute day index relative to start_date
-                    last_index = x_numeric[-1]
-                    delta_days = x - last_index
-                    return y_series[-1] + recent_change * delta_days
-
-            future_dates = []
-            future_values = []
-            last_index = x_numeric[-1]
-            last_date = base_dates[-1]
-            for i in range(1, days + 1):
-                future_date = last_date + timedelta(days=i)
-                future_dates.append(future_date.strftime("%Y-%m-%d"))
-                # Clamp predictions at zero to avoid negative values
-                y_pred = predict(last_index + i)
-                if y_pred < 0:
-                    y_pred = 0
-                future_values.append(y_pred)
-
+            if len(y_series) >= 3:  # otherwise not enough data
+                sources.append((trace, y_series))
+        models = forecast_cache.fit(
+            [(trace.get("x", []), y_series) for trace, y_series in sources], method
+        )
+        for (trace, _), model in zip(sources, models):
+            if model is None:
+                continue
+            mean, se = model.predict(days)
+            future_dates = model.dates(days)
+            # Clamp predictions at zero to avoid negative values
+            future_values = [v if v >= 0 else 0 for v in mean.tolist()]
+            color = trace.get("line", {}).get("color", "#999999")
             pred_trace = {
                 "name": f"{trace['name']} (Prediction)",
                 "type": "scatter",
@@ -3266,45 +3578,61 @@ def add_prediction_traces(traces, method, days):
                 "x": future_dates,
                 "y": future_values,
                 "line": {
-                    "color": trace.get("line", {}).get("color", "#999999"),
-                    "dash": future_color_suffix,
+                    "color": color,
+                    "dash": PREDICTION_DASH.get(method, "dash"),
                 },
                 "opacity": 0.7,
                 "hovertemplate": "<b>%{meta}</b><br>Date: %{x}<br>Predicted Points: %{y:.0f}<extra></extra>",
                 "meta": trace["name"],
             }
             traces.append(pred_trace)
+            if bands:
+                traces.extend(
+                    prediction_band_traces(trace["name"], future_dates, mean, se, color)
+                )
     except Exception as e:
         print(f"Prediction generation error: {e}")
 
 
-def aggregate_time_period(trends_data, time_period):
-    """Aggregate daily data into weekly, monthly, yearly, or fixed window periods (90/180 days).
-    For 90/180 day aggregation, buckets are aligned using the earliest date across all series
-    as the anchor to ensure consistent bucket boundaries for comparison.
-    """
-    aggregated_data = {}
-
-    # Compute a global anchor date (earliest across all series) for fixed-length windows
-    anchor_date = None
-    try:
-        for series in trends_data.values():
-            for d in series.get("dates", []) or []:
-                dt = datetime.strptime(d, "%Y-%m-%d")
-                if anchor_date is None or dt < anchor_date:
-                    anchor_date = dt
-    except Exception:
-        anchor_date = None
+def prediction_band_traces(name, dates, mean, se, color):
+    """Upper and lower bound traces; the lower one fills up to the upper."""
+    upper = np.nan_to_num(mean + BAND_Z * se, nan=0.0).clip(0)
+    lower = np.nan_to_num(mean - BAND_Z * se, nan=0.0).clip(0)
+    fillcolor = color + "26" if len(color) == 7 else color
+    common = {
+        "type": "scatter",
+        "mode": "lines",
+        "x": dates,
+        "line": {"width": 0, "color": color},
+        "showlegend": False,
+        "hoverinfo": "skip",
+        "meta": name,
+    }
+    return [
+        {**common, "name": f"{name} (Upper bound)", "y": upper.tolist()},
+        {
+            **common,
+            "name": f"{name} (Lower bound)",
+            "y": lower.tolist(),
+            "fill": "tonexty",
+            "fillcolor": fillcolor,
+        },
+    ]
 
-    # Determine window size (in days) for custom fixed windows
-    window_days = None
-    if time_period == "90_days":
-        window_days = 90
-    elif time_period == "180_days":
-        window_days = 180
 
-    for member_name, data in trends_data.items():
-        aggregated_data[member_name] = {
+def aggregate_time_period(trends_data, time_period, anchor=None):
+    """Aggregate daily data into weekly, monthly, yearly, or fixed window periods (90/180 days).
+    For 90/180 day aggregation, buckets are aligned using the earliest date across all series
+    (or `anchor`, YYYY-MM-DD) to ensure consistent bucket boundaries for comparison.
+
+    All series are concatenated into aligned arrays and reduced in one pass:
+    a period is a run of consecutive dates with the same period key; it yields
+    open/high/low/close of points, the summed daily_change and the mean rank
+    (truncated to int)."""
+    names = list(trends_data)
+    lengths = [len(trends_data[name]["dates"]) for name in names]
+    aggregated_data = {
+        name: {
             "dates": [],
             "points": [],
             "daily_change": [],
@@ -3314,104 +3642,119 @@ def aggregate_time_period(trends_data, time_period):
             "low": [],
             "close": [],
         }
+        for name in names
+    }
+    if not sum(lengths):
+        return aggregated_data
+
+    date_strs = [d for name in names for d in trends_data[name]["dates"]]
+    days = np.array(date_strs, dtype="datetime64[D]").astype(np.int64)
+    series_idx = np.repeat(np.arange(len(names)), lengths)
+
+    # Period key per date as a day number (1970-01-01 = 0, a Thursday)
+    window_days = {"90_days": 90, "180_days": 180}.get(time_period)
+    if window_days:
+        # Fixed-length windows anchored at the earliest date across all series
+        anchor = (
+            np.datetime64(anchor, "D").astype(np.int64)
+            if anchor is not None
+            else days.min()
+        )
+        keys = anchor + (days - anchor) // window_days * window_days
+    elif time_period == "weekly":
+        keys = days - (days + 3) % 7  # Monday of the week
+    elif time_period == "monthly":
+        keys = (
+            days.astype("datetime64[D]")
+            .astype("datetime64[M]")
+            .astype("datetime64[D]")
+            .astype(np.int64)
+        )
+    elif time_period == "yearly":
+        keys = (
+            days.astype("datetime64[D]")
+            .astype("datetime64[Y]")
+            .astype("datetime64[D]")
+            .astype(np.int64)
+        )
+    else:
+        keys = days
 
-        if not data["dates"]:
-            continue
-
-        # Group data by time period
-        current_period = None
-        period_data = []
-
-        for i, date_str in enumerate(data["dates"]):
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-
-            # Determine period based on time_period
-            if window_days and anchor_date is not None:
-                # Fixed-length window (e.g., 90 or 180 days) anchored at earliest date
-                delta_days = (date_obj - anchor_date).days
-                bucket_index = delta_days // window_days
-                period_start = anchor_date + timedelta(days=bucket_index * window_days)
-                period_key = period_start.strftime("%Y-%m-%d")
-            elif time_period == "weekly":
-                # Get Monday of the week
-                period_key = (date_obj - timedelta(days=date_obj.weekday())).strftime(
-                    "%Y-%m-%d"
-                )
-            elif time_period == "monthly":
-                period_key = date_obj.strftime("%Y-%m-01")
-            elif time_period == "yearly":
-                period_key = date_obj.strftime("%Y-01-01")
-            else:
-                period_key = date_str
-
-            if current_period != period_key:
-                # Process previous period
-                if period_data:
-                    process_period_data(
-                        aggregated_data[member_name], current_period, period_data
-                    )
-
-                # Start new period
-                current_period = period_key
-                period_data = []
+    starts = np.flatnonzero(
+        np.concatenate(
+            ([True], (keys[1:] != keys[:-1]) | (series_idx[1:] != series_idx[:-1]))
+        )
+    )
+    ends = np.append(starts[1:], len(days))
+    counts = ends - starts
 
-            # Safe rank access
-            rank_value = 0
-            if i < len(data.get("rank", [])):
-                try:
-                    rank_value = (
-                        int(data["rank"][i]) if data["rank"][i] is not None else 0
-                    )
-                except Exception:
-                    rank_value = 0
-            period_data.append(
-                {
-                    "date": date_str,
-                    "points": data["points"][i] if i < len(data["points"]) else 0,
-                    "daily_change": data["daily_change"][i]
-                    if i < len(data["daily_change"])
-                    else 0,
-                    "rank": rank_value,
-                }
-            )
+    points, points_int = _aligned_column(trends_data, names, lengths, "points")
+    changes, changes_int = _aligned_column(
+        trends_data, names, lengths, "daily_change"
+    )
+    ranks = _aligned_ranks(trends_data, names, lengths)
 
-        # Process last period
-        if period_data:
-            process_period_data(
-                aggregated_data[member_name], current_period, period_data
-            )
+    if window_days or time_period in ("weekly", "monthly", "yearly"):
+        period_keys = np.datetime_as_string(
+            keys[starts].astype("datetime64[D]")
+        ).tolist()
+    else:
+        period_keys = [date_strs[i] for i in starts]
+    opens = points[starts]
+    closes = points[ends - 1]
+    highs = np.maximum.reduceat(points, starts)
+    lows = np.minimum.reduceat(points, starts)
+    total_changes = np.add.reduceat(changes, starts)
+    avg_ranks = np.trunc(np.add.reduceat(ranks, starts) / counts).astype(np.int64)
+
+    bounds = np.searchsorted(series_idx[starts], np.arange(len(names) + 1))
+    for i, name in enumerate(names):
+        lo, hi = bounds[i], bounds[i + 1]
+        if lo == hi:
+            continue
+        as_int = points_int[i]
+        member = aggregated_data[name]
+        member["dates"] = period_keys[lo:hi]
+        member["points"] = _period_values(closes[lo:hi], as_int)
+        member["daily_change"] = _period_values(total_changes[lo:hi], changes_int[i])
+        member["rank"] = avg_ranks[lo:hi].tolist()
+        member["open"] = _period_values(opens[lo:hi], as_int)
+        member["high"] = _period_values(highs[lo:hi], as_int)
+        member["low"] = _period_values(lows[lo:hi], as_int)
+        member["close"] = _period_values(closes[lo:hi], as_int)
 
     return aggregated_data
 
 
-def process_period_data(member_data, period_date, period_data):
-    """Process data for a specific time period"""
-    if not period_data:
-        return
+def _aligned_column(trends_data, names, lengths, key):
+    """Concatenate one per-date list of every series (missing entries count
+    as 0) and note which series held integers, so their aggregates go back
+    out as ints."""
+    parts = []
+    is_int = []
+    for name, n in zip(names, lengths):
+        values = list(trends_data[name].get(key, [])[:n])
+        values += [0] * (n - len(values))
+        arr = np.asarray(values) if values else np.zeros(0, dtype=np.int64)
+        is_int.append(arr.dtype.kind in "iub")
+        parts.append(arr)
+    return np.concatenate(parts), is_int
 
-    # Calculate OHLC for candlestick charts
-    points_values = [d["points"] for d in period_data]
-    open_val = points_values[0]
-    close_val = points_values[-1]
-    high_val = max(points_values)
-    low_val = min(points_values)
 
-    # Calculate total change for the period
-    total_change = sum(d["daily_change"] for d in period_data)
+def _period_values(values, as_int):
+    return (values.astype(np.int64) if as_int else values).tolist()
 
-    # Use average rank for the period
-    avg_rank = (
-        sum(d["rank"] for d in period_data) / len(period_data) if period_data else 0
-    )
 
-    member_data["dates"].append(period_date)
-    member_data["points"].append(close_val)
-    member_data["daily_change"].append(total_change)
-    member_data["rank"].append(int(avg_rank))
-    member_data["open"].append(open_val)
-    member_data["high"].append(high_val)
-    member_data["low"].append(low_val)
-    member_data["close"].append(close_val)
+def _aligned_ranks(trends_data, names, lengths):
+    """Ranks as ints; missing, None or unparseable ranks count as 0."""
+    values = []
+    for name, n in zip(names, lengths):
+        ranks = list(trends_data[name].get("rank", [])[:n])
+        values.extend(ranks + [0] * (n - len(ranks)))
+    ranks = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    ranks = ranks.to_numpy(dtype=np.float64, copy=True)
+    ranks[~np.isfinite(ranks)] = 0
+    return np.trunc(ranks).astype(np.int64)
 
 
 def prepare_bar_data(trends_data, value_mode="cumulative"):
@@ -3421,10 +3764,11 @@ def prepare_bar_data(trends_data, value_mode="cumulative"):
     (Previous behavior used positive deltas for cumulative; replaced for clarity.)"""
     chart_data = []
     interval = value_mode == "interval"
+    resolve = member_registry.resolver()
     for member_name, data in trends_data.items():
         if not data.get("dates"):
             continue
-        color = name_to_color(member_name)
+        color = series_palette(member_name, resolve)["color"]
         if interval and "produced" in data:
             y_vals = data["produced"]
             label = "Produced"
@@ -3457,6 +3801,7 @@ def prepare_candlestick_data(trends_data, value_mode="cumulative", time_period="
     (Historical note: earlier version attempted baseline cumulative points; simplified now to production vs previous production.)"""
     chart_data = []
     interval = value_mode == "interval"
+    resolve = member_registry.resolver()
     for member_name, data in trends_data.items():
         dates = data.get("dates")
         if not dates:
@@ -3503,11 +3848,10 @@ def prepare_candlestick_data(trends_data, value_mode="cumulative", time_period="
             low_vals = low
             close_vals = c
             hover_template = "<b>%{meta}</b><br>Period: %{x}<br>O: %{open:,}<br>H: %{high:,}<br>L: %{low:,}<br>C: %{close:,}<extra></extra>"
-        base_color = name_to_color(member_name)
-        inc_color = blend_with(
-            base_color, (34, 197, 94), 0.55
-        )  # blend with emerald-500
-        dec_color = blend_with(base_color, (248, 113, 113), 0.55)  # blend with red-400
+        # Member color blended with emerald-500 / red-400 (precomputed per member)
+        palette = series_palette(member_name, resolve)
+        inc_color = palette["increasing"]
+        dec_color = palette["decreasing"]
         trace = {
             "name": member_name,
             "type": "candlestick",
@@ -3604,10 +3948,11 @@ def prepare_line_data(trends_data, value_mode="cumulative", fill_enabled=True):
     fill_enabled: when True apply area fill under lines; when False lines only."""
     chart_data = []
     label = "Produced" if value_mode == "interval" else "Points"
+    resolve = member_registry.resolver()
     for member_name, data in trends_data.items():
         if not data.get("dates"):
             continue
-        color = name_to_color(member_name)
+        color = series_palette(member_name, resolve)["color"]
         if value_mode == "interval" and "produced" in data:
             y_vals = data["produced"]
         else:
@@ -3637,19 +3982,23 @@ def prepare_line_data(trends_data, value_mode="cumulative", fill_enabled=True):
     return chart_data
 
 
-def fill_missing_daily_dates(trends_data):
+def fill_missing_daily_dates(trends_data, date_span=None):
     """Forward-fill missing dates across series so lines are continuous.
-    Uses min->max date over all series; carries last known point; daily_change=0 for filled days."""
+    Uses min->max date over all series (or the given (first, last) span, to
+    fill a subset of the series the same way); carries last known point;
+    daily_change=0 for filled days."""
     try:
-        # Gather all dates
-        all_dates = set()
-        for series in trends_data.values():
-            for d in series.get("dates", []):
-                all_dates.add(d)
-        if not all_dates:
-            return trends_data
-        start_dt = min(datetime.strptime(d, "%Y-%m-%d") for d in all_dates)
-        end_dt = max(datetime.strptime(d, "%Y-%m-%d") for d in all_dates)
+        if date_span is None:
+            # Gather all dates
+            all_dates = set()
+            for series in trends_data.values():
+                for d in series.get("dates", []):
+                    all_dates.add(d)
+            if not all_dates:
+                return trends_data
+            date_span = (min(all_dates), max(all_dates))
+        start_dt = datetime.strptime(date_span[0], "%Y-%m-%d")
+        end_dt = datetime.strptime(date_span[1], "%Y-%m-%d")
         # Build full date list
         full_dates = []
         cur = start_dt
@@ -3702,6 +4051,119 @@ def fill_missing_daily_dates(trends_data):
         return trends_data
 
 
+# --- Precomputed responses ---------------------------------------------------
+PRECOMPUTED_PIE_TYPES = (
+    "last_day",
+    "last_week",
+    "last_month",
+    "last_90_days",
+    "last_180_days",
+    "last_year",
+    "total",
+)
+PRECOMPUTED_TRENDS_VIEWS = (
+    ("daily", "cumulative"),
+    ("weekly", "cumulative"),
+    ("monthly", "cumulative"),
+    ("daily", "interval"),
+)
+
+
+# folder -> (directory mtime, newest CSV name); listed again only when the
+# directory itself changes
+_newest_csv_names = {}
+
+
+def _folder_stamp(folder):
+    """Directory mtime plus the size/mtime of the newest CSV (by name, i.e.
+    date): the scraper rewrites the current day's file in place, which leaves
+    the directory mtime unchanged."""
+    try:
+        dir_mtime = os.stat(folder).st_mtime_ns
+    except OSError:
+        return "0"
+    cached = _newest_csv_names.get(folder)
+    if cached is None or cached[0] != dir_mtime:
+        names = [n for n in os.listdir(folder) if n.endswith(".csv")]
+        cached = _newest_csv_names[folder] = (dir_mtime, max(names, default=None))
+    stamp = str(dir_mtime)
+    if cached[1]:
+        try:
+            st = os.stat(os.path.join(folder, cached[1]))
+            stamp += f"/{st.st_size}/{st.st_mtime_ns}"
+        except OSError:
+            pass
+    return stamp
+
+
+def data_generation():
+    """Changes when a snapshot lands or is rewritten in either data folder, when
+    member aliases change (member registry revision) or when the day rolls over
+    (the last_week/last_month/... pie ranges are relative to today)."""
+    folders = f"{_folder_stamp(DATA_FOLDER)}:{_folder_stamp(TEAMS_POINTS_FOLDER)}"
+    return f"{folders}:{member_registry.revision}:{datetime.today().date()}"
+
+
+def precomputed_urls():
+    """Requests made by every page load: the pie ranges, trends selectors and
+    the trends page's initial views (defaults from templates/trends.html)."""
+    urls = [f"/get_chart_data?type={t}&start=&end=" for t in PRECOMPUTED_PIE_TYPES]
+    urls += ["/api/trends/members", "/api/trends/teams"]
+    # The trends page sends its end date as the UTC day (Date.toISOString())
+    end_date = datetime.utcnow().strftime("%Y-%m-%d")
+    for time_period, value_mode in PRECOMPUTED_TRENDS_VIEWS:
+        params = {
+            "chart_type": "line",
+            "time_period": time_period,
+            "start_date": "2023-09-01",
+            "end_date": end_date,
+            "series": "total",
+            "value_mode": value_mode,
+            "predictions": "false",
+            "prediction_method": "linear",
+            "prediction_days": "30",
+            "prediction_bands": "false",
+            "fill_lines": "true",
+            "arrays": "typed",
+            "max_points": "1200",
+        }
+        urls.append(f"/api/trends/data?{urlencode(params)}")
+    return urls
+
+
+response_precomputer = ResponsePrecomputer(
+    app,
+    shared_cache,
+    data_generation,
+    precomputed_urls,
+    warmups=[
+        ("probation", check_probation_cache),
+        ("points matrix", get_points_matrix),
+        ("milestone projections", lambda: milestone_projection_entry("all")),
+        ("team gaps", lambda: team_gap_entry(f"{GAP_WINDOWS[0]}:summary")),
+        ("rank movements / member activity", sync_snapshot_views),
+    ],
+)
+if PRECOMPUTE_ENABLED:
+    response_precomputer.install()
+    try:
+        start_snapshot_watcher()
+        # Warm everything once at startup so the first visitor isn't cold
+        response_precomputer.schedule()
+    except Exception as _e:
+        print(f"[Precompute] Failed to start: {_e}")
+
+if SSE_EVENTS_UDP:
+    # No /events requests reach this worker, so watch for snapshots from the start
+    try:
+        start_snapshot_watcher()
+        # Give the sidecar the current file info to replay to new connections
+        # (identical datagrams from several workers are sent once)
+        event_bus.publish("new_snapshot", latest_file_info())
+    except Exception as _e:
+        print(f"Failed to start snapshot watcher: {_e}")
+
+
 # Flask startup
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))  # Render provides PORT env var
@@ -1,4 +1,9 @@
 #!/usr/bin/env bash
 
 crond
-./.venv/bin/uwsgi --http 0.0.0.0:5000 --master --enable-threads --lazy-apps --processes 1 -w main:app
\ No newline at end of file
+# SSE connections are served by the asyncio sidecar (ibu_dashboard/sse_server.py);
+# app workers forward their events to it over localhost UDP.
+export SSE_EVENTS_UDP="${SSE_EVENTS_UDP:-127.0.0.1:5002}"
+
+./.venv/bin/uwsgi --http 0.0.0.0:5000 --master --enable-threads --lazy-apps --processes 1 -w main:app \
+    --attach-daemon "./.venv/bin/python -m ibu_dashboard.sse_server"